@@ -1,7 +1,10 @@
 import streamlit as st
-import random
+import io
 import os
-from modules import config, api_client, generator
+import sqlite3
+# Le moteur de rendu (numpy, Pillow) n'est pas importé ici : il est chargé en
+# arrière-plan par le préchargement, ou à la première utilisation
+from modules import config, api_client, history, live_preview, quote_library, warmup
 
 # --- Configuration de la page Streamlit ---
 st.set_page_config(layout="wide", page_title="Générateur de Citations")
@@ -18,10 +21,43 @@ def init_session_state():
         st.session_state.author = "Franklin D. Roosevelt"
     if 'generated_image' not in st.session_state:
         st.session_state.generated_image = None
+    if 'generated_info' not in st.session_state:
+        st.session_state.generated_info = None
+    if 'generated_params' not in st.session_state:
+        st.session_state.generated_params = None
+    if 'using_default_font' not in st.session_state:
+        st.session_state.using_default_font = False
     if 'using_default_font_message_shown' not in st.session_state:
         st.session_state.using_default_font_message_shown = False
     if 'history' not in st.session_state:
-        st.session_state.history = []
+        st.session_state.history = history.SessionHistory()
+    # Valeurs par défaut des options (restaurables depuis l'historique)
+    for key in ('add_watermark', 'add_signature', 'auto_fit', 'preview_mode'):
+        if key not in st.session_state:
+            st.session_state[key] = True
+    if 'image_format' not in st.session_state:
+        st.session_state.image_format = config.DEFAULT_FORMAT
+    if 'encoder_profile' not in st.session_state:
+        st.session_state.encoder_profile = config.DEFAULT_ENCODER_PROFILE
+    if 'debug_panel' not in st.session_state:
+        st.session_state.debug_panel = False
+    if 'live_preview' not in st.session_state:
+        st.session_state.live_preview = False
+    if 'preview_scheduler' not in st.session_state:
+        st.session_state.preview_scheduler = live_preview.PreviewScheduler()
+    if 'live_generation' not in st.session_state:
+        st.session_state.live_generation = 0
+    if 'animation' not in st.session_state:
+        st.session_state.animation = None
+    if 'animation_effect' not in st.session_state:
+        st.session_state.animation_effect = config.DEFAULT_ANIMATION_EFFECT
+    if 'animation_format' not in st.session_state:
+        st.session_state.animation_format = config.DEFAULT_ANIMATION_FORMAT
+    for key in ('library_keywords', 'library_author'):
+        if key not in st.session_state:
+            st.session_state[key] = ''
+    if 'library_page' not in st.session_state:
+        st.session_state.library_page = 0
 
 init_session_state()
 
@@ -32,12 +68,16 @@ def render_sidebar():
     
     # Source de la citation
     source = st.sidebar.radio("Source de la citation :", 
-                              ('Manuelle', 'API (type.fit)'), 
+                              ('Manuelle', 'API (type.fit)', 'Bibliothèque'), 
                               key='source_choice')
     
     if source == 'API (type.fit)':
+        # Démarre le préchargement pour que le premier clic soit immédiat
+        api_client.get_prefetcher()
         if st.sidebar.button("💡 Charger une citation aléatoire"):
             load_random_quote()
+    elif source == 'Bibliothèque':
+        render_library_search()
     
     # Entrée manuelle
     st.sidebar.text_area("Citation :", key='quote', height=150)
@@ -46,6 +86,11 @@ def render_sidebar():
     # Options de style
     st.sidebar.subheader("Style de l'image")
     
+    st.sidebar.selectbox("Format :",
+                         list(config.FORMATS),
+                         format_func=lambda name: config.FORMATS[name]['label'],
+                         key='image_format')
+    
     st.sidebar.selectbox("Thème :", 
                          config.THEMES.keys(), 
                          key='theme_choice')
@@ -59,13 +104,32 @@ def render_sidebar():
                          key='decoration_style')
     
     st.sidebar.checkbox("Ajouter un watermark", 
-                        value=True, 
                         key='add_watermark')
     
     st.sidebar.checkbox("Ajouter signature", 
-                        value=True, 
                         key='add_signature')
     
+    st.sidebar.checkbox("Ajuster la taille du texte", 
+                        key='auto_fit',
+                        help="Réduit la taille de la citation pour qu'elle tienne dans l'image")
+    
+    st.sidebar.selectbox("Format de téléchargement :",
+                         list(config.ENCODER_PROFILES),
+                         format_func=lambda name: config.ENCODER_PROFILES[name]['label'],
+                         key='encoder_profile')
+    
+    st.sidebar.checkbox("Aperçu rapide",
+                        key='preview_mode',
+                        help="Affiche un aperçu réduit ; l'image en taille réelle est produite au téléchargement")
+    
+    st.sidebar.checkbox("Aperçu en direct",
+                        key='live_preview',
+                        help="Met à jour l'aperçu à chaque modification, sans cliquer sur « Générer »")
+    
+    st.sidebar.checkbox("Mode débogage",
+                        key='debug_panel',
+                        help="Affiche la durée de chaque étape du rendu et l'usage des caches")
+    
     st.sidebar.divider()
     
     return st.sidebar.button("🚀 Générer l'image", 
@@ -88,27 +152,220 @@ def load_random_quote():
         else:
             st.sidebar.warning("Impossible de charger la citation depuis l'API.")
 
-def add_to_history(quote, author, image, theme, background, decoration):
-    """Ajoute une citation à l'historique."""
-    # Identifiant unique pour l'historique
-    timestamp = random.randint(1000, 9999)
-    
-    history_item = {
-        "id": timestamp,
-        "quote": quote,
-        "author": author,
-        "image": image,
-        "theme": theme,
-        "background": background,
-        "decoration": decoration
+def use_library_quote(text, author):
+    """Place une citation de la bibliothèque dans les champs de saisie."""
+    st.session_state.quote = text
+    st.session_state.author = author
+    st.session_state.generated_image = None
+    st.session_state.using_default_font_message_shown = False
+
+def reset_library_page():
+    """Revient à la première page quand la recherche change."""
+    st.session_state.library_page = 0
+
+def change_library_page(step):
+    """Passe à la page de résultats précédente (-1) ou suivante (+1)."""
+    st.session_state.library_page = max(0, st.session_state.library_page + step)
+
+def sample_library_quote():
+    """Tire au hasard une citation parmi les résultats de la recherche."""
+    quotes = quote_library.get_quote_library().sample(
+        1, st.session_state.library_keywords, st.session_state.library_author)
+    if quotes:
+        use_library_quote(quotes[0].text, quotes[0].author)
+    else:
+        st.sidebar.warning("Aucune citation ne correspond à la recherche.")
+
+def import_library_files():
+    """Importe dans la bibliothèque les fichiers déposés (JSON, JSONL ou CSV)."""
+    library = quote_library.get_quote_library()
+    for uploaded in st.session_state.library_upload or []:
+        try:
+            stream = io.TextIOWrapper(uploaded, encoding='utf-8-sig', newline='')
+            summary = library.import_stream(stream, quote_library.format_from_name(uploaded.name))
+            st.sidebar.success(f"{uploaded.name} : {summary['added']} citations ajoutées, "
+                               f"{summary['skipped']} déjà présentes")
+        except ValueError as e:
+            st.sidebar.error(f"{uploaded.name} ignoré : {e}")
+    reset_library_page()
+
+def library_manifest():
+    """
+    Construit le manifeste de rendu en lot de tous les résultats de la recherche.
+    
+    Returns:
+        str: Manifeste JSONL pour modules.batch, avec le style choisi dans la barre latérale
+    """
+    params = current_params()
+    stream = io.StringIO()
+    quote_library.write_manifest(
+        quote_library.get_quote_library().iter_matches(st.session_state.library_keywords,
+                                                       st.session_state.library_author),
+        stream, theme=params['theme'], background=params['background_style'],
+        decoration=params['decoration'], watermark=params['watermark'],
+        signature=params['signature'], auto_fit=params['auto_fit'],
+        profile=params['profile'], format=params['image_format'])
+    return stream.getvalue()
+
+def render_library_search():
+    """Rend la recherche dans la bibliothèque locale de citations."""
+    st.sidebar.text_input("Mots-clés :", key='library_keywords', on_change=reset_library_page)
+    st.sidebar.text_input("Auteur recherché :", key='library_author', on_change=reset_library_page)
+    
+    try:
+        result = quote_library.get_quote_library().search(
+            st.session_state.library_keywords, st.session_state.library_author,
+            page=st.session_state.library_page)
+    except sqlite3.Error as e:
+        st.sidebar.error(f"Bibliothèque de citations indisponible : {e}")
+        return
+    st.session_state.library_page = result.page
+    
+    if result.total:
+        more = "+" if result.total_capped else ""
+        st.sidebar.caption(f"{min(result.total, config.QUOTE_LIBRARY_COUNT_LIMIT)}{more} citation(s) · "
+                           f"page {result.page + 1}/{result.pages}")
+        for quote in result.quotes:
+            text = quote.text if len(quote.text) <= 80 else quote.text[:79] + "…"
+            st.sidebar.button(f"« {text} » — {quote.author}", key=f"library_quote_{quote.id}",
+                              on_click=use_library_quote, args=(quote.text, quote.author),
+                              use_container_width=True)
+        col_previous, col_next = st.sidebar.columns(2)
+        col_previous.button("◀ Précédente", disabled=result.page == 0,
+                            on_click=change_library_page, args=(-1,), use_container_width=True)
+        col_next.button("Suivante ▶", disabled=result.page + 1 >= result.pages,
+                        on_click=change_library_page, args=(1,), use_container_width=True)
+        st.sidebar.button("🎲 Citation au hasard parmi les résultats", on_click=sample_library_quote)
+        st.sidebar.download_button("📄 Manifeste de rendu en lot (.jsonl)", data=library_manifest,
+                                   file_name="citations.jsonl", mime="application/jsonl",
+                                   help="À rendre avec : python -m modules.batch citations.jsonl")
+    else:
+        st.sidebar.caption("Aucune citation trouvée. Importez des fichiers de citations ci-dessous.")
+    
+    with st.sidebar.expander("📚 Importer des citations"):
+        st.file_uploader("Fichiers JSON (dont le format type.fit), JSONL ou CSV",
+                         type=['json', 'jsonl', 'csv'], accept_multiple_files=True,
+                         key='library_upload')
+        st.button("Importer", on_click=import_library_files)
+
+def add_to_history(params, image):
+    """Ajoute un rendu à l'historique (paramètres et miniature uniquement)."""
+    st.session_state.history.add(params, image)
+
+def render_for_display(params):
+    """
+    Rend l'image à afficher : un aperçu réduit en mode aperçu rapide, l'image finale sinon.
+    
+    Args:
+        params (dict): Arguments de generator.render_quote
+        
+    Returns:
+        RenderResult: Résultat du rendu
+    """
+    if st.session_state.preview_mode:
+        # L'aperçu n'est pas conservé dans le cache de rendus sur disque
+        return live_preview.render_preview(params)
+    from modules import generator
+    return generator.render_quote(**params)
+
+def render_full_resolution(params):
+    """Rend l'image en taille réelle au moment du téléchargement."""
+    from modules import generator
+    result = generator.render_quote(**params)
+    return result.data if result.ok else b''
+
+def show_render_result(result, params, preview=None):
+    """
+    Place un rendu réussi dans l'aperçu avec son format, sa taille et son coût d'encodage.
+    
+    Args:
+        result (RenderResult): Rendu à afficher
+        params (dict): Arguments de generator.render_quote
+        preview (bool): Si le rendu est un aperçu réduit (mode aperçu rapide par défaut)
+    """
+    st.session_state.generated_image = result.data
+    st.session_state.generated_params = params
+    # Une animation ne correspond qu'à l'image pour laquelle elle a été créée
+    st.session_state.animation = None
+    profile = config.ENCODER_PROFILES[params['profile']]
+    st.session_state.generated_info = {
+        'profile': params['profile'],
+        'mime': profile['mime'],
+        'extension': profile['extension'],
+        'preview': st.session_state.preview_mode if preview is None else preview,
+        'size': result.size,
+        'encode_ms': result.encode_ms,
+        'colors': result.colors,
+        'cached': result.cached,
+        'metrics': result.metrics.to_dict() if result.metrics is not None else None
     }
+
+def create_animation():
+    """Produit l'animation de l'image affichée avec l'effet et le format choisis."""
+    params = st.session_state.generated_params
+    if not params:
+        return
+    from modules import animation
+    result = animation.render_animation(
+        params['quote'], params['author'], theme=params['theme'],
+        background_style=params['background_style'], watermark=params['watermark'],
+        signature=params['signature'], decoration=params['decoration'],
+        auto_fit=params['auto_fit'], image_format=params['image_format'],
+        effect=st.session_state.animation_effect,
+        animation_format=st.session_state.animation_format
+    )
+    st.session_state.animation = result if result.ok else None
+    if not result.ok:
+        for error in result.errors:
+            st.error(error)
+
+def reuse_history_entry(key):
+    """Restaure les paramètres d'une entrée d'historique et reconstruit son image."""
+    entry = st.session_state.history.get(key)
+    if entry is None:
+        return
+    params = entry.params
+    st.session_state.quote = params['quote']
+    st.session_state.author = params['author']
+    st.session_state.theme_choice = params['theme']
+    st.session_state.background_style = params['background_style']
+    st.session_state.decoration_style = params['decoration'] or 'aucune'
+    st.session_state.add_watermark = params['watermark']
+    st.session_state.add_signature = params['signature']
+    st.session_state.auto_fit = params['auto_fit']
+    st.session_state.encoder_profile = params['profile']
+    st.session_state.image_format = params['image_format']
     
-    # Ajouter au début de l'historique
-    st.session_state.history.insert(0, history_item)
+    # L'image n'est pas gardée dans l'historique : elle est rendue à nouveau
+    result = render_for_display(params)
+    if result.ok:
+        show_render_result(result, params)
+    else:
+        st.session_state.generated_image = None
+        st.session_state.generated_info = None
+
+def current_params():
+    """
+    Rassemble les paramètres de rendu choisis dans la barre latérale.
+    
+    Returns:
+        dict: Arguments de generator.render_quote
+    """
+    # Gestion de la valeur du paramètre decoration
+    decoration_param = None if st.session_state.decoration_style == 'aucune' else st.session_state.decoration_style
     
-    # Limiter la taille de l'historique
-    if len(st.session_state.history) > config.MAX_HISTORY_SIZE:
-        st.session_state.history.pop()
+    return {
+        'quote': st.session_state.quote,
+        'author': st.session_state.author,
+        'theme': st.session_state.theme_choice,
+        'background_style': st.session_state.background_style,
+        'watermark': st.session_state.add_watermark,
+        'signature': st.session_state.add_signature,
+        'decoration': decoration_param,
+        'auto_fit': st.session_state.auto_fit,
+        'profile': st.session_state.encoder_profile,
+        'image_format': st.session_state.image_format
+    }
 
 def generate_image():
     """Génère l'image de citation avec les paramètres actuels."""
@@ -117,37 +374,30 @@ def generate_image():
         return False
     
     with st.spinner("Création de l'image..."):
-        # Gestion de la valeur du paramètre decoration
-        decoration_param = None if st.session_state.decoration_style == 'aucune' else st.session_state.decoration_style
+        params = current_params()
         
-        # Générer l'image
-        image_bytes = generator.generate_quote_image(
-            st.session_state.quote,
-            st.session_state.author,
-            theme=st.session_state.theme_choice,
-            background_style=st.session_state.background_style,
-            watermark=st.session_state.add_watermark,
-            signature=st.session_state.add_signature,
-            decoration=decoration_param
-        )
+        # Générer l'image (ou son aperçu réduit)
+        result = render_for_display(params)
+        
+        # Afficher les avertissements du rendu (polices manquantes...)
+        for warning in result.warnings:
+            st.sidebar.warning(warning)
+        st.session_state.using_default_font = result.used_default_font
         
+        image_bytes = result.data if result.ok else None
         if image_bytes:
-            st.session_state.generated_image = image_bytes
+            show_render_result(result, params)
             
-            # Ajouter à l'historique
-            add_to_history(
-                st.session_state.quote,
-                st.session_state.author,
-                image_bytes,
-                st.session_state.theme_choice,
-                st.session_state.background_style,
-                st.session_state.decoration_style
-            )
+            # Ajouter à l'historique (la miniature est tirée de l'image déjà rendue)
+            add_to_history(params, result.image if result.image is not None else image_bytes)
             
             return True
         else:
+            for error in result.errors:
+                st.error(error)
             st.error("La génération de l'image a échoué.")
             st.session_state.generated_image = None
+            st.session_state.generated_info = None
             return False
 
 # --- Interface principale ---
@@ -156,7 +406,7 @@ def render_main_column():
     st.subheader("Aperçu :")
     
     # Afficher un avertissement si la police par défaut est utilisée
-    if config.using_default_font and not st.session_state.using_default_font_message_shown:
+    if st.session_state.using_default_font and not st.session_state.using_default_font_message_shown:
         st.warning("Rendu avec la police par défaut (basse qualité). Pour un meilleur résultat, placez les fichiers de police dans le dossier 'Lato'.", icon="ℹ️")
         st.session_state.using_default_font_message_shown = True
     
@@ -168,44 +418,136 @@ def render_main_column():
             use_container_width=True
         )
         
+        # Format, taille et coût d'encodage de l'image
+        info = st.session_state.generated_info or {'profile': 'png', 'mime': 'image/png', 'extension': 'png'}
+        if info.get('preview'):
+            st.caption(f"Aperçu réduit · l'image en taille réelle ({config.ENCODER_PROFILES[info['profile']]['label']}) "
+                       "est produite au téléchargement")
+        elif info.get('size') is not None:
+            encode_note = "lue dans le cache" if info['cached'] else f"encodée en {info['encode_ms']:.0f} ms"
+            palette_note = f" · palette de {info['colors']} couleurs" if info.get('colors') else ""
+            st.caption(f"{config.ENCODER_PROFILES[info['profile']]['label']} · "
+                       f"{info['size'] / 1024:.0f} Ko{palette_note} · {encode_note}")
+        
         # Option de téléchargement
-        default_filename = f"citation_{st.session_state.author.replace(' ','_').lower() if st.session_state.author else 'inconnu'}_{st.session_state.quote[:15].replace(' ','_').lower()}.png"
+        default_filename = f"citation_{st.session_state.author.replace(' ','_').lower() if st.session_state.author else 'inconnu'}_{st.session_state.quote[:15].replace(' ','_').lower()}.{info['extension']}"
         safe_filename = "".join(c for c in default_filename if c.isalnum() or c in ('_', '.', '-')).rstrip()
         
+        # En mode aperçu, l'image en taille réelle n'est rendue qu'au clic
+        params = st.session_state.generated_params
+        if info.get('preview') and params:
+            data = lambda: render_full_resolution(params)
+        else:
+            data = st.session_state.generated_image
+        
         st.download_button(
-            label="📥 Télécharger (.png)",
-            data=st.session_state.generated_image,
+            label=f"📥 Télécharger (.{info['extension']})",
+            data=data,
             file_name=safe_filename,
-            mime="image/png",
+            mime=info['mime'],
         )
+        
+        render_animation_export()
+        
+        if st.session_state.debug_panel and info.get('metrics'):
+            render_debug_panel(info['metrics'])
     else:
         st.info("Configurez et cliquez sur 'Générer l'image'.")
 
+def schedule_live_preview():
+    """Demande l'aperçu des paramètres actuels ; les modifications rapprochées sont regroupées."""
+    if st.session_state.quote:
+        st.session_state.preview_scheduler.submit(current_params())
+
+@st.fragment
+def render_live_main_column():
+    """Rend la colonne principale avec le dernier aperçu en direct, rafraîchie tant qu'un aperçu est en cours."""
+    scheduler = st.session_state.preview_scheduler
+    # Vrai quand le fragment tourne dans une exécution complète de la page (voir main)
+    full_run = st.session_state.pop('live_full_run', False)
+    # pending est lu avant latest : s'il est faux, le dernier aperçu est déjà publié
+    pending = scheduler.pending
+    preview = scheduler.latest()
+    if preview is not None and preview.generation != st.session_state.live_generation:
+        st.session_state.live_generation = preview.generation
+        if preview.result.ok:
+            show_render_result(preview.result, preview.params, preview=True)
+            st.session_state.using_default_font = preview.result.used_default_font
+    
+    render_main_column()
+    if pending:
+        st.caption("⏳ Mise à jour de l'aperçu...")
+        if not full_run:
+            # Seul ce fragment est réexécuté, dès que l'aperçu est prêt ou au
+            # plus tard après un intervalle ; sans aperçu en cours, rien n'est relancé
+            scheduler.wait(config.LIVE_PREVIEW_POLL_SECONDS)
+            st.rerun(scope='fragment')
+
+def render_animation_export():
+    """Propose d'exporter l'image affichée en animation (GIF, APNG, WebP)."""
+    with st.expander("🎞️ Exporter en animation"):
+        col_effect, col_format = st.columns(2)
+        col_effect.selectbox("Effet :", config.ANIMATION_EFFECTS, key='animation_effect')
+        col_format.selectbox("Format :", list(config.ANIMATION_FORMATS),
+                             format_func=lambda name: config.ANIMATION_FORMATS[name]['label'],
+                             key='animation_format')
+        st.button("Créer l'animation", on_click=create_animation)
+        
+        result = st.session_state.animation
+        if result is not None:
+            st.image(result.data)
+            st.caption(f"{result.frame_count} images · {result.duration_ms / 1000:.1f} s · "
+                       f"{result.size / 1024:.0f} Ko · produite à {result.fps:.0f} images/s, "
+                       f"dont {result.encode_ms:.0f} ms d'encodage")
+            st.download_button(
+                label=f"📥 Télécharger l'animation (.{result.extension})",
+                data=result.data,
+                file_name=f"citation_animee.{result.extension}",
+                mime=result.mime,
+            )
+
+def render_debug_panel(metrics):
+    """
+    Affiche les mesures du dernier rendu : étapes, caches, taille et mémoire.
+    
+    Args:
+        metrics (dict): Mesures du rendu (RenderMetrics.to_dict)
+    """
+    with st.expander("🔧 Mesures du rendu", expanded=True):
+        col_total, col_size, col_memory = st.columns(3)
+        col_total.metric("Durée totale", f"{metrics['total_ms']:.1f} ms")
+        col_size.metric("Taille produite", f"{metrics['output_bytes'] / 1024:.0f} Ko")
+        col_memory.metric("Mémoire d'image max.", f"{metrics['peak_image_bytes'] / 2**20:.1f} Mo")
+        
+        st.caption("Étapes")
+        st.table([{'Étape': name, 'Durée (ms)': f"{ms:.2f}"}
+                  for name, ms in metrics['stages'].items()])
+        
+        if metrics['caches']:
+            st.caption("Caches")
+            st.table([{'Cache': name, 'Succès': counts['hits'], 'Échecs': counts['misses']}
+                      for name, counts in sorted(metrics['caches'].items())])
+
 def render_history_column():
     """Rend la colonne d'historique des citations générées."""
     st.subheader("Historique des citations")
     
-    if not st.session_state.history:
+    if not len(st.session_state.history):
         st.info("Votre historique de citations apparaîtra ici.")
         return
     
-    # Afficher l'historique des citations générées
-    for i, item in enumerate(st.session_state.history):
-        title = f"{item['author']} - {item['quote'][:30]}..." if len(item['quote']) > 30 else item['quote']
+    # Afficher l'historique des citations générées (miniatures uniquement)
+    for entry in st.session_state.history:
+        params = entry.params
+        title = f"{params['author']} - {params['quote'][:30]}..." if len(params['quote']) > 30 else params['quote']
         
         with st.expander(title):
-            st.image(item['image'], use_container_width=True)
-            st.caption(f"Theme: {item['theme']} | Fond: {item['background']} | Décoration: {item.get('decoration', 'aucune')}")
+            st.image(entry.thumbnail)
+            st.caption(f"Format: {params['image_format']} | Theme: {params['theme']} | Fond: {params['background_style']} | Décoration: {params['decoration'] or 'aucune'}")
             
-            # Ajouter un bouton pour réutiliser cette citation
-            if st.button(f"Réutiliser cette citation", key=f"reuse_{item['id']}"):
-                st.session_state.quote = item['quote']
-                st.session_state.author = item['author']
-                st.session_state.theme_choice = item['theme']
-                st.session_state.background_style = item['background']
-                st.session_state.decoration_style = item.get('decoration', 'aucune')
-                st.session_state.generated_image = item['image']
-                st.rerun()
+            # Réutiliser la citation reconstruit l'image en taille réelle
+            st.button("Réutiliser cette citation", key=f"reuse_{entry.key}",
+                      on_click=reuse_history_entry, args=(entry.key,))
 
 # --- Pied de page ---
 def render_footer():
@@ -217,6 +559,9 @@ def render_footer():
 # --- Application principale ---
 def main():
     """Fonction principale de l'application."""
+    # Polices et fonds par défaut préparés en arrière-plan, une fois par processus
+    warmup.start_warm_up()
+    
     # Barre latérale
     generate_button = render_sidebar()
     
@@ -228,13 +573,18 @@ def main():
         if generate_button:
             # Réinitialiser le flag d'avertissement avant la génération
             st.session_state.using_default_font_message_shown = False
-            config.using_default_font = False
+            st.session_state.using_default_font = False
             
             # Générer l'image
             generate_image()
         
-        # Afficher la colonne principale
-        render_main_column()
+        # Afficher la colonne principale (mise à jour au fil des modifications en direct)
+        if st.session_state.live_preview:
+            schedule_live_preview()
+            st.session_state.live_full_run = True
+            render_live_main_column()
+        else:
+            render_main_column()
     
     with col2:
         # Afficher l'historique
@@ -242,6 +592,12 @@ def main():
     
     # Pied de page
     render_footer()
+    
+    # Un fragment ne peut pas se relancer seul pendant une exécution complète :
+    # la page, entièrement affichée, est réexécutée dès que l'aperçu est prêt
+    if st.session_state.live_preview and st.session_state.preview_scheduler.pending:
+        st.session_state.preview_scheduler.wait(config.LIVE_PREVIEW_POLL_SECONDS)
+        st.rerun()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
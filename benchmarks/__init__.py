@@ -0,0 +1 @@
+"""Bancs d'essai du moteur de rendu (exécutés hors ligne, sans GPU)."""
@@ -0,0 +1,136 @@
+"""
+Test de charge : des rendus simultanés dans plusieurs threads doivent donner
+exactement les mêmes images et les mêmes avertissements que des rendus seuls.
+
+Usage :
+    python -m benchmarks.concurrency                        8 threads, 3 tours
+    python -m benchmarks.concurrency --threads 16 --rounds 10
+
+Chaque combinaison de paramètres (thème, format, fond, décoration, échelle,
+citation) est d'abord rendue seule pour obtenir son image et ses
+avertissements de référence. Les mêmes rendus sont ensuite relancés en
+parallèle, dans un ordre mélangé, avec les caches vidés à chaque tour pour
+que les threads construisent en même temps fonds, calques, polices et
+dispositions. Le tout est exécuté deux fois : avec les polices Lato, puis
+avec des polices introuvables, où chaque rendu doit signaler lui-même le
+repli sur la police par défaut. La commande échoue (code 1) au moindre écart.
+"""
+import argparse
+import hashlib
+import itertools
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from modules import config, generator
+from benchmarks.stages import QUOTES, clear_caches
+
+DEFAULT_THREADS = 8
+DEFAULT_ROUNDS = 3
+
+def build_cases():
+    """
+    Liste les rendus du test : chaque thème, format, décoration et échelle, les
+    fonds et les citations étant répartis entre eux.
+
+    Returns:
+        list: Arguments nommés de generator.render_quote
+    """
+    backgrounds = itertools.cycle(config.BACKGROUND_STYLES)
+    quotes = itertools.cycle(QUOTES.values())
+    cases = []
+    for theme, image_format, decoration, scale in itertools.product(
+            config.THEMES, config.FORMATS, config.DECORATION_STYLES, (1, config.PREVIEW_SCALE)):
+        quote, author = next(quotes)
+        cases.append({
+            'quote': quote, 'author': author, 'theme': theme, 'image_format': image_format,
+            'background_style': next(backgrounds),
+            'decoration': None if decoration == 'aucune' else decoration,
+            'scale': scale
+        })
+    return cases
+
+def fingerprint(result):
+    """Résume un rendu : empreinte des pixels, taille, avertissements et erreurs."""
+    digest = hashlib.sha256(result.image.tobytes()).hexdigest() if result.image is not None else None
+    size = result.image.size if result.image is not None else None
+    return digest, size, tuple(result.warnings), tuple(result.errors)
+
+def render(case):
+    """Rend un cas sans encodage ni cache disque et retourne son empreinte."""
+    return fingerprint(generator.render_quote(**case, encode=False, use_cache=False))
+
+def run_phase(label, cases, threads, rounds, seed):
+    """
+    Compare les rendus parallèles d'une série de cas à leurs références.
+
+    Returns:
+        int: Nombre d'écarts constatés
+    """
+    clear_caches()
+    generator.clear_cache()
+    references = [render(case) for case in cases]
+    failures = [case for case, reference in zip(cases, references) if reference[3]]
+    for case in failures:
+        print(f"  référence en erreur : {case}")
+
+    mismatches = len(failures)
+    rng = random.Random(seed)
+    order = list(range(len(cases)))
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for round_index in range(1, rounds + 1):
+            clear_caches()
+            generator.clear_cache()
+            rng.shuffle(order)
+            start = time.perf_counter()
+            fingerprints = list(executor.map(lambda index: render(cases[index]), order))
+            elapsed = time.perf_counter() - start
+
+            round_mismatches = 0
+            for index, observed in zip(order, fingerprints):
+                if observed != references[index]:
+                    round_mismatches += 1
+                    expected = references[index]
+                    print(f"  écart sur {cases[index]} :\n"
+                          f"    attendu  {expected[1:]} {expected[0]}\n"
+                          f"    observé  {observed[1:]} {observed[0]}")
+            mismatches += round_mismatches
+            print(f"{label} · tour {round_index} : {len(cases)} rendus sur {threads} threads en "
+                  f"{elapsed:.1f} s ({len(cases) / elapsed:.1f} rendus/s), {round_mismatches} écart(s)")
+
+    warnings = {reference[2] for reference in references}
+    print(f"{label} · avertissements de référence : {sorted(warnings)}")
+    return mismatches
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.concurrency',
+        description="Vérifie que des rendus simultanés sont identiques à des rendus seuls.")
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS, help="Nombre de threads")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help="Nombre de tours parallèles")
+    parser.add_argument('--seed', type=int, default=0, help="Graine de l'ordre des rendus")
+    args = parser.parse_args(argv)
+
+    # Changer de thread très souvent multiplie les entrelacements possibles
+    sys.setswitchinterval(1e-5)
+    cases = build_cases()
+
+    mismatches = run_phase("polices Lato", cases, args.threads, args.rounds, args.seed)
+
+    font_paths = (config.FONT_REGULAR_PATH, config.FONT_BOLD_PATH, config.FONT_SIGNATURE_PATH)
+    config.FONT_REGULAR_PATH = config.FONT_BOLD_PATH = config.FONT_SIGNATURE_PATH = '/introuvable/police.ttf'
+    try:
+        mismatches += run_phase("police par défaut", cases, args.threads, args.rounds, args.seed)
+    finally:
+        config.FONT_REGULAR_PATH, config.FONT_BOLD_PATH, config.FONT_SIGNATURE_PATH = font_paths
+        clear_caches()
+
+    if mismatches:
+        print(f"ÉCHEC : {mismatches} rendu(s) différent(s) de leur référence")
+        return 1
+    print("OK : tous les rendus parallèles sont identiques à leur référence")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,342 @@
+"""
+Mesure séparément chaque étape du rendu et la compare à une référence.
+
+Usage :
+    python -m benchmarks.stages                      Mesure et comparaison à baseline.json
+    python -m benchmarks.stages --output run.json    Écrit aussi les mesures en JSON
+    python -m benchmarks.stages --update-baseline    Remplace la référence par ces mesures
+
+Étapes mesurées, pour les deux thèmes et des citations courte, moyenne et
+très longue : fond par style, décoration par style, chargement des polices,
+disposition du texte (calculate_text_layout) et ajustement de sa taille,
+dessin du texte, encodage PNG, rendu complet, et rendu de toutes les
+variantes de format d'une citation (render_formats contre un render_quote
+par format).
+
+Chaque mesure part de caches vides pour l'étape mesurée ; ce dont elle a
+besoin (polices, fond...) est préparé avant de déclencher le chronomètre.
+Le cache de rendus sur disque est désactivé. La commande échoue si la
+meilleure mesure d'une étape dépasse celle de la référence, corrigée de la
+vitesse de la machine (voir speed_ratio), de plus de --threshold (en
+proportion) et de plus de --min-delta millisecondes. Elle échoue aussi si
+toutes les étapes ensemble ralentissent de plus de --threshold : une
+régression commune se confond avec une machine plus lente, que seule
+l'option --allow-machine-drift permet d'accepter.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import numpy
+import PIL
+from modules import (config, background, decorations, encoder, font_manager, generator,
+                     text_renderer)
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Nombre de mesures par étape, hausse tolérée de la durée, écart minimal
+# (en millisecondes) pour qu'une hausse compte comme une régression, et
+# nombre de nouvelles mesures d'une étape en régression avant d'échouer ;
+# la référence garde la meilleure mesure de plusieurs passes
+DEFAULT_RUNS = 7
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_MIN_DELTA_MS = 1.0
+DEFAULT_RETRIES = 2
+DEFAULT_BASELINE_PASSES = 3
+
+QUOTES = {
+    'short': ("Rien n'est permanent, sauf le changement.", "Héraclite"),
+    'medium': ("La vie, ce n'est pas d'attendre que l'orage passe, c'est d'apprendre à danser "
+               "sous la pluie. Chaque jour est une occasion nouvelle de recommencer.",
+               "Sénèque"),
+    'long': (" ".join([
+        "Il faut toujours viser la lune, car même en cas d'échec, on atterrit dans les étoiles.",
+        "Le succès n'est pas final, l'échec n'est pas fatal : c'est le courage de continuer qui compte.",
+        "Ce que nous savons est une goutte d'eau ; ce que nous ignorons est un océan.",
+        "La simplicité est la sophistication suprême, et la patience est la mère de toutes les vertus.",
+        "On ne voit bien qu'avec le cœur ; l'essentiel est invisible pour les yeux.",
+        "Les grandes personnes ne comprennent jamais rien toutes seules, et c'est fatigant, pour les "
+        "enfants, de toujours et toujours leur donner des explications.",
+        "Le plus grand risque est de ne prendre aucun risque ; dans un monde qui change vraiment "
+        "rapidement, la seule stratégie qui est garantie d'échouer est de ne pas prendre de risques.",
+    ]), "Anonyme")
+}
+
+def clear_caches():
+    """Vide tous les caches en mémoire du moteur de rendu."""
+    background.clear_cache()
+    decorations.clear_cache()
+    font_manager.clear_cache()
+    text_renderer.clear_cache()
+    generator.clear_cache()
+
+def time_stage(run, setup=None, runs=DEFAULT_RUNS):
+    """
+    Mesure une étape plusieurs fois.
+
+    Args:
+        run (callable): Étape à chronométrer, appelée avec le résultat de setup
+        setup (callable): Préparation non chronométrée, exécutée avant chaque mesure
+        runs (int): Nombre de mesures
+
+    Returns:
+        dict: Médiane et minimum en millisecondes
+    """
+    samples = []
+    for _ in range(runs):
+        prepared = setup() if setup else None
+        start = time.perf_counter()
+        run(prepared)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'median_ms': round(statistics.median(samples), 3), 'min_ms': round(min(samples), 3)}
+
+def _cold_fonts():
+    """Vide les caches puis recharge les polices, sans chronométrage."""
+    clear_caches()
+    return font_manager.load_fonts()[:3]
+
+def _cold_canvas(theme):
+    """Vide les caches puis prépare un fond et les polices, sans chronométrage."""
+    fonts = _cold_fonts()
+    return background.create_background('gradient', theme), fonts
+
+def run_benchmarks(runs=DEFAULT_RUNS, only=None):
+    """
+    Mesure les étapes du rendu.
+
+    Args:
+        runs (int): Nombre de mesures par étape
+        only (set): Noms des étapes à mesurer (toutes par défaut)
+
+    Returns:
+        dict: Médiane et minimum de chaque étape, indexés par "étape/variante/thème"
+    """
+    config.RENDER_CACHE_ENABLED = False
+    width, height = config.IMAGE_WIDTH, config.IMAGE_HEIGHT
+    max_width_px = width - 2 * config.PADDING
+    results = {}
+
+    def wanted(name):
+        return only is None or name in only
+
+    def measure(name, run, setup=None):
+        if wanted(name):
+            results[name] = time_stage(run, setup, runs)
+
+    measure('load_fonts', lambda _: font_manager.load_fonts(), setup=clear_caches)
+
+    for theme in config.THEMES:
+        colors = config.THEMES[theme]
+        for style in config.BACKGROUND_STYLES:
+            measure(f'background/{style}/{theme}',
+                    lambda _, style=style: background.build_background(
+                        style, width, height, colors['bg_color1'], colors['bg_color2']))
+
+        for style in config.DECORATION_STYLES:
+            if style == 'aucune':
+                continue
+            measure(f'decorations/{style}/{theme}',
+                    lambda prepared, style=style, theme=theme: decorations.add_decorative_elements(
+                        prepared[0], style, theme),
+                    setup=lambda theme=theme: _cold_canvas(theme))
+
+        for length, (quote, author) in QUOTES.items():
+            measure(f'text_layout/{length}/{theme}',
+                    lambda fonts, quote=quote, author=author: text_renderer.calculate_text_layout(
+                        quote, author, fonts, False, max_width_px),
+                    setup=_cold_fonts)
+
+            measure(f'text_fit/{length}/{theme}',
+                    lambda fonts, quote=quote, author=author: text_renderer.fit_quote_font(
+                        quote, author, fonts, max_width_px, height - 2 * config.PADDING),
+                    setup=_cold_fonts)
+
+            measure(f'text_draw/{length}/{theme}',
+                    lambda prepared, quote=quote, author=author, theme=theme:
+                        text_renderer.render_quote_text(prepared[0], quote, author, prepared[1],
+                                                        theme, auto_fit=True),
+                    setup=lambda theme=theme: _cold_canvas(theme))
+
+            if wanted(f'encode_png/{length}/{theme}'):
+                rendered = generator.render_quote(quote, author, theme=theme, encode=False,
+                                                  use_cache=False).image
+                measure(f'encode_png/{length}/{theme}',
+                        lambda _, rendered=rendered: encoder.encode_image(rendered, 'png'))
+
+            measure(f'total/{length}/{theme}',
+                    lambda _, quote=quote, author=author, theme=theme: generator.render_quote(
+                        quote, author, theme=theme, use_cache=False, profile='png'),
+                    setup=clear_caches)
+
+        # Toutes les variantes d'une citation : render_formats contre des rendus
+        # séparés, caches vidés dans les deux cas
+        quote, author = QUOTES['medium']
+        measure(f'multi_format/render_formats/{theme}',
+                lambda _, theme=theme: generator.render_formats(
+                    quote, author, theme=theme, use_cache=False, profile='png'),
+                setup=clear_caches)
+        measure(f'multi_format/separate/{theme}',
+                lambda _, theme=theme: [generator.render_quote(
+                    quote, author, theme=theme, use_cache=False, profile='png', image_format=name)
+                    for name in config.FORMATS],
+                setup=clear_caches)
+
+    return results
+
+def environment():
+    """Décrit la machine et les versions utilisées pour les mesures."""
+    return {
+        'python': platform.python_version(),
+        'pillow': PIL.__version__,
+        'numpy': numpy.__version__,
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'cpus': os.cpu_count()
+    }
+
+def speed_ratio(results, baseline):
+    """
+    Estime le rapport de vitesse entre la machine actuelle et celle de la référence.
+
+    C'est la médiane, sur toutes les étapes, du rapport entre la mesure et la
+    référence : une régression qui touche quelques étapes ne la déplace pas,
+    alors qu'une machine plus lente (fréquence du processeur, voisins sur une
+    machine partagée) ralentit toutes les étapes à la fois. Une régression
+    commune à la plupart des étapes la déplace aussi : main échoue donc si ce
+    rapport dépasse le seuil, sauf avec --allow-machine-drift.
+
+    Args:
+        results (dict): Mesures par étape (voir run_benchmarks)
+        baseline (dict): Mesures de référence par étape
+
+    Returns:
+        float: Rapport de vitesse (1.0 si aucune étape n'est commune)
+    """
+    ratios = [results[name]['min_ms'] / baseline[name]['min_ms']
+              for name in results if name in baseline and baseline[name]['min_ms'] > 0]
+    return statistics.median(ratios) if ratios else 1.0
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, min_delta_ms=DEFAULT_MIN_DELTA_MS,
+            ratio=1.0):
+    """
+    Compare des mesures à la référence.
+
+    Le minimum de chaque série est comparé plutôt que la médiane : c'est la
+    mesure la moins sensible aux interruptions de la machine.
+
+    Args:
+        results (dict): Mesures par étape (voir run_benchmarks)
+        baseline (dict): Mesures de référence par étape
+        threshold (float): Hausse relative tolérée
+        min_delta_ms (float): Hausse absolue en dessous de laquelle l'écart est ignoré
+        ratio (float): Rapport de vitesse de la machine (voir speed_ratio)
+
+    Returns:
+        list: Régressions (étape, durée de référence corrigée, durée mesurée),
+              de la plus forte à la plus faible
+    """
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        before, after = reference['min_ms'] * ratio, current['min_ms']
+        if after > before * (1 + threshold) and after - before > min_delta_ms:
+            regressions.append((name, before, after))
+    return sorted(regressions, key=lambda row: row[2] / row[1] if row[1] else float('inf'), reverse=True)
+
+def merge_results(*runs):
+    """Garde, pour chaque étape, la meilleure médiane et le meilleur minimum de plusieurs passes."""
+    merged = {}
+    for results in runs:
+        for name, timing in results.items():
+            best = merged.setdefault(name, dict(timing))
+            best['median_ms'] = min(best['median_ms'], timing['median_ms'])
+            best['min_ms'] = min(best['min_ms'], timing['min_ms'])
+    return merged
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande."""
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.stages',
+        description="Mesure chaque étape du rendu et la compare à la référence.")
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help="Nombre de mesures par étape")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Fichier JSON de référence")
+    parser.add_argument('--output', help="Fichier JSON où écrire les mesures")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Hausse relative tolérée (0.25 = 25 %%)")
+    parser.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="Hausse minimale en millisecondes pour compter une régression")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES,
+                        help="Nombre de nouvelles mesures des étapes en régression avant d'échouer")
+    parser.add_argument('--allow-machine-drift', action='store_true',
+                        help="Accepter que toutes les étapes ralentissent ensemble au-delà du seuil "
+                             "(machine plus lente que celle de la référence)")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Écrire les mesures comme nouvelle référence")
+    args = parser.parse_args(argv)
+
+    # La référence garde la meilleure de plusieurs passes pour ne pas figer une mesure malchanceuse
+    passes = DEFAULT_BASELINE_PASSES if args.update_baseline else 1
+    results = merge_results(*(run_benchmarks(args.runs) for _ in range(passes)))
+    report = {'environment': environment(), 'runs': args.runs, 'stages': results}
+
+    print(f"{'étape':<34} {'médiane':>9} {'min':>9}")
+    for name, timing in results.items():
+        print(f"{name:<34} {timing['median_ms']:>7.2f}ms {timing['min_ms']:>7.2f}ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"Référence écrite dans {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    except OSError:
+        print(f"Aucune référence ({args.baseline}) : lancez avec --update-baseline")
+        return 0
+    if baseline.get('environment') != report['environment']:
+        print("Attention : la référence a été mesurée dans un autre environnement")
+
+    missing = sorted(set(baseline['stages']) - set(results))
+    if missing:
+        print(f"Étapes absentes de cette mesure : {', '.join(missing)}")
+
+    ratio = speed_ratio(results, baseline['stages'])
+    print(f"Vitesse relative de la machine : x{ratio:.2f} (médiane des étapes)")
+    if ratio > 1 + args.threshold:
+        if not args.allow_machine_drift:
+            print(f"ÉCHEC : toutes les étapes sont plus lentes que la référence (x{ratio:.2f}) : "
+                  "régression commune, ou machine plus lente (relancez alors avec --allow-machine-drift)")
+            return 1
+        print("Attention : toutes les étapes sont plus lentes que la référence, "
+              "écart attribué à la machine (--allow-machine-drift)")
+
+    regressions = compare(results, baseline['stages'], args.threshold, args.min_delta, ratio)
+    for _ in range(args.retries):
+        if not regressions:
+            break
+        # Une interruption de la machine suffit à fausser une série : les étapes
+        # en régression sont remesurées et gardent leur meilleure mesure
+        retried = run_benchmarks(args.runs, only={name for name, _, _ in regressions})
+        results = merge_results(results, retried)
+        regressions = compare(results, baseline['stages'], args.threshold, args.min_delta, ratio)
+    if regressions:
+        print(f"ÉCHEC : {len(regressions)} étape(s) en régression")
+        for name, before, after in regressions:
+            print(f"  {name:<30} {before:>7.2f}ms -> {after:>7.2f}ms (+{after / before - 1:.0%})")
+        return 1
+    print(f"Aucune régression (seuil +{args.threshold:.0%}, {args.min_delta:g} ms)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
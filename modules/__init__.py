@@ -1,9 +1,24 @@
 __all__ = [
+    'animation',
     'api_client',
     'background',
+    'batch',
+    'cache',
     'config',
     'decorations',
+    'encoder',
     'font_manager',
     'generator',
-    'text_renderer'
+    'history',
+    'import_budget',
+    'live_preview',
+    'metrics',
+    'quote_library',
+    'quote_store',
+    'render_cache',
+    'render_context',
+    'server',
+    'startup_report',
+    'text_renderer',
+    'warmup'
 ] 
\ No newline at end of file
@@ -0,0 +1,446 @@
+"""
+Animations de citations (GIF, APNG, WebP) : le texte apparaît ligne après
+ligne, mot après mot ou en fondu.
+
+Usage :
+    python -m modules.animation "Carpe diem" --author Horace -o citation.gif
+    python -m modules.animation "Carpe diem" --effect fondu --format webp -o citation.webp
+
+Le fond, les décorations, la signature et le watermark ne sont rendus qu'une
+fois. L'image finale (identique au rendu fixe) est dessinée elle aussi une
+seule fois ; chaque image de l'animation ne fait que recopier, sur un canevas
+unique, la zone du texte qui vient d'apparaître. Les images sont encodées au
+fur et à mesure : la mémoire utilisée ne dépend pas du nombre d'images.
+"""
+import argparse
+import io
+import math
+import os
+import struct
+import sys
+import time
+import zlib
+from dataclasses import dataclass, field
+import PIL
+from PIL import GifImagePlugin, Image, features
+from modules import config, background, decorations, render_context, text_renderer
+
+@dataclass
+class AnimationResult:
+    """Résultat d'une animation : ses données encodées et le coût de sa production."""
+    data: bytes = None
+    warnings: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+    effect: str = None
+    animation_format: str = None    # Format de l'animation (voir config.ANIMATION_FORMATS)
+    image_format: str = None        # Format de l'image (voir config.FORMATS)
+    mime: str = None
+    extension: str = None
+    frame_count: int = 0
+    duration_ms: int = 0            # Durée d'une lecture de l'animation
+    total_ms: float = None          # Durée de la production (rendu et encodage)
+    encode_ms: float = 0.0          # Durée cumulée de l'encodage des images
+
+    @property
+    def ok(self):
+        """Vrai si l'animation a été produite sans erreur."""
+        return self.frame_count > 0 and not self.errors
+
+    @property
+    def size(self):
+        """Taille des données encodées en octets, ou None."""
+        return len(self.data) if self.data is not None else None
+
+    @property
+    def fps(self):
+        """Nombre d'images produites (rendues et encodées) par seconde."""
+        if not self.total_ms:
+            return None
+        return self.frame_count / (self.total_ms / 1000)
+
+@dataclass(frozen=True)
+class _Step:
+    """Image de l'animation : zone recopiée depuis l'image finale et durée d'affichage."""
+    box: tuple              # Zone modifiée (gauche, haut, droite, bas), None pour l'image de départ
+    duration_ms: int
+    alpha: float = 1.0      # Opacité de l'image finale dans la zone (fondu)
+
+def _text_box(position, text, font, size):
+    """Zone de l'image couverte par l'encre d'un texte dessiné au point donné."""
+    x, y = position
+    left, top, right, bottom = font.getbbox(text)
+    # Une marge d'un pixel couvre le lissage des bords
+    return (max(0, math.floor(x + left) - 1), max(0, math.floor(y + top) - 1),
+            min(size[0], math.ceil(x + right) + 1), min(size[1], math.ceil(y + bottom) + 1))
+
+def _union(boxes):
+    """Plus petite zone contenant toutes les zones données."""
+    return (min(box[0] for box in boxes), min(box[1] for box in boxes),
+            max(box[2] for box in boxes), max(box[3] for box in boxes))
+
+def _text_elements(placement, author_font):
+    """Lignes de la citation puis ligne d'auteur : (position, texte, police)."""
+    elements = [(placement.position(line), line.text, placement.quote_font)
+                for line in placement.layout.lines]
+    if placement.layout.author:
+        author = placement.layout.author
+        elements.append((placement.position(author), author.text, author_font))
+    return elements
+
+def _word_boxes(position, text, font, size):
+    """Découpe la zone d'une ligne en une zone par mot, coupée au milieu des espaces."""
+    box = _text_box(position, text, font, size)
+    words = text.split(' ')
+    x = position[0]
+    half_space = font.getlength(' ') / 2
+    boxes = []
+    left = box[0]
+    for count in range(1, len(words)):
+        right = min(box[2], max(left, round(x + font.getlength(' '.join(words[:count])) + half_space)))
+        boxes.append((left, box[1], right, box[3]))
+        left = right
+    boxes.append((left, box[1], box[2], box[3]))
+    return [word_box for word_box in boxes if word_box[2] > word_box[0]]
+
+def _hold(steps):
+    """Prolonge la dernière image avant que l'animation ne boucle."""
+    last = steps[-1]
+    steps[-1] = _Step(last.box, last.duration_ms + round(config.ANIMATION_HOLD_SECONDS * 1000), last.alpha)
+    return steps
+
+def _plan_lines(elements, size):
+    """Effet 'lignes' : chaque ligne apparaît d'un coup, puis l'auteur."""
+    duration = round(config.ANIMATION_LINE_SECONDS * 1000)
+    steps = [_Step(None, duration)]
+    steps += [_Step(_text_box(position, text, font, size), duration) for position, text, font in elements]
+    return _hold(steps)
+
+def _plan_typing(elements, size):
+    """Effet 'machine' : les mots apparaissent un à un, ligne après ligne."""
+    duration = round(config.ANIMATION_WORD_SECONDS * 1000)
+    steps = [_Step(None, duration)]
+    for position, text, font in elements:
+        steps += [_Step(box, duration) for box in _word_boxes(position, text, font, size)]
+    return _hold(steps)
+
+def _plan_fade(elements, size):
+    """Effet 'fondu' : tout le texte passe progressivement de transparent à opaque."""
+    duration = round(1000 / config.ANIMATION_FPS)
+    count = max(1, round(config.ANIMATION_FADE_SECONDS * config.ANIMATION_FPS))
+    steps = [_Step(None, duration)]
+    if elements:
+        box = _union([_text_box(position, text, font, size) for position, text, font in elements])
+        steps += [_Step(box, duration, index / count) for index in range(1, count + 1)]
+    return _hold(steps)
+
+_EFFECTS = {
+    'lignes': _plan_lines,
+    'machine': _plan_typing,
+    'fondu': _plan_fade
+}
+
+def _apply_step(canvas, final, step, regions):
+    """Recopie sur le canevas la zone d'une étape, en fondu si son opacité est partielle."""
+    if step.alpha >= 1:
+        canvas.paste(final.crop(step.box), step.box)
+        return
+    # Le fondu part toujours de la zone telle qu'elle était avant sa première étape
+    if step.box not in regions:
+        regions[step.box] = (canvas.crop(step.box), final.crop(step.box))
+    start, end = regions[step.box]
+    canvas.paste(Image.blend(start, end, step.alpha), step.box)
+
+class _GifWriter:
+    """
+    Écrit un GIF image par image.
+
+    Toutes les images partagent la palette de l'image finale. Seule la zone
+    modifiée est écrite, sans effacer l'image précédente (disposition 1).
+    """
+
+    def __init__(self, fp, size, frame_count, final, options):
+        self.fp = fp
+        # Sans tramage, un pixel prend la même couleur quelle que soit la zone encodée
+        self.palette = final.quantize(config.PALETTE_MAX_COLORS, method=Image.Quantize.MEDIANCUT,
+                                      dither=Image.Dither.NONE)
+        self.started = False
+
+    def add(self, canvas, box, duration_ms):
+        frame = canvas.crop(box).quantize(palette=self.palette, dither=Image.Dither.NONE)
+        if not self.started:
+            header, _ = GifImagePlugin.getheader(frame, info={'loop': 0})
+            self.fp.write(b''.join(header))
+            self.started = True
+        self.fp.write(b''.join(GifImagePlugin.getdata(frame, offset=box[:2], duration=duration_ms,
+                                                       disposal=1)))
+
+    def close(self):
+        self.fp.write(b';')
+
+def _png_chunk(kind, data):
+    """Construit un bloc PNG : longueur, type, données et somme de contrôle."""
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+def _png_chunks(data):
+    """Parcourt les blocs d'un fichier PNG : (type, données)."""
+    offset = 8
+    while offset < len(data):
+        length, kind = struct.unpack('>I4s', data[offset:offset + 8])
+        yield kind, data[offset + 8:offset + 8 + length]
+        offset += length + 12
+
+class _ApngWriter:
+    """
+    Écrit un PNG animé image par image.
+
+    Chaque zone modifiée est encodée par Pillow en PNG ; ses données
+    compressées sont reprises telles quelles dans un bloc fdAT.
+    """
+
+    def __init__(self, fp, size, frame_count, final, options):
+        self.fp = fp
+        self.frame_count = frame_count
+        self.options = options
+        self.sequence = 0
+        self.started = False
+        fp.write(b'\x89PNG\r\n\x1a\n')
+
+    def add(self, canvas, box, duration_ms):
+        buffer = io.BytesIO()
+        canvas.crop(box).save(buffer, format='PNG', **self.options)
+        chunks = list(_png_chunks(buffer.getvalue()))
+        if not self.started:
+            self.fp.write(_png_chunk(b'IHDR', dict(chunks)[b'IHDR']))
+            self.fp.write(_png_chunk(b'acTL', struct.pack('>II', self.frame_count, 0)))
+
+        # Zone modifiée, durée en millièmes de seconde, ni effacement ni mélange
+        self.fp.write(_png_chunk(b'fcTL', struct.pack(
+            '>IIIIIHHBB', self.sequence, box[2] - box[0], box[3] - box[1], box[0], box[1],
+            min(duration_ms, 0xFFFF), 1000, 0, 0)))
+        self.sequence += 1
+        for kind, data in chunks:
+            if kind != b'IDAT':
+                continue
+            if not self.started:
+                # La première image est aussi l'image fixe lue par les lecteurs sans animation
+                self.fp.write(_png_chunk(b'IDAT', data))
+            else:
+                self.fp.write(_png_chunk(b'fdAT', struct.pack('>I', self.sequence) + data))
+                self.sequence += 1
+        self.started = True
+
+    def close(self):
+        self.fp.write(_png_chunk(b'IEND', b''))
+
+# Versions de Pillow (de la première incluse à la dernière exclue) dont
+# l'encodeur d'animation WebP interne a la signature qu'utilise _WebpWriter
+_WEBP_ENCODER_PILLOW_VERSIONS = ((12, 0), (13, 0))
+
+def _webp_encoder_supported():
+    """Vrai si l'encodeur d'animation WebP interne de Pillow a la signature attendue."""
+    try:
+        from PIL import _webp
+    except ImportError:
+        return False
+    version = tuple(int(part) for part in PIL.__version__.split('.')[:2] if part.isdigit())
+    first, last = _WEBP_ENCODER_PILLOW_VERSIONS
+    return first <= version < last and hasattr(_webp, 'WebPAnimEncoder') and hasattr(Image.Image, 'getim')
+
+class _WebpWriter:
+    """
+    Écrit un WebP animé image par image avec l'encodeur d'animation de libwebp.
+
+    Pillow n'encode une animation qu'à partir de toutes ses images : on
+    appelle directement l'encodeur qu'il utilise, qui ne garde que les images
+    déjà compressées. Cet encodeur est interne à Pillow : il n'est utilisé
+    que pour les versions connues (voir _webp_writer).
+    """
+
+    def __init__(self, fp, size, frame_count, final, options):
+        from PIL import _webp
+        self.fp = fp
+        self.lossless = options.get('lossless', False)
+        self.quality = options.get('quality', 80)
+        self.method = options.get('method', 0)
+        kmin, kmax = (9, 17) if self.lossless else (3, 5)
+        self.encoder = _webp.WebPAnimEncoder(size, 0, 0, False, kmin, kmax, False, False)
+        self.timestamp = 0
+
+    def add(self, canvas, box, duration_ms):
+        # L'encodeur reçoit l'image complète et calcule lui-même la zone modifiée
+        self.encoder.add(canvas.getim(), self.timestamp, self.lossless, self.quality, 100, self.method)
+        self.timestamp += duration_ms
+
+    def close(self):
+        self.encoder.add(None, self.timestamp, self.lossless, self.quality, 100, 0)
+        data = self.encoder.assemble('', '', '')
+        if data is None:
+            raise OSError("l'encodeur WebP n'a produit aucune donnée")
+        self.fp.write(data)
+
+class _WebpFramesWriter:
+    """
+    Écrit un WebP animé par l'interface publique de Pillow (save_all).
+
+    Toutes les images sont gardées en mémoire jusqu'à l'écriture : cet
+    écrivain ne sert que si l'encodeur interne n'est pas utilisable.
+    """
+
+    def __init__(self, fp, size, frame_count, final, options):
+        if not features.check('webp'):
+            raise ValueError("WebP non pris en charge par cette installation de Pillow")
+        self.fp = fp
+        self.options = options
+        self.frames = []
+        self.durations = []
+
+    def add(self, canvas, box, duration_ms):
+        self.frames.append(canvas.copy())
+        self.durations.append(duration_ms)
+
+    def close(self):
+        first, *others = self.frames
+        first.save(self.fp, format='WEBP', save_all=True, append_images=others,
+                   duration=self.durations, loop=0, **self.options)
+
+def _webp_writer(fp, size, frame_count, final, options):
+    """Écrit le WebP avec l'encodeur interne de Pillow si sa version est connue, par save_all sinon."""
+    if _webp_encoder_supported():
+        try:
+            return _WebpWriter(fp, size, frame_count, final, options)
+        except TypeError:
+            # Signature différente de celle attendue malgré la version
+            pass
+    return _WebpFramesWriter(fp, size, frame_count, final, options)
+
+_WRITERS = {
+    'gif': _GifWriter,
+    'apng': _ApngWriter,
+    'webp': _webp_writer
+}
+
+def render_animation(quote, author, theme='light', background_style='gradient', watermark=True,
+                     signature=True, decoration=None, auto_fit=True, image_format=None,
+                     effect=None, animation_format=None, fp=None):
+    """
+    Génère une animation de la citation.
+
+    Args:
+        quote (str): Texte de la citation
+        author (str): Nom de l'auteur
+        theme (str): Thème de couleurs ('light', 'dark')
+        background_style (str): Style de fond ('gradient', 'diagonal', 'radial', 'uni')
+        watermark (bool): Si le watermark doit être ajouté
+        signature (bool): Si la signature doit être ajoutée
+        decoration (str): Style de décoration ('guillemets', 'cadre', 'coins', 'motif')
+        auto_fit (bool): Si la taille de la citation s'adapte pour tenir dans l'image
+        image_format (str): Format de l'image ('square', 'story', 'landscape'...)
+        effect (str): Effet d'apparition du texte (voir config.ANIMATION_EFFECTS)
+        animation_format (str): Format de l'animation (voir config.ANIMATION_FORMATS)
+        fp (file): Fichier binaire où écrire l'animation au fil de l'eau ; si absent,
+                   les données sont retournées dans result.data
+
+    Returns:
+        AnimationResult: Données, nombre d'images, durées de production et d'encodage,
+                         avertissements et erreurs
+    """
+    result = AnimationResult(effect=effect or config.DEFAULT_ANIMATION_EFFECT,
+                             animation_format=animation_format or config.DEFAULT_ANIMATION_FORMAT,
+                             image_format=image_format or config.DEFAULT_FORMAT)
+    start = time.perf_counter()
+    try:
+        if result.effect not in _EFFECTS:
+            raise ValueError(f"effet d'animation inconnu '{result.effect}'")
+        if result.animation_format not in config.ANIMATION_FORMATS:
+            raise ValueError(f"format d'animation inconnu '{result.animation_format}'")
+        spec = config.ANIMATION_FORMATS[result.animation_format]
+        result.mime, result.extension = spec['mime'], spec['extension']
+        context = render_context.create_context(theme, result.image_format)
+        result.warnings = context.warnings
+        size = context.size
+        author_font, signature_font = context.fonts[1:]
+
+        # 1. Couches fixes, rendues une seule fois
+        canvas = background.render_background(background_style, context)
+        if decoration:
+            canvas = decorations.render_decorations(canvas, decoration, context)
+
+        # 2. Image finale, identique au rendu fixe
+        final = text_renderer.render_text(canvas.copy(), quote, author, context, add_signature=signature,
+                                          add_watermark=watermark, auto_fit=auto_fit)
+        placement = text_renderer.place_text(quote, author, context.fonts, size, add_signature=signature,
+                                             add_watermark=watermark, auto_fit=auto_fit)
+
+        # La signature et le watermark sont visibles dès la première image
+        for position, text in ((placement.signature, config.DEFAULT_SIGNATURE),
+                               (placement.watermark, config.DEFAULT_WATERMARK)):
+            if position:
+                box = _text_box(position, text, signature_font, size)
+                canvas.paste(final.crop(box), box)
+
+        # 3. Images de l'animation, encodées au fil de l'eau
+        steps = _EFFECTS[result.effect](_text_elements(placement, author_font), size)
+        output = fp if fp is not None else io.BytesIO()
+        writer = _WRITERS[result.animation_format](output, size, len(steps), final, spec['options'])
+        regions = {}
+        for step in steps:
+            if step.box is not None:
+                _apply_step(canvas, final, step, regions)
+            encode_start = time.perf_counter()
+            writer.add(canvas, step.box or (0, 0) + size, step.duration_ms)
+            result.encode_ms += (time.perf_counter() - encode_start) * 1000
+        encode_start = time.perf_counter()
+        writer.close()
+        result.encode_ms += (time.perf_counter() - encode_start) * 1000
+
+        result.frame_count = len(steps)
+        result.duration_ms = sum(step.duration_ms for step in steps)
+        if fp is None:
+            result.data = output.getvalue()
+
+    except Exception as e:
+        result.errors.append(f"Erreur lors de la génération de l'animation : {e}")
+
+    result.total_ms = (time.perf_counter() - start) * 1000
+    return result
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande."""
+    parser = argparse.ArgumentParser(
+        prog='python -m modules.animation',
+        description="Génère une animation de citation (GIF, APNG ou WebP).")
+    parser.add_argument('quote', help="Texte de la citation")
+    parser.add_argument('--author', default='', help="Auteur de la citation")
+    parser.add_argument('-o', '--output', required=True, help="Fichier de sortie")
+    parser.add_argument('--effect', choices=list(_EFFECTS), default=config.DEFAULT_ANIMATION_EFFECT,
+                        help="Effet d'apparition du texte")
+    parser.add_argument('--format', dest='animation_format', choices=list(config.ANIMATION_FORMATS),
+                        default=config.DEFAULT_ANIMATION_FORMAT, help="Format de l'animation")
+    parser.add_argument('--image-format', choices=list(config.FORMATS), default=config.DEFAULT_FORMAT,
+                        help="Format de l'image")
+    parser.add_argument('--theme', choices=list(config.THEMES), default='light')
+    parser.add_argument('--background', choices=config.BACKGROUND_STYLES, default='gradient')
+    parser.add_argument('--decoration', choices=config.DECORATION_STYLES, default='aucune')
+    args = parser.parse_args(argv)
+
+    with open(args.output, 'wb') as f:
+        result = render_animation(args.quote, args.author, theme=args.theme,
+                                  background_style=args.background,
+                                  decoration=None if args.decoration == 'aucune' else args.decoration,
+                                  image_format=args.image_format, effect=args.effect,
+                                  animation_format=args.animation_format, fp=f)
+    for warning in result.warnings:
+        print(f"Avertissement : {warning}", file=sys.stderr)
+    if not result.ok:
+        for error in result.errors:
+            print(error, file=sys.stderr)
+        return 1
+
+    print(f"{result.frame_count} images, {result.duration_ms / 1000:.1f} s d'animation, "
+          f"{os.path.getsize(args.output) / 1024:.0f} Ko")
+    print(f"Produites en {result.total_ms:.0f} ms ({result.fps:.1f} images/s), "
+          f"dont {result.encode_ms:.0f} ms d'encodage")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,23 +1,253 @@
+import logging
 import random
-import requests
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from modules import config, quote_store
+
+logger = logging.getLogger(__name__)
+
+# Réponses de l'API qui comptent comme des échecs pour le disjoncteur, en plus
+# des erreurs serveur (5xx) : délai dépassé et trop de requêtes
+_FAILURE_STATUSES = {408, 429}
+
+class CircuitOpenError(Exception):
+    """Levée quand le disjoncteur refuse un appel à l'API."""
+
+class CircuitBreaker:
+    """
+    Disjoncteur protégeant l'API de citations.
+
+    Après failure_threshold échecs consécutifs, le disjoncteur s'ouvre et
+    refuse les appels pendant reset_timeout secondes, ou plus longtemps si
+    l'API a demandé d'attendre (Retry-After). Il laisse ensuite passer
+    un appel d'essai (état semi-ouvert) : un succès le referme, un échec le
+    rouvre pour une nouvelle période.
+
+    Args:
+        failure_threshold (int): Nombre d'échecs consécutifs avant ouverture
+        reset_timeout (float): Durée d'ouverture en secondes
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'fermé', 'ouvert', 'semi-ouvert'
+
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        self.failure_threshold = failure_threshold or config.CIRCUIT_FAILURE_THRESHOLD
+        self.reset_timeout = config.CIRCUIT_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.open_for = self.reset_timeout
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Indique si un appel peut être tenté maintenant."""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.open_for:
+                self.state = self.HALF_OPEN
+                return True
+            return self.state == self.CLOSED
+
+    def record_success(self):
+        """Enregistre un appel réussi et referme le disjoncteur."""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self, retry_after=None):
+        """
+        Enregistre un échec et ouvre le disjoncteur si le seuil est atteint.
+
+        Args:
+            retry_after (float): Délai en secondes demandé par l'API avant un
+                                 nouvel appel ; l'ouverture dure au moins ce délai
+        """
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.open_for = max(self.reset_timeout, retry_after or 0)
+
+def _retry_after(headers):
+    """
+    Lit l'en-tête Retry-After d'une réponse HTTP.
+
+    Args:
+        headers (dict): En-têtes de la réponse
+
+    Returns:
+        float: Délai en secondes (borné par config.CIRCUIT_MAX_RETRY_AFTER),
+               None si l'en-tête est absent ou invalide
+    """
+    value = next((v for k, v in headers.items() if k.lower() == 'retry-after'), None)
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        delay = float(value)
+    else:
+        try:
+            delay = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(delay, 0.0), config.CIRCUIT_MAX_RETRY_AFTER)
+
+def guarded_fetch(breaker, session=None):
+    """
+    Construit une fonction de requête passant par le disjoncteur et une session HTTP.
+
+    Args:
+        breaker (CircuitBreaker): Disjoncteur à consulter et à mettre à jour
+        session (requests.Session): Session réutilisant ses connexions (créée si absente)
+
+    Returns:
+        callable: Fonction fetch(url, headers, timeout) pour quote_store.QuoteStore
+    """
+    state = {'session': session}
+
+    def fetch(url, headers, timeout):
+        if not breaker.allow():
+            raise CircuitOpenError("API de citations indisponible (disjoncteur ouvert)")
+        if state['session'] is None:
+            import requests
+            state['session'] = requests.Session()
+        try:
+            response = state['session'].get(url, headers=headers, timeout=timeout)
+        except Exception:
+            breaker.record_failure()
+            raise
+        headers = dict(response.headers)
+        if response.status_code >= 500 or response.status_code in _FAILURE_STATUSES:
+            breaker.record_failure(_retry_after(headers))
+        else:
+            breaker.record_success()
+        return response.status_code, headers, response.content
+
+    return fetch
+
+class QuotePrefetcher:
+    """
+    Garde quelques citations prêtes, rechargées en arrière-plan.
+
+    Un thread remplit un tampon circulaire depuis le corpus local et rafraîchit
+    ce corpus quand il expire. get_quote ne fait jamais d'appel réseau : il
+    sert le tampon, puis le corpus local, puis des citations de secours.
+
+    Args:
+        store (quote_store.QuoteStore): Corpus de citations (créé avec le disjoncteur si absent)
+        buffer_size (int): Nombre de citations gardées prêtes
+        breaker (CircuitBreaker): Disjoncteur protégeant l'API
+    """
+
+    def __init__(self, store=None, buffer_size=None, breaker=None):
+        self.breaker = breaker or CircuitBreaker()
+        self.store = store or quote_store.QuoteStore(fetch=guarded_fetch(self.breaker))
+        self.buffer = deque(maxlen=buffer_size or config.QUOTE_BUFFER_SIZE)
+        self.last_error = None
+        self.served = {'buffer': 0, 'store': 0, 'fallback': 0}
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Démarre le thread de remplissage s'il ne tourne pas déjà."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='quote-prefetcher', daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        """Boucle du thread : remplit le tampon puis attend qu'il se vide."""
+        while True:
+            try:
+                self.fill()
+            except Exception as e:
+                logger.warning("Remplissage du tampon de citations impossible : %s", e)
+            self._wakeup.wait(timeout=config.QUOTE_PREFETCH_INTERVAL)
+            self._wakeup.clear()
+
+    def fill(self):
+        """Rafraîchit le corpus s'il a expiré puis complète le tampon."""
+        if self.store.is_stale():
+            error = self.store.refresh()
+            self.last_error = error
+        while len(self.buffer) < self.buffer.maxlen:
+            quote = self.store.random_quote()
+            if quote is None:
+                break
+            self.buffer.append(quote)
+
+    def get_quote(self):
+        """
+        Retourne immédiatement une citation, sans attendre le réseau.
+
+        Returns:
+            tuple: (texte, auteur, source) où source vaut 'buffer', 'store' ou 'fallback'
+        """
+        self.start()
+        try:
+            text, author = self.buffer.popleft()
+            source = 'buffer'
+        except IndexError:
+            quote = None
+            try:
+                quote = self.store.random_quote()
+            except Exception as e:
+                logger.warning("Lecture du corpus de citations impossible : %s", e)
+            if quote is not None:
+                text, author = quote
+                source = 'store'
+            else:
+                text, author = random.choice(config.FALLBACK_QUOTES)
+                source = 'fallback'
+        self.served[source] += 1
+        self._wakeup.set()
+        return text, author, source
+
+    def stats(self):
+        """Retourne l'état du tampon, du disjoncteur et les sources des citations servies."""
+        return {
+            'buffered': len(self.buffer),
+            'circuit': self.breaker.state,
+            'failures': self.breaker.failures,
+            'served': dict(self.served),
+            'last_error': self.last_error
+        }
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+def get_prefetcher():
+    """
+    Retourne le préchargeur de citations partagé par le processus et le démarre.
+
+    Returns:
+        QuotePrefetcher: Préchargeur utilisant le disjoncteur et une session HTTP partagée
+    """
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = QuotePrefetcher()
+    return _prefetcher.start()
 
 def get_quote_from_api():
     """
     Récupère une citation aléatoire de l'API type.fit.
-    
+
+    La citation est prise dans un tampon rempli en arrière-plan depuis le corpus
+    local : l'appel ne fait jamais attendre le réseau. Si l'API et le corpus
+    sont indisponibles, une citation de secours (config.FALLBACK_QUOTES) est servie.
+
     Returns:
         tuple: (texte_citation, auteur, message_erreur)
             - texte_citation (str): Le texte de la citation
             - auteur (str): Le nom de l'auteur de la citation
             - message_erreur (str): Message d'erreur en cas de problème, None sinon
     """
-    try:
-        response = requests.get("https://type.fit/api/quotes", timeout=5)
-        if response.status_code == 200:
-            quotes = response.json()
-            if quotes:
-                random_quote = random.choice(quotes)
-                return random_quote.get("text", ""), random_quote.get("author", "Inconnu"), None
+    text, author, source = get_prefetcher().get_quote()
+    if not text:
         return "", "", "Impossible de récupérer les citations depuis l'API."
-    except Exception as e:
-        return "", "", f"Erreur lors de la récupération des citations: {e}" 
\ No newline at end of file
+    return text, author or "Inconnu", None
@@ -1,69 +1,94 @@
-from PIL import Image, ImageDraw
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+from PIL import Image
 from modules import config
+from modules.cache import LRUCache, image_nbytes
+
+# Cache des fonds finis, partagé par toutes les sessions du processus
+_background_cache = LRUCache(max_bytes=config.BACKGROUND_CACHE_MAX_BYTES, sizeof=image_nbytes,
+                             name='backgrounds')
+
+def _interpolate(ratio, color1, color2):
+    """
+    Interpole linéairement deux couleurs sur un tableau de ratios.
+    
+    Args:
+        ratio (numpy.ndarray): Ratios de progression entre 0 et 1
+        color1 (tuple): Couleur RGB pour un ratio de 0
+        color2 (tuple): Couleur RGB pour un ratio de 1
+        
+    Returns:
+        numpy.ndarray: Tableau uint8 de forme ratio.shape + (3,)
+    """
+    start = np.asarray(color1[:3], dtype=np.float32)
+    end = np.asarray(color2[:3], dtype=np.float32)
+    ratio = np.asarray(ratio, dtype=np.float32)[..., np.newaxis]
+    # Même troncature que int() sur des valeurs positives
+    return (start * (1 - ratio) + end * ratio).astype(np.uint8)
 
 def create_gradient_background(width, height, color1, color2, direction='vertical'):
     """
     Crée un fond dégradé entre deux couleurs.
     
+    La rampe de couleurs est calculée en une passe NumPy puis étirée à toute
+    l'image, plutôt que dessinée ligne par ligne.
+    
     Args:
         width (int): Largeur de l'image
         height (int): Hauteur de l'image
         color1 (tuple): Couleur RGB de départ
         color2 (tuple): Couleur RGB de fin
-        direction (str): Direction du dégradé ('vertical' ou 'horizontal')
+        direction (str): Direction du dégradé ('vertical', 'horizontal' ou 'diagonal')
         
     Returns:
         PIL.Image: Image avec le fond dégradé
     """
-    image = Image.new('RGB', (width, height), color=color1)
-    draw = ImageDraw.Draw(image)
+    if direction == 'diagonal':
+        # Du coin supérieur gauche vers le coin inférieur droit : la couleur ne
+        # dépend que de x + y, donc chaque ligne est une fenêtre glissante de
+        # la même rampe, décalée d'un pixel par rapport à la précédente
+        ramp = _interpolate(np.arange(width + height) / (width + height), color1, color2).ravel()
+        rows = as_strided(ramp, shape=(height, width * 3), strides=(3, 1))
+        return Image.fromarray(np.ascontiguousarray(rows).reshape(height, width, 3), 'RGB')
     
     if direction == 'vertical':
-        for y in range(height):
-            # Calcul du ratio de progression
-            ratio = y / height
-            # Interpolation linéaire entre les couleurs
-            r = int(color1[0] * (1 - ratio) + color2[0] * ratio)
-            g = int(color1[1] * (1 - ratio) + color2[1] * ratio)
-            b = int(color1[2] * (1 - ratio) + color2[2] * ratio)
-            draw.line([(0, y), (width, y)], fill=(r, g, b))
+        # Une couleur par ligne, étirée sur toute la largeur
+        ramp = _interpolate(np.arange(height) / height, color1, color2)[:, np.newaxis, :]
     else:  # horizontal
-        for x in range(width):
-            ratio = x / width
-            r = int(color1[0] * (1 - ratio) + color2[0] * ratio)
-            g = int(color1[1] * (1 - ratio) + color2[1] * ratio)
-            b = int(color1[2] * (1 - ratio) + color2[2] * ratio)
-            draw.line([(x, 0), (x, height)], fill=(r, g, b))
-            
-    return image
+        ramp = _interpolate(np.arange(width) / width, color1, color2)[np.newaxis, :, :]
+    
+    # L'étirement au plus proche voisin recopie la rampe sans interpolation
+    return Image.fromarray(ramp, 'RGB').resize((width, height), Image.NEAREST)
 
 def create_radial_background(width, height, color1, color2):
     """
     Crée un fond avec un dégradé radial.
     
+    La couleur de chaque pixel dépend de sa distance au centre : les distances
+    sont calculées en une passe, puis converties en couleurs via une table
+    d'une entrée par rayon.
+    
     Args:
         width (int): Largeur de l'image
         height (int): Hauteur de l'image
-        color1 (tuple): Couleur RGB du centre
-        color2 (tuple): Couleur RGB des bords
+        color1 (tuple): Couleur RGB des bords
+        color2 (tuple): Couleur RGB du centre
         
     Returns:
         PIL.Image: Image avec le fond dégradé radial
     """
-    img = Image.new('RGB', (width, height), color=color2)
-    draw = ImageDraw.Draw(img)
+    max_radius = max(width, height)
     
-    for r in range(max(width, height), 0, -1):
-        ratio = r / max(width, height)
-        r_color = int(color1[0] * ratio + color2[0] * (1 - ratio))
-        g_color = int(color1[1] * ratio + color2[1] * (1 - ratio))
-        b_color = int(color1[2] * ratio + color2[2] * (1 - ratio))
-        
-        draw.ellipse([(width//2 - r, height//2 - r), 
-                     (width//2 + r, height//2 + r)], 
-                     fill=(r_color, g_color, b_color))
+    # Table des couleurs par rayon (identique aux anneaux concentriques d'origine)
+    colors = _interpolate(np.arange(max_radius + 1) / max_radius, color2, color1)
+    
+    # Distance de chaque pixel au centre, arrondie au rayon entier le plus proche
+    dx = np.arange(width, dtype=np.float32) - width // 2
+    dy = np.arange(height, dtype=np.float32) - height // 2
+    radius = np.sqrt(dx[np.newaxis, :] ** 2 + dy[:, np.newaxis] ** 2)
+    radius = np.clip(np.rint(radius), 1, max_radius).astype(np.uint16)
                      
-    return img
+    return Image.fromarray(np.take(colors, radius, axis=0), 'RGB')
 
 def create_solid_background(width, height, color):
     """
@@ -79,13 +104,41 @@ def create_solid_background(width, height, color):
     """
     return Image.new('RGB', (width, height), color=color)
 
-def create_background(style, theme):
+def build_background(style, width, height, color1, color2):
+    """
+    Construit un fond sans passer par le cache.
+    
+    Args:
+        style (str): Style de fond ('gradient', 'diagonal', 'radial', 'uni')
+        width (int): Largeur de l'image
+        height (int): Hauteur de l'image
+        color1 (tuple): Première couleur RGB du thème
+        color2 (tuple): Seconde couleur RGB du thème
+        
+    Returns:
+        PIL.Image: Image avec le fond généré
+    """
+    if style == 'gradient':
+        return create_gradient_background(width, height, color1, color2)
+    elif style == 'diagonal':
+        return create_gradient_background(width, height, color1, color2, direction='diagonal')
+    elif style == 'radial':
+        return create_radial_background(width, height, color1, color2)
+    else:  # 'uni'
+        return create_solid_background(width, height, color1)
+
+def create_background(style, theme, width=None, height=None):
     """
     Crée le fond de l'image selon le style et le thème choisis.
     
+    Les fonds finis sont conservés dans un cache LRU partagé par le processus ;
+    chaque appel reçoit une copie sur laquelle il peut dessiner librement.
+    
     Args:
-        style (str): Style de fond ('gradient', 'radial', 'uni')
+        style (str): Style de fond ('gradient', 'diagonal', 'radial', 'uni')
         theme (str): Thème de couleurs ('light', 'dark')
+        width (int): Largeur de l'image (config.IMAGE_WIDTH par défaut)
+        height (int): Hauteur de l'image (config.IMAGE_HEIGHT par défaut)
         
     Returns:
         PIL.Image: Image avec le fond généré
@@ -93,11 +146,36 @@ def create_background(style, theme):
     # Obtenir les couleurs du thème
     bg_color1 = config.THEMES[theme]['bg_color1']
     bg_color2 = config.THEMES[theme]['bg_color2']
+    width, height = width or config.IMAGE_WIDTH, height or config.IMAGE_HEIGHT
     
-    # Créer le fond selon le style choisi
-    if style == 'gradient':
-        return create_gradient_background(config.IMAGE_WIDTH, config.IMAGE_HEIGHT, bg_color1, bg_color2)
-    elif style == 'radial':
-        return create_radial_background(config.IMAGE_WIDTH, config.IMAGE_HEIGHT, bg_color1, bg_color2)
-    else:  # 'uni'
-        return create_solid_background(config.IMAGE_WIDTH, config.IMAGE_HEIGHT, bg_color1) 
\ No newline at end of file
+    # Les couleurs font partie de la clé : modifier un thème invalide ses fonds
+    key = (style, theme, width, height, bg_color1, bg_color2)
+    img = _background_cache.get_or_create(
+        key, lambda: build_background(style, width, height, bg_color1, bg_color2))
+    return img.copy()
+
+def render_background(style, context):
+    """
+    Crée le fond d'un rendu à la taille et dans le thème de son contexte.
+    
+    Args:
+        style (str): Style de fond ('gradient', 'diagonal', 'radial', 'uni')
+        context (RenderContext): Contexte du rendu
+        
+    Returns:
+        PIL.Image: Fond propre au rendu, sur lequel il peut dessiner librement
+    """
+    return create_background(style, context.theme, *context.canvas_size)
+
+def get_cache_stats():
+    """
+    Retourne les compteurs du cache de fonds.
+    
+    Returns:
+        dict: Statistiques du cache (entrées, octets, succès, échecs...)
+    """
+    return _background_cache.stats()
+
+def clear_cache():
+    """Vide le cache de fonds."""
+    _background_cache.clear()
@@ -0,0 +1,292 @@
+"""
+Rendu en lot d'images de citations à partir d'un manifeste CSV ou JSONL.
+
+Usage :
+    python -m modules.batch manifeste.jsonl -o sortie/
+    python -m modules.batch manifeste.csv -o images.zip --workers 8
+    python -m modules.batch manifeste.csv -o sortie/ --profile webp
+    python -m modules.batch manifeste.csv -o sortie/ --metrics lot.prom
+
+Chaque ligne du manifeste décrit une image avec les champs quote, author,
+theme, background et decoration (ainsi que filename, watermark, signature,
+profile et format, facultatifs). Les images sont rendues dans un pool de processus et écrites
+au fil de l'eau ; une ligne en erreur est journalisée puis ignorée. Les
+mesures des rendus (durées par étape, caches, octets) peuvent être écrites au
+format texte Prometheus.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from modules import config, metrics
+
+logger = logging.getLogger(__name__)
+
+def read_manifest(path):
+    """
+    Lit un manifeste ligne par ligne, sans le charger entièrement en mémoire.
+
+    Args:
+        path (str): Chemin vers un fichier .csv ou .jsonl
+
+    Yields:
+        tuple: (numéro de ligne, dictionnaire des champs) ; les lignes JSON
+               invalides donnent un dictionnaire contenant la clé 'error'
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.csv'):
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                yield line_number, row
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, {'error': f"JSON invalide: {e}"}
+                    continue
+                if not isinstance(row, dict):
+                    row = {'error': "la ligne JSON doit être un objet"}
+                yield line_number, row
+
+def _output_stem(line_number, row):
+    """
+    Construit le nom, sans extension, du fichier de sortie d'une ligne du manifeste.
+
+    L'extension d'un champ filename est ignorée : celle du profil d'encodage
+    est ajoutée une fois l'image rendue.
+    """
+    filename = row.get('filename')
+    if isinstance(filename, str):
+        stem = os.path.splitext(os.path.basename(filename.strip()))[0]
+        if stem:
+            return stem
+    author = row.get('author') if isinstance(row.get('author'), str) else ''
+    slug = re.sub(r'[^a-z0-9]+', '_', (author or 'inconnu').lower()).strip('_')
+    return f"{line_number:06d}_{slug or 'inconnu'}"
+
+def _unique_stem(line_number, stem, used):
+    """
+    Réserve un nom de fichier pour une ligne du manifeste.
+
+    Un nom déjà pris par une ligne précédente reçoit le numéro de la ligne en
+    suffixe : deux lignes ne s'écrasent jamais dans un dossier et ne donnent
+    jamais deux entrées de même nom dans une archive.
+
+    Args:
+        line_number (int): Numéro de la ligne dans le manifeste
+        stem (str): Nom souhaité, sans extension
+        used (set): Noms déjà réservés, complété par le nom retenu
+
+    Returns:
+        str: Nom retenu, sans extension
+    """
+    unique = stem
+    while unique in used:
+        unique = f"{unique}_{line_number}"
+    if unique != stem:
+        logger.warning("Ligne %d : le nom '%s' est déjà pris, image écrite sous '%s'",
+                       line_number, stem, unique)
+    used.add(unique)
+    return unique
+
+def render_row(line_number, row, profile=None, stem=None):
+    """
+    Rend une ligne du manifeste (exécuté dans un processus du pool).
+
+    Args:
+        line_number (int): Numéro de la ligne dans le manifeste
+        row (dict): Champs de la ligne
+        profile (str): Profil d'encodage des lignes qui n'en précisent pas
+        stem (str): Nom du fichier sans extension (déduit de la ligne par défaut)
+
+    Returns:
+        tuple: (nom du fichier avec l'extension du profil, données encodées,
+                durée d'encodage en millisecondes, mesures du rendu)
+
+    Raises:
+        ValueError: Si la ligne est invalide ou si le rendu échoue
+    """
+    # Import différé : le processus parent n'a pas besoin du moteur de rendu
+    from modules import generator
+
+    if row.get('error'):
+        raise ValueError(row['error'])
+    if row.get('filename') is not None and not isinstance(row['filename'], str):
+        raise ValueError("le champ 'filename' doit être une chaîne")
+    if profile and not row.get('profile'):
+        row = dict(row, profile=profile)
+    result = generator.render_quote(**generator.render_params_from_dict(row))
+    if not result.ok:
+        raise ValueError('; '.join(result.errors) or "le rendu a échoué")
+    stem = stem or _output_stem(line_number, row)
+    return f"{stem}.{result.extension}", result.data, result.encode_ms, result.metrics
+
+class DirectoryWriter:
+    """Écrit chaque image dans un dossier dès qu'elle est prête."""
+
+    def __init__(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+
+    def write(self, name, data):
+        with open(os.path.join(self.path, name), 'wb') as f:
+            f.write(data)
+
+    def close(self):
+        pass
+
+class ZipWriter:
+    """Ajoute chaque image à une archive ZIP dès qu'elle est prête."""
+
+    def __init__(self, path):
+        # Les images sont déjà compressées : on les stocke sans recompression
+        self.archive = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED)
+
+    def write(self, name, data):
+        self.archive.writestr(name, data)
+
+    def close(self):
+        self.archive.close()
+
+def open_writer(output):
+    """Retourne l'écrivain adapté à la destination (archive .zip ou dossier)."""
+    if output.lower().endswith('.zip'):
+        return ZipWriter(output)
+    return DirectoryWriter(output)
+
+def run_batch(manifest, output, workers=None, progress_every=1.0, stream=sys.stderr,
+              profile=None, registry=None):
+    """
+    Rend toutes les lignes d'un manifeste dans un pool de processus.
+
+    Le nombre de rendus en cours est borné (deux par processus) : le manifeste
+    est lu et les résultats écrits au fil de l'eau : seuls les noms des fichiers
+    sont conservés, pour qu'aucune image n'en écrase une autre.
+
+    Args:
+        manifest (str): Chemin du manifeste CSV ou JSONL
+        output (str): Dossier de sortie ou archive .zip
+        workers (int): Nombre de processus (nombre de cœurs par défaut)
+        progress_every (float): Intervalle en secondes entre deux lignes de progression
+        stream (file): Flux où écrire la progression
+        profile (str): Profil d'encodage par défaut (voir config.ENCODER_PROFILES)
+        registry (metrics.MetricsRegistry): Registre où agréger les mesures des rendus
+
+    Returns:
+        dict: Bilan du lot (rendues, échecs, durée, images par seconde,
+              octets écrits et temps total d'encodage)
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    writer = open_writer(output)
+    rendered = failed = total_bytes = 0
+    encode_ms = 0.0
+    used_stems = set()
+    start = last_report = time.perf_counter()
+
+    def report(final=False):
+        elapsed = time.perf_counter() - start
+        rate = rendered / elapsed if elapsed > 0 else 0.0
+        end = '\n' if final else '\r'
+        stream.write(f"{rendered} images, {failed} échecs, {rate:.1f} images/s{end}")
+        stream.flush()
+
+    def collect(done, pending):
+        nonlocal rendered, failed, total_bytes, encode_ms
+        for future in done:
+            line_number = pending.pop(future)
+            try:
+                name, data, row_encode_ms, row_metrics = future.result()
+                if registry is not None:
+                    registry.observe(row_metrics)
+                writer.write(name, data)
+                rendered += 1
+                total_bytes += len(data)
+                encode_ms += row_encode_ms
+            except Exception as e:
+                failed += 1
+                logger.error("Ligne %d ignorée : %s", line_number, e)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+            for line_number, row in read_manifest(manifest):
+                if len(pending) >= max_in_flight:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done, pending)
+                stem = _unique_stem(line_number, _output_stem(line_number, row), used_stems)
+                pending[executor.submit(render_row, line_number, row, profile, stem)] = line_number
+
+                if progress_every and time.perf_counter() - last_report >= progress_every:
+                    report()
+                    last_report = time.perf_counter()
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done, pending)
+                if progress_every and time.perf_counter() - last_report >= progress_every:
+                    report()
+                    last_report = time.perf_counter()
+    finally:
+        writer.close()
+
+    if progress_every:
+        report(final=True)
+    elapsed = time.perf_counter() - start
+    return {
+        'rendered': rendered,
+        'failed': failed,
+        'seconds': elapsed,
+        'images_per_second': rendered / elapsed if elapsed > 0 else 0.0,
+        'bytes': total_bytes,
+        'encode_seconds': encode_ms / 1000
+    }
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande."""
+    parser = argparse.ArgumentParser(
+        prog='python -m modules.batch',
+        description="Rend en lot les citations d'un manifeste CSV ou JSONL.")
+    parser.add_argument('manifest', help="Manifeste .csv ou .jsonl")
+    parser.add_argument('-o', '--output', default='sortie',
+                        help="Dossier de sortie ou archive .zip (défaut : sortie)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Nombre de processus de rendu (défaut : nombre de cœurs)")
+    parser.add_argument('-p', '--profile', default=None, choices=list(config.ENCODER_PROFILES),
+                        help=f"Profil d'encodage des lignes sans champ profile (défaut : {config.DEFAULT_ENCODER_PROFILE})")
+    parser.add_argument('-m', '--metrics', default=None,
+                        help="Fichier où écrire les mesures des rendus au format texte Prometheus")
+    parser.add_argument('--log-metrics', action='store_true',
+                        help="Journalise les mesures de chaque rendu (une ligne JSON par image)")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="N'affiche pas la progression")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    if not args.log_metrics:
+        logging.getLogger(metrics.__name__).setLevel(logging.WARNING)
+    registry = metrics.MetricsRegistry() if args.metrics else None
+    summary = run_batch(args.manifest, args.output, workers=args.workers,
+                        progress_every=0 if args.quiet else 1.0, profile=args.profile,
+                        registry=registry)
+    if registry is not None:
+        registry.write_textfile(args.metrics)
+    logger.info("%d images rendues, %d échecs en %.1f s (%.1f images/s)",
+                summary['rendered'], summary['failed'], summary['seconds'],
+                summary['images_per_second'])
+    if summary['rendered']:
+        logger.info("%.1f Ko par image en moyenne, encodage %.1f ms par image",
+                    summary['bytes'] / summary['rendered'] / 1024,
+                    summary['encode_seconds'] * 1000 / summary['rendered'])
+    return 1 if summary['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# Compteurs de consultations du thread courant (voir track_lookups)
+_local = threading.local()
+
+@contextmanager
+def track_lookups(counts):
+    """
+    Compte les consultations des caches nommés faites par le thread courant.
+
+    Args:
+        counts (dict): {nom du cache: [succès, échecs]}, complété sur place
+
+    Yields:
+        dict: counts
+    """
+    previous = getattr(_local, 'counts', None)
+    _local.counts = counts
+    try:
+        yield counts
+    finally:
+        _local.counts = previous
+
+def _record_lookup(name, hit):
+    """Ajoute une consultation aux compteurs du thread courant, s'il en a."""
+    counts = getattr(_local, 'counts', None)
+    if counts is not None and name is not None:
+        entry = counts.setdefault(name, [0, 0])
+        entry[0 if hit else 1] += 1
+
+class LRUCache:
+    """
+    Cache LRU borné, partagé entre les threads d'un même processus.
+
+    Les entrées sont évincées de la moins récemment utilisée à la plus récente
+    dès que le nombre d'entrées ou leur taille cumulée dépasse les limites.
+
+    Args:
+        max_items (int): Nombre maximal d'entrées (None pour aucune limite)
+        max_bytes (int): Taille cumulée maximale en octets (None pour aucune limite)
+        sizeof (callable): Fonction donnant la taille en octets d'une valeur
+        name (str): Nom du cache dans les compteurs de track_lookups
+    """
+
+    def __init__(self, max_items=None, max_bytes=None, sizeof=None, name=None):
+        self.name = name
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._building = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Retourne la valeur associée à la clé et la marque comme récente."""
+        with self._lock:
+            try:
+                value, _ = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                value = default
+                hit = False
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                hit = True
+        _record_lookup(self.name, hit)
+        return value
+
+    def put(self, key, value):
+        """
+        Ajoute ou remplace une entrée puis évince les plus anciennes si besoin.
+
+        Une valeur plus grande que le budget total n'est pas conservée.
+        """
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._entries and (
+                    (self.max_items is not None and len(self._entries) > self.max_items)
+                    or (self.max_bytes is not None and self._bytes > self.max_bytes)):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_create(self, key, factory):
+        """
+        Retourne la valeur en cache ou la construit avec factory() puis la stocke.
+
+        Un seul thread construit une clé donnée ; les autres threads qui la
+        demandent en même temps attendent ce résultat au lieu de refaire le travail.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = self._entries[key][0]
+                found = True
+            else:
+                key_lock = self._building.setdefault(key, threading.Lock())
+                found = False
+        if found:
+            _record_lookup(self.name, True)
+            return value
+
+        with key_lock:
+            with self._lock:
+                found = key in self._entries
+                if found:
+                    # Construite par un autre thread pendant l'attente
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    value = self._entries[key][0]
+                else:
+                    self.misses += 1
+            _record_lookup(self.name, found)
+            if found:
+                return value
+            try:
+                value = factory()
+                self.put(key, value)
+            finally:
+                with self._lock:
+                    self._building.pop(key, None)
+        return value
+
+    def clear(self):
+        """Vide le cache sans réinitialiser les compteurs."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def stats(self):
+        """
+        Retourne l'état du cache.
+
+        Returns:
+            dict: Entrées, octets, limites, succès, échecs, évictions et taux de succès
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'items': len(self._entries),
+                'bytes': self._bytes,
+                'max_items': self.max_items,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+def image_nbytes(img):
+    """
+    Estime la mémoire occupée par les pixels d'une image PIL.
+
+    Args:
+        img (PIL.Image): Image à mesurer
+
+    Returns:
+        int: Taille approximative en octets
+    """
+    # Pillow stocke les images RGB sur 4 octets par pixel
+    bands = len(img.getbands())
+    return img.width * img.height * (4 if bands >= 3 else bands)
@@ -1,8 +1,16 @@
-# Dimensions de l'image
+# Dimensions de l'image (format carré par défaut)
 IMAGE_WIDTH = 1080
 IMAGE_HEIGHT = 1080
 PADDING = 100
 
+# Formats d'image disponibles : libellé et taille (largeur, hauteur) en pixels
+FORMATS = {
+    'square': {'label': "Carré (1080×1080)", 'size': (IMAGE_WIDTH, IMAGE_HEIGHT)},
+    'story': {'label': "Story (1080×1920)", 'size': (1080, 1920)},
+    'landscape': {'label': "Paysage (1200×630)", 'size': (1200, 630)}
+}
+DEFAULT_FORMAT = 'square'
+
 # Chemins vers les polices
 FONT_REGULAR_PATH = "Lato/Lato-Regular.ttf"
 FONT_BOLD_PATH = "Lato/Lato-Bold.ttf"
@@ -29,7 +37,7 @@ THEMES = {
 }
 
 # Liste des styles de fond disponibles
-BACKGROUND_STYLES = ['gradient', 'radial', 'uni']
+BACKGROUND_STYLES = ['gradient', 'diagonal', 'radial', 'uni']
 
 # Liste des décorations disponibles
 DECORATION_STYLES = ['aucune', 'guillemets', 'cadre', 'coins', 'motif']
@@ -41,12 +49,169 @@ FONT_SIZES = {
     'signature': 30
 }
 
+# Ajustement automatique de la taille de la citation : plus petite taille
+# acceptée et nombre maximal de corrections après la recherche dichotomique
+QUOTE_FONT_SIZE_MIN = 40
+AUTO_FIT_MAX_CORRECTIONS = 2
+
 # Textes par défaut
 DEFAULT_SIGNATURE = "by Ibrahima Sory Sané"
 DEFAULT_WATERMARK = "☆ Citation Visuelle ☆"
 
-# Taille maximale de l'historique
-MAX_HISTORY_SIZE = 10
+# Nombre maximal de polices (fichier, taille) gardées en cache
+FONT_CACHE_SIZE = 32
+
+# Nombre de tables de caractères (police, taille), de mesures de mots
+# et de dispositions de texte gardées en cache
+GLYPH_CACHE_SIZE = 128
+TEXT_METRICS_CACHE_SIZE = 20000
+LAYOUT_CACHE_SIZE = 256
+
+# Budget mémoire du cache de textes rastérisés : signature, watermark, auteurs (en octets)
+TEXT_SPRITE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Budget mémoire du cache de fonds partagé (en octets)
+BACKGROUND_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Budget mémoire du cache de calques de décoration (en octets)
+DECORATION_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Budget mémoire du cache de fonds décorés, copiés tels quels quand seul le texte change (en octets)
+BASE_LAYER_CACHE_MAX_BYTES = 48 * 1024 * 1024
+
+# Côté des tuiles des calques de décoration (les tuiles vides ne sont pas gardées)
+DECORATION_TILE_SIZE = 64
+
+# Aperçu rapide : facteur de réduction et profil d'encodage de l'image affichée
+# (l'image en taille réelle n'est rendue qu'au téléchargement)
+PREVIEW_SCALE = 0.5
+PREVIEW_PROFILE = 'jpeg'
+
+# Aperçu en direct : délai d'anti-rebond après la dernière modification,
+# nombre de rendus d'aperçu simultanés pour tout le processus (toutes sessions
+# confondues) et attente maximale entre deux rafraîchissements de l'affichage
+# tant qu'un aperçu est en cours (en secondes)
+LIVE_PREVIEW_DEBOUNCE = 0.3
+LIVE_PREVIEW_WORKERS = 4
+LIVE_PREVIEW_POLL_SECONDS = 0.5
+
+# Préchargement au démarrage d'un processus : polices Lato et fonds des styles
+# ci-dessous, dans chaque thème, au format par défaut, en taille réelle et en aperçu
+WARMUP_ENABLED = True
+WARMUP_BACKGROUND_STYLES = ['gradient']
+
+# Historique de session : budget mémoire par session (en octets), plus grande
+# dimension des miniatures (en pixels) et profil d'encodage des miniatures
+HISTORY_MAX_BYTES = 256 * 1024
+HISTORY_THUMBNAIL_SIZE = 240
+HISTORY_THUMBNAIL_PROFILE = 'webp'
+
+# Profils d'encodage des images : format Pillow, options d'enregistrement,
+# type MIME et extension du fichier produit
+ENCODER_PROFILES = {
+    'png': {'label': "PNG", 'format': 'PNG', 'options': {},
+            'mime': 'image/png', 'extension': 'png'},
+    # Palette de 256 couleurs au plus quand l'erreur reste sous PALETTE_MAX_ERROR,
+    # PNG en couleurs réelles sinon
+    'png_palette': {'label': "PNG palette (adaptatif)", 'format': 'PNG', 'options': {},
+                    'palette': True, 'mime': 'image/png', 'extension': 'png'},
+    'png_fast': {'label': "PNG rapide", 'format': 'PNG', 'options': {'compress_level': 1},
+                 'mime': 'image/png', 'extension': 'png'},
+    'png_small': {'label': "PNG compact", 'format': 'PNG', 'options': {'optimize': True},
+                  'mime': 'image/png', 'extension': 'png'},
+    'webp_lossless': {'label': "WebP sans perte", 'format': 'WEBP',
+                      'options': {'lossless': True, 'quality': 80, 'method': 4},
+                      'mime': 'image/webp', 'extension': 'webp'},
+    'webp': {'label': "WebP", 'format': 'WEBP', 'options': {'quality': 85, 'method': 4},
+             'mime': 'image/webp', 'extension': 'webp'},
+    # Sans sous-échantillonnage de la chrominance pour garder des bords de texte nets
+    'jpeg': {'label': "JPEG", 'format': 'JPEG',
+             'options': {'quality': 90, 'optimize': True, 'subsampling': 0},
+             'mime': 'image/jpeg', 'extension': 'jpg'}
+}
+DEFAULT_ENCODER_PROFILE = 'png'
+
+# Animations : effets d'apparition du texte ('lignes' : une ligne après l'autre,
+# 'machine' : mot après mot, 'fondu' : tout le texte en fondu)
+ANIMATION_EFFECTS = ['lignes', 'machine', 'fondu']
+DEFAULT_ANIMATION_EFFECT = 'lignes'
+
+# Cadence du fondu (images par seconde ; 20 donne des durées multiples de
+# 10 ms, la précision du GIF) et durées des étapes des animations (en secondes)
+ANIMATION_FPS = 20
+ANIMATION_FADE_SECONDS = 1.5
+ANIMATION_LINE_SECONDS = 0.6
+ANIMATION_WORD_SECONDS = 0.15
+ANIMATION_HOLD_SECONDS = 3.0
+
+# Formats des animations : options d'encodage, type MIME et extension
+ANIMATION_FORMATS = {
+    'gif': {'label': "GIF animé", 'options': {},
+            'mime': 'image/gif', 'extension': 'gif'},
+    'apng': {'label': "PNG animé (APNG)", 'options': {'compress_level': 6},
+             'mime': 'image/apng', 'extension': 'png'},
+    'webp': {'label': "WebP animé", 'options': {'quality': 85, 'method': 4},
+             'mime': 'image/webp', 'extension': 'webp'}
+}
+DEFAULT_ANIMATION_FORMAT = 'gif'
+
+# Réduction en palette : nombre de couleurs, écart maximal toléré par canal
+# (0-255), facteur de réduction de l'échantillon où sont comptées les couleurs
+# et nombre de couleurs les plus fréquentes de l'échantillon reprises telles
+# quelles (avec celles des thèmes) pour que les aplats ne soient jamais altérés
+PALETTE_MAX_COLORS = 256
+PALETTE_MAX_ERROR = 8
+PALETTE_SAMPLE_REDUCTION = 4
+PALETTE_EXACT_COLORS = 32
+
+# Cache sur disque des images rendues, partagé par les processus
+RENDER_CACHE_ENABLED = True
+RENDER_CACHE_DIR = ".cache/renders"
+RENDER_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# API de citations et corpus local (rafraîchi au-delà de la durée de validité)
+QUOTES_API_URL = "https://type.fit/api/quotes"
+QUOTES_API_TIMEOUT = 5
+QUOTE_STORE_DIR = ".cache/quotes"
+QUOTE_STORE_TTL = 24 * 3600
+
+# Bibliothèque locale de citations (SQLite + index FTS5) : chemin de la base,
+# résultats par page, plafond du comptage des résultats, temps de requête
+# visé par « python -m modules.quote_library bench » (en millisecondes) et
+# nombre de préfixes longs dont les mots de l'index restent en mémoire
+QUOTE_LIBRARY_PATH = "data/quotes.db"
+QUOTE_LIBRARY_PAGE_SIZE = 10
+QUOTE_LIBRARY_COUNT_LIMIT = 10000
+QUOTE_LIBRARY_TARGET_MS = 10
+QUOTE_LIBRARY_PREFIX_CACHE_SIZE = 256
+
+# Préchargement des citations : taille du tampon, intervalle de vérification
+# du corpus (en secondes) et disjoncteur de l'API ; les réponses 408, 429 et
+# 5xx comptent comme des échecs, et un en-tête Retry-After prolonge
+# l'ouverture du disjoncteur jusqu'à CIRCUIT_MAX_RETRY_AFTER secondes
+QUOTE_BUFFER_SIZE = 8
+QUOTE_PREFETCH_INTERVAL = 60
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_RESET_TIMEOUT = 60
+CIRCUIT_MAX_RETRY_AFTER = 3600
+
+# Citations servies quand ni l'API ni le corpus local ne sont disponibles
+FALLBACK_QUOTES = [
+    ("La seule limite à notre réalisation de demain sera nos doutes d'aujourd'hui.", "Franklin D. Roosevelt"),
+    ("Le succès n'est pas final, l'échec n'est pas fatal : c'est le courage de continuer qui compte.", "Winston Churchill"),
+    ("La vie, c'est comme une bicyclette, il faut avancer pour ne pas perdre l'équilibre.", "Albert Einstein"),
+    ("Il n'y a qu'une façon d'échouer, c'est d'abandonner avant d'avoir réussi.", "Georges Clemenceau"),
+    ("Ce n'est pas parce que les choses sont difficiles que nous n'osons pas, c'est parce que nous n'osons pas qu'elles sont difficiles.", "Sénèque")
+]
+
+# Nombre de latences récentes conservées par le service HTTP pour les percentiles
+SERVER_LATENCY_WINDOW = 10000
+
+# Mesures des rendus : bornes des histogrammes de durée (en secondes) et de
+# taille (en octets) exportés au format Prometheus
+METRICS_DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+METRICS_SIZE_BUCKETS = (16 * 1024, 64 * 1024, 128 * 1024, 256 * 1024, 512 * 1024,
+                        1024 * 1024, 2 * 1024 * 1024, 4 * 1024 * 1024, 8 * 1024 * 1024)
 
-# Variable globale pour savoir si on utilise la police par défaut
-using_default_font = False 
\ No newline at end of file
+# Budget de temps d'import de modules.generator (en millisecondes)
+IMPORT_TIME_BUDGET_MS = 250 
\ No newline at end of file
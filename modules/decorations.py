@@ -1,6 +1,16 @@
-from PIL import ImageDraw
+import numpy as np
+from PIL import Image, ImageDraw
 from math import sin, cos, pi
 from modules import config, font_manager
+from modules.cache import LRUCache, image_nbytes
+
+# Dessinateurs de décorations enregistrés, indexés par nom de style
+_decorations = {}
+
+# Calques RGBA déjà rastérisés, indexés par (style, couleur, taille, échelle)
+_layer_cache = LRUCache(max_bytes=config.DECORATION_CACHE_MAX_BYTES,
+                        sizeof=lambda tiles: sum(image_nbytes(layer) for _, layer in tiles),
+                        name='decorations')
 
 def draw_decoration(img, decoration_type, color, pos_x, pos_y, size):
     """
@@ -22,7 +32,8 @@ def draw_decoration(img, decoration_type, color, pos_x, pos_y, size):
     if decoration_type == "guillemets":
         # Dessiner des guillemets stylisés
         quote_size = size
-        draw.text((pos_x, pos_y), "\"\"", font=font_manager.get_font(config.FONT_BOLD_PATH, quote_size*2), fill=color)
+        font, _ = font_manager.get_font(config.FONT_BOLD_PATH, quote_size*2)
+        draw.text((pos_x, pos_y), "\"\"", font=font, fill=color)
     
     elif decoration_type == "étoile":
         # Dessiner une étoile
@@ -47,14 +58,145 @@ def draw_decoration(img, decoration_type, color, pos_x, pos_y, size):
         
     return img
 
-def add_decorative_elements(img, decoration_style, theme):
+def register_decoration(name):
+    """
+    Décorateur enregistrant un nouveau style de décoration.
+    
+    La fonction décorée reçoit (mask, scale) et dessine la décoration en
+    blanc (255) sur mask, un masque 'L' de la taille de l'image ; elle est
+    ensuite colorée avec la couleur de décoration du thème. Le style est
+    ajouté à config.DECORATION_STYLES pour être proposé dans l'interface.
+    
+    Args:
+        name (str): Nom du style de décoration
+        
+    Returns:
+        callable: Décorateur qui enregistre la fonction et la retourne inchangée
+    """
+    def decorator(func):
+        _decorations[name] = func
+        if name not in config.DECORATION_STYLES:
+            config.DECORATION_STYLES.append(name)
+        return func
+    return decorator
+
+@register_decoration('guillemets')
+def _draw_guillemets(mask, scale):
+    """Guillemets dans le coin supérieur gauche."""
+    draw = ImageDraw.Draw(mask)
+    font, _ = font_manager.get_font(config.FONT_BOLD_PATH, round(80 * scale) * 2)
+    draw.text((config.PADDING * scale, config.PADDING * scale), "\"\"", font=font, fill=255)
+
+@register_decoration('cadre')
+def _draw_cadre(mask, scale):
+    """Cadre simple à distance fixe des bords."""
+    draw = ImageDraw.Draw(mask)
+    width, height = mask.size
+    margin = 50 * scale
+    draw.rectangle([(margin, margin), (width - margin, height - margin)],
+                   outline=255, width=max(1, round(5 * scale)))
+
+@register_decoration('coins')
+def _draw_coins(mask, scale):
+    """Équerres aux quatre coins de l'image."""
+    draw = ImageDraw.Draw(mask)
+    width, height = mask.size
+    corner_size = 80 * scale
+    line_width = max(1, round(5 * scale))
+    margin = 40 * scale
+    for x, dx in ((margin, 1), (width - margin, -1)):
+        for y, dy in ((margin, 1), (height - margin, -1)):
+            draw.line([(x, y), (x + dx * corner_size, y)], fill=255, width=line_width)
+            draw.line([(x, y), (x, y + dy * corner_size)], fill=255, width=line_width)
+
+@register_decoration('motif')
+def _draw_motif(mask, scale):
+    """
+    Grille régulière de points.
+    
+    Un seul point est dessiné dans une tuile de la taille d'une cellule, puis
+    la tuile est répétée sur toute la grille en une opération NumPy.
+    """
+    width, height = mask.size
+    spacing = max(1, round(80 * scale))
+    dot_size = 4 * scale
+    rows, cols = int(height / spacing), int(width / spacing)
+    if not rows or not cols:
+        return
+    
+    tile = Image.new('L', (spacing, spacing), 0)
+    center = spacing / 2
+    ImageDraw.Draw(tile).ellipse([(center - dot_size, center - dot_size),
+                                  (center + dot_size, center + dot_size)], fill=255)
+    grid = np.tile(np.asarray(tile), (rows, cols))
+    mask.paste(Image.fromarray(grid), (0, 0))
+
+def _build_layer(decoration_style, color, width, height, scale):
+    """
+    Rastérise une décoration en calque RGBA découpé en tuiles.
+    
+    Le masque est découpé en tuiles de config.DECORATION_TILE_SIZE pixels ;
+    les tuiles vides sont écartées et les autres recadrées sur leur partie
+    visible. La composition ne touche ainsi que les pixels de la décoration,
+    même quand elle s'étend sur toute l'image (cadre, motif).
+    
+    Returns:
+        list: Tuiles (boîte (x0, y0, x1, y1), calque RGBA) de la décoration
+    """
+    mask = Image.new('L', (width, height), 0)
+    _decorations[decoration_style](mask, scale)
+    
+    tile = config.DECORATION_TILE_SIZE
+    rows, cols = -(-height // tile), -(-width // tile)
+    padded = np.zeros((rows * tile, cols * tile), dtype=np.uint8)
+    padded[:height, :width] = np.asarray(mask)
+    occupied = padded.reshape(rows, tile, cols, tile).any(axis=(1, 3))
+    
+    tiles = []
+    for r, c in zip(*np.nonzero(occupied)):
+        left, top = int(c) * tile, int(r) * tile
+        part = mask.crop((left, top, min(left + tile, width), min(top + tile, height)))
+        x0, y0, x1, y1 = part.getbbox()
+        layer = Image.new('RGBA', (x1 - x0, y1 - y0), tuple(color[:3]) + (0,))
+        layer.putalpha(part.crop((x0, y0, x1, y1)))
+        tiles.append(((left + x0, top + y0, left + x1, top + y1), layer))
+    return tiles
+
+def get_decoration_layer(decoration_style, color, size, scale=1):
+    """
+    Retourne le calque d'une décoration, rastérisé une seule fois par combinaison.
+    
+    Args:
+        decoration_style (str): Style de décoration enregistré
+        color (tuple): Couleur RGB de la décoration
+        size (tuple): Taille (largeur, hauteur) de l'image
+        scale (float): Rapport entre cette taille et la taille réelle de l'image
+        
+    Returns:
+        list: Tuiles (boîte (x0, y0, x1, y1), calque RGBA) partagées entre les rendus
+        
+    Raises:
+        ValueError: Si le style de décoration n'est pas enregistré
+    """
+    if decoration_style not in _decorations:
+        raise ValueError(f"décoration inconnue '{decoration_style}'")
+    width, height = size
+    key = (decoration_style, tuple(color), width, height, scale)
+    return _layer_cache.get_or_create(
+        key, lambda: _build_layer(decoration_style, color, width, height, scale))
+
+def add_decorative_elements(img, decoration_style, theme, scale=1):
     """
     Ajoute des éléments décoratifs à l'image selon le style choisi.
     
+    La décoration est prise dans le cache de calques puis composée sur
+    l'image, sans être redessinée.
+    
     Args:
         img (PIL.Image): Image de base
         decoration_style (str): Style de décoration ('aucune', 'guillemets', 'cadre', 'coins', 'motif')
         theme (str): Thème de couleurs ('light', 'dark')
+        scale (float): Rapport entre la taille de img et la taille réelle de l'image (aperçu)
         
     Returns:
         PIL.Image: Image avec les décorations ajoutées
@@ -65,62 +207,35 @@ def add_decorative_elements(img, decoration_style, theme):
     # Obtenir la couleur de décoration du thème actuel
     decoration_color = config.THEMES[theme]['decoration_color']
     
-    if decoration_style == "guillemets":
-        # Guillemets dans le coin supérieur gauche
-        img = draw_decoration(img, "guillemets", decoration_color, config.PADDING, config.PADDING, 80)
-    
-    elif decoration_style == "cadre":
-        # Dessiner un cadre simple
-        draw = ImageDraw.Draw(img)
-        line_thickness = 5
-        margin = 50
-        draw.rectangle([(margin, margin), (config.IMAGE_WIDTH-margin, config.IMAGE_HEIGHT-margin)], 
-                     outline=decoration_color, width=line_thickness)
-    
-    elif decoration_style == "coins":
-        # Dessiner des décorations aux quatre coins
-        draw = ImageDraw.Draw(img)
-        corner_size = 80
-        line_width = 5
-        margin = 40
-        
-        # Coin supérieur gauche
-        draw.line([(margin, margin), (margin + corner_size, margin)], fill=decoration_color, width=line_width)
-        draw.line([(margin, margin), (margin, margin + corner_size)], fill=decoration_color, width=line_width)
-        
-        # Coin supérieur droit
-        draw.line([(config.IMAGE_WIDTH - margin, margin), (config.IMAGE_WIDTH - margin - corner_size, margin)], 
-                 fill=decoration_color, width=line_width)
-        draw.line([(config.IMAGE_WIDTH - margin, margin), (config.IMAGE_WIDTH - margin, margin + corner_size)], 
-                 fill=decoration_color, width=line_width)
-        
-        # Coin inférieur gauche
-        draw.line([(margin, config.IMAGE_HEIGHT - margin), (margin + corner_size, config.IMAGE_HEIGHT - margin)], 
-                 fill=decoration_color, width=line_width)
-        draw.line([(margin, config.IMAGE_HEIGHT - margin), (margin, config.IMAGE_HEIGHT - margin - corner_size)], 
-                 fill=decoration_color, width=line_width)
-        
-        # Coin inférieur droit
-        draw.line([(config.IMAGE_WIDTH - margin, config.IMAGE_HEIGHT - margin), 
-                  (config.IMAGE_WIDTH - margin - corner_size, config.IMAGE_HEIGHT - margin)], 
-                 fill=decoration_color, width=line_width)
-        draw.line([(config.IMAGE_WIDTH - margin, config.IMAGE_HEIGHT - margin), 
-                  (config.IMAGE_WIDTH - margin, config.IMAGE_HEIGHT - margin - corner_size)], 
-                 fill=decoration_color, width=line_width)
-    
-    elif decoration_style == "motif":
-        # Dessiner un motif répété (points)
-        draw = ImageDraw.Draw(img)
-        dot_size = 4
-        spacing = 80
-        rows = int(config.IMAGE_HEIGHT / spacing)
-        cols = int(config.IMAGE_WIDTH / spacing)
+    tiles = get_decoration_layer(decoration_style, decoration_color, img.size, scale)
+    
+    for box, layer in tiles:
+        img.paste(layer, box, layer)
+    return img
+
+def render_decorations(img, decoration_style, context):
+    """
+    Ajoute les décorations d'un rendu dans le thème et à l'échelle de son contexte.
+    
+    Args:
+        img (PIL.Image): Fond du rendu
+        decoration_style (str): Style de décoration ('guillemets', 'cadre', 'coins', 'motif')
+        context (RenderContext): Contexte du rendu
         
-        for r in range(rows):
-            for c in range(cols):
-                x = c * spacing + spacing/2
-                y = r * spacing + spacing/2
-                draw.ellipse([(x-dot_size, y-dot_size), (x+dot_size, y+dot_size)], 
-                           fill=decoration_color)
-    
-    return img 
\ No newline at end of file
+    Returns:
+        PIL.Image: Image avec les décorations ajoutées
+    """
+    return add_decorative_elements(img, decoration_style, context.theme, scale=context.scale)
+
+def get_cache_stats():
+    """
+    Retourne les compteurs du cache de calques de décoration.
+    
+    Returns:
+        dict: Statistiques du cache (entrées, octets, succès, échecs...)
+    """
+    return _layer_cache.stats()
+
+def clear_cache():
+    """Vide le cache de calques de décoration."""
+    _layer_cache.clear()
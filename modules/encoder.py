@@ -0,0 +1,251 @@
+"""
+Encodage des images selon des profils nommés (voir config.ENCODER_PROFILES).
+
+Usage :
+    python -m modules.encoder    Rapport des octets économisés par la palette
+                                 pour chaque style de fond et chaque thème
+"""
+import argparse
+import io
+import sys
+import time
+from dataclasses import dataclass
+import numpy as np
+from PIL import Image, ImageChops
+from modules import config
+
+@dataclass
+class EncodedImage:
+    """Image encodée selon un profil, avec son coût d'encodage."""
+    data: bytes
+    profile: str
+    mime: str
+    extension: str
+    encode_ms: float
+    colors: int = None          # Taille de la palette si l'image a été réduite en palette
+    max_error: int = None       # Écart maximal par canal introduit par la palette
+
+    @property
+    def size(self):
+        """Taille des données encodées en octets."""
+        return len(self.data)
+
+def get_profile(name=None):
+    """
+    Retourne la définition d'un profil d'encodage.
+
+    Args:
+        name (str): Nom du profil (config.DEFAULT_ENCODER_PROFILE si absent)
+
+    Returns:
+        dict: Format, options, type MIME et extension du profil
+
+    Raises:
+        ValueError: Si le profil est inconnu
+    """
+    name = name or config.DEFAULT_ENCODER_PROFILE
+    try:
+        return config.ENCODER_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"profil d'encodage inconnu '{name}'") from None
+
+def _palette_image(colors):
+    """Construit une image 'P' portant exactement les couleurs données."""
+    palette = Image.new('P', (1, 1))
+    palette.putpalette([channel for color in colors for channel in color])
+    return palette
+
+def _fixed_colors(sample, max_colors):
+    """
+    Couleurs reprises telles quelles dans la palette : celles des thèmes présentes
+    dans l'échantillon, puis ses couleurs les plus fréquentes.
+
+    Args:
+        sample (PIL.Image): Échantillon RGB de l'image
+        max_colors (int): Nombre maximal de couleurs retenues
+
+    Returns:
+        list: Couleurs (r, g, b) sans doublon
+    """
+    counts = sample.getcolors(sample.width * sample.height)
+    present = {color for _, color in counts}
+    themes = [color for theme in config.THEMES.values() for color in theme.values() if color in present]
+    frequent = [color for _, color in sorted(counts, reverse=True)[:config.PALETTE_EXACT_COLORS]]
+    return list(dict.fromkeys(themes + frequent))[:max_colors]
+
+def _restore_exact_colors(img, quantized, colors):
+    """
+    Associe chaque pixel dont la couleur figure dans la palette à cette couleur.
+
+    La correspondance de Pillow est approchée : un pixel peut prendre une
+    couleur voisine alors que la sienne est dans la palette.
+
+    Args:
+        img (PIL.Image): Image RGB d'origine
+        quantized (PIL.Image): Image 'P' dont la palette suit l'ordre de colors
+        colors (list): Couleurs (r, g, b) de la palette, sans doublon
+
+    Returns:
+        PIL.Image: Image 'P' corrigée
+    """
+    pixels = np.asarray(img, dtype=np.uint32)
+    keys = (pixels[..., 0] << 16) | (pixels[..., 1] << 8) | pixels[..., 2]
+    palette = np.array([(r << 16) | (g << 8) | b for r, g, b in colors], dtype=np.uint32)
+    order = np.argsort(palette)
+    position = np.searchsorted(palette[order], keys).clip(0, len(colors) - 1)
+    exact = palette[order][position] == keys
+    indices = np.array(quantized, dtype=np.uint8)
+    indices[exact] = order[position[exact]]
+    quantized.frombytes(indices.tobytes())
+    return quantized
+
+def quantize_image(img, max_colors=None, max_error=None):
+    """
+    Réduit une image RGB en palette si l'erreur introduite reste bornée.
+
+    Une image de max_colors couleurs au plus est convertie sans aucune perte.
+    Sinon la palette est choisie par couverture maximale sur l'image entière,
+    dont les pixels gardent l'association calculée par Pillow (sa recherche
+    dans une palette imposée est plus approximative), puis complétée des
+    couleurs des thèmes présentes dans l'image et de ses couleurs les plus
+    fréquentes (fonds unis, texte), que leurs pixels retrouvent exactement.
+    Il n'y a pas de tramage : si un pixel s'écarte de plus de max_error sur
+    un canal, par exemple sur les bords lissés du texte, la réduction est
+    abandonnée.
+
+    Args:
+        img (PIL.Image): Image RGB
+        max_colors (int): Nombre maximal de couleurs de la palette
+        max_error (int): Écart maximal toléré par canal (0-255)
+
+    Returns:
+        tuple: (image 'P' ou None si la réduction est refusée, écart maximal mesuré)
+    """
+    max_colors = max_colors or config.PALETTE_MAX_COLORS
+    max_error = config.PALETTE_MAX_ERROR if max_error is None else max_error
+    if img.mode != 'RGB':
+        return None, None
+
+    exact = img.getcolors(max_colors)
+    if exact is not None:
+        palette = _palette_image([color for _, color in exact])
+        return img.quantize(palette=palette, dither=Image.Dither.NONE), 0
+
+    sample = img.reduce(config.PALETTE_SAMPLE_REDUCTION) if config.PALETTE_SAMPLE_REDUCTION > 1 else img
+    fixed = _fixed_colors(sample, max_colors // 2)
+    quantized = img.quantize(max_colors - len(fixed), method=Image.Quantize.MAXCOVERAGE,
+                             dither=Image.Dither.NONE)
+    channels = quantized.getpalette()[:3 * (max_colors - len(fixed))]
+    colors = [tuple(channels[i:i + 3]) for i in range(0, len(channels), 3)]
+    known = set(colors)
+    colors += [color for color in fixed if color not in known]
+    quantized.putpalette([channel for color in colors for channel in color])
+    quantized = _restore_exact_colors(img, quantized, colors)
+
+    difference = ImageChops.difference(img, quantized.convert('RGB'))
+    error = max(high for _, high in difference.getextrema())
+    if error > max_error:
+        return None, error
+    return quantized, error
+
+def encode_image(img, profile=None):
+    """
+    Encode une image selon un profil et mesure la durée de l'encodage.
+
+    Args:
+        img (PIL.Image): Image à encoder
+        profile (str): Nom du profil d'encodage
+
+    Returns:
+        EncodedImage: Données encodées, type MIME, extension et durée en millisecondes
+                      (réduction en palette comprise)
+    """
+    name = profile or config.DEFAULT_ENCODER_PROFILE
+    spec = get_profile(name)
+    if spec['format'] == 'JPEG' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+
+    start = time.perf_counter()
+    colors = max_error = None
+    if spec.get('palette'):
+        quantized, max_error = quantize_image(img)
+        if quantized is not None:
+            img = quantized
+            colors = len(img.getpalette()) // 3
+    buffer = io.BytesIO()
+    img.save(buffer, format=spec['format'], **spec['options'])
+    encode_ms = (time.perf_counter() - start) * 1000
+    return EncodedImage(buffer.getvalue(), name, spec['mime'], spec['extension'], encode_ms,
+                        colors, max_error)
+
+def compare_profiles(img, profiles=None):
+    """
+    Encode une même image avec plusieurs profils pour comparer taille et vitesse.
+
+    Args:
+        img (PIL.Image): Image à encoder
+        profiles (list): Noms des profils (tous les profils configurés par défaut)
+
+    Returns:
+        list: Dictionnaires {profile, size, encode_ms, saved_vs_png}, du plus petit
+              au plus gros fichier ; saved_vs_png est la fraction d'octets économisée
+              par rapport au profil 'png'
+    """
+    reference = encode_image(img, 'png').size
+    report = []
+    for name in profiles or config.ENCODER_PROFILES:
+        encoded = encode_image(img, name)
+        report.append({'profile': name, 'size': encoded.size,
+                       'encode_ms': round(encoded.encode_ms, 2),
+                       'saved_vs_png': round(1 - encoded.size / reference, 3)})
+    return sorted(report, key=lambda row: row['size'])
+
+def palette_report(img):
+    """
+    Mesure le gain de la réduction en palette par rapport au PNG en couleurs réelles.
+
+    Args:
+        img (PIL.Image): Image RGB
+
+    Returns:
+        dict: Tailles PNG et palette, octets et fraction économisés, nombre de
+              couleurs et écart maximal (colors vaut None si la palette est refusée)
+    """
+    rgb = encode_image(img, 'png')
+    palette = encode_image(img, 'png_palette')
+    return {
+        'rgb_size': rgb.size,
+        'palette_size': palette.size,
+        'saved_bytes': rgb.size - palette.size,
+        'saved_ratio': round(1 - palette.size / rgb.size, 3),
+        'colors': palette.colors,
+        'max_error': palette.max_error
+    }
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande."""
+    parser = argparse.ArgumentParser(
+        prog='python -m modules.encoder',
+        description="Rapport des octets économisés par la réduction en palette.")
+    parser.add_argument('--quote', default="La seule limite à notre réalisation de demain "
+                                            "sera nos doutes d'aujourd'hui.",
+                        help="Citation utilisée pour les rendus")
+    parser.add_argument('--author', default="Franklin D. Roosevelt", help="Auteur de la citation")
+    args = parser.parse_args(argv)
+
+    from modules import generator
+    print(f"{'fond':<10} {'thème':<6} {'PNG':>8} {'palette':>8} {'gain':>6} {'couleurs':>8} {'écart':>5}")
+    for style in config.BACKGROUND_STYLES:
+        for theme in config.THEMES:
+            result = generator.render_quote(args.quote, args.author, theme=theme,
+                                            background_style=style, encode=False, use_cache=False)
+            if not result.ok:
+                print(f"{style:<10} {theme:<6} échec : {'; '.join(result.errors)}")
+                continue
+            row = palette_report(result.image)
+            print(f"{style:<10} {theme:<6} {row['rgb_size'] / 1024:>6.0f}Ko {row['palette_size'] / 1024:>6.0f}Ko "
+                  f"{row['saved_ratio']:>6.0%} {row['colors'] or '-':>8} {row['max_error']:>5}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,33 +1,127 @@
+import io
 import os
-import streamlit as st
+import threading
 from PIL import ImageFont
 from modules import config
+from modules.cache import LRUCache
+
+# Contenu brut des fichiers TTF, lu une seule fois par processus
+_font_files = {}
+_font_files_lock = threading.Lock()
+_file_loads = 0
+
+# Polices instanciées, indexées par (chemin, taille)
+_font_cache = LRUCache(max_items=config.FONT_CACHE_SIZE, name='fonts')
+
+# Fichier d'origine de chaque police chargée, indexé par (famille, style)
+_font_sources = {}
+
+def _read_font_file(font_path):
+    """
+    Retourne le contenu d'un fichier de police, lu depuis le disque au premier appel.
+    
+    Args:
+        font_path (str): Chemin vers le fichier de police
+        
+    Returns:
+        bytes: Contenu du fichier
+    """
+    global _file_loads
+    with _font_files_lock:
+        data = _font_files.get(font_path)
+        if data is None:
+            with open(font_path, 'rb') as f:
+                data = f.read()
+            _font_files[font_path] = data
+            _file_loads += 1
+        return data
+
+def _default_font():
+    """Retourne la police par défaut de Pillow, partagée par tous les appels."""
+    return _font_cache.get_or_create(('default', None), ImageFont.load_default)
+
+def _load_truetype(font_path, size):
+    """Instancie une police TrueType et retient le fichier dont elle provient."""
+    font = ImageFont.truetype(io.BytesIO(_read_font_file(font_path)), size)
+    _font_sources[(font.font.family, font.font.style)] = font_path
+    return font
 
 def get_font(font_path, requested_size):
     """
     Charge la police spécifiée ou retourne la police par défaut de Pillow si non trouvée.
     
+    Les polices sont construites depuis le contenu du fichier gardé en mémoire
+    et conservées dans un cache LRU indexé par (chemin, taille).
+    
     Args:
         font_path (str): Chemin vers le fichier de police
         requested_size (int): Taille de police demandée
         
     Returns:
-        PIL.ImageFont: La police chargée
+        tuple: (font, warning)
+            - font (PIL.ImageFont): La police chargée
+            - warning (str): Message d'avertissement si la police par défaut est utilisée, None sinon
     """
     if font_path and os.path.exists(font_path):
         try:
-            font = ImageFont.truetype(font_path, requested_size)
-            return font
+            key = (font_path, int(requested_size))
+            font = _font_cache.get_or_create(key, lambda: _load_truetype(font_path, int(requested_size)))
+            return font, None
         except Exception as e:
-            st.sidebar.warning(f"Impossible de charger {os.path.basename(font_path)}: {e}. Utilisation de la police par défaut.")
-            config.using_default_font = True
-            return ImageFont.load_default()
+            return _default_font(), f"Impossible de charger {os.path.basename(font_path)}: {e}. Utilisation de la police par défaut."
     else:
-        # N'affiche l'avertissement qu'une seule fois globalement
-        if not config.using_default_font:
-             st.sidebar.warning(f"Police '{os.path.basename(font_path)}' non trouvée. Utilisation de la police par défaut (qualité limitée).")
-             config.using_default_font = True
-        return ImageFont.load_default()
+        return _default_font(), f"Police '{os.path.basename(font_path or '')}' non trouvée. Utilisation de la police par défaut (qualité limitée)."
+
+def font_key(font):
+    """
+    Retourne une clé stable identifiant une police et sa taille.
+    
+    Args:
+        font (PIL.ImageFont): Police à identifier
+        
+    Returns:
+        tuple: (famille, style, taille) pour une police TrueType, ou une clé
+               propre à l'objet pour une police bitmap
+    """
+    if isinstance(font, ImageFont.FreeTypeFont):
+        return (font.font.family, font.font.style, font.size)
+    return ('bitmap', id(font))
+
+def resize_font(font, size):
+    """
+    Retourne la même police (même fichier, même style) à une autre taille.
+    
+    Args:
+        font (PIL.ImageFont): Police de référence
+        size (int): Taille voulue
+        
+    Returns:
+        PIL.ImageFont: Police à la taille voulue, prise dans le cache si elle a été
+                       chargée par get_font ; une police bitmap est retournée telle quelle
+    """
+    if not isinstance(font, ImageFont.FreeTypeFont) or font.size == size:
+        return font
+    font_path = _font_sources.get((font.font.family, font.font.style))
+    if font_path is None:
+        # Police chargée hors de get_font : Pillow la relit depuis son fichier
+        return font.font_variant(size=size)
+    resized, _ = get_font(font_path, size)
+    return resized
+
+def scale_font(font, scale):
+    """
+    Retourne la même police à une taille multipliée par scale.
+    
+    Args:
+        font (PIL.ImageFont): Police chargée par get_font
+        scale (float): Facteur de taille (1 pour la police elle-même)
+        
+    Returns:
+        PIL.ImageFont: Police mise à l'échelle ; une police bitmap est retournée telle quelle
+    """
+    if scale == 1 or not isinstance(font, ImageFont.FreeTypeFont):
+        return font
+    return resize_font(font, max(1, round(font.size * scale)))
 
 def load_fonts(theme='light'):
     """
@@ -37,17 +131,22 @@ def load_fonts(theme='light'):
         theme (str): Thème actuel (non utilisé actuellement mais pourrait servir pour charger des polices spécifiques par thème)
         
     Returns:
-        tuple: (quote_font, author_font, signature_font, is_default)
+        tuple: (quote_font, author_font, signature_font, is_default, warnings)
     """
+    warnings = []
+    
     # Charger les polices
-    quote_font = get_font(config.FONT_REGULAR_PATH, config.FONT_SIZES['quote'])
+    quote_font, warning = get_font(config.FONT_REGULAR_PATH, config.FONT_SIZES['quote'])
+    warnings.append(warning)
     
     # Si la police bold n'existe pas ou est identique à la régulière, utiliser la même que quote_font
     author_font_path = config.FONT_BOLD_PATH if config.FONT_BOLD_PATH != config.FONT_REGULAR_PATH else config.FONT_REGULAR_PATH
-    author_font = get_font(author_font_path, config.FONT_SIZES['author'])
+    author_font, warning = get_font(author_font_path, config.FONT_SIZES['author'])
+    warnings.append(warning)
     
     # Police pour la signature
-    signature_font = get_font(config.FONT_SIGNATURE_PATH, config.FONT_SIZES['signature'])
+    signature_font, warning = get_font(config.FONT_SIGNATURE_PATH, config.FONT_SIZES['signature'])
+    warnings.append(warning)
     
     # Vérifier si on utilise la police par défaut
     is_default = isinstance(quote_font, ImageFont.ImageFont)
@@ -59,5 +158,28 @@ def load_fonts(theme='light'):
     elif isinstance(author_font, ImageFont.ImageFont):
         # Si la police bold n'a pas été chargée correctement
         author_font = quote_font
+    
+    # Un même avertissement n'est remonté qu'une fois
+    warnings = list(dict.fromkeys(w for w in warnings if w))
         
-    return quote_font, author_font, signature_font, is_default 
\ No newline at end of file
+    return quote_font, author_font, signature_font, is_default, warnings
+
+def get_cache_stats():
+    """
+    Retourne l'état du cache de polices.
+    
+    Returns:
+        dict: Statistiques du cache LRU des polices, plus le nombre de fichiers
+              lus depuis le disque et leur taille cumulée
+    """
+    stats = _font_cache.stats()
+    with _font_files_lock:
+        stats['file_loads'] = _file_loads
+        stats['files_bytes'] = sum(len(data) for data in _font_files.values())
+    return stats
+
+def clear_cache():
+    """Vide le cache de polices et le contenu des fichiers gardé en mémoire."""
+    _font_cache.clear()
+    with _font_files_lock:
+        _font_files.clear()
@@ -1,52 +1,299 @@
-import io
-import streamlit as st
-from PIL import Image, ImageDraw
-from modules import config, font_manager, background, decorations, text_renderer
+import logging
+import time
+from dataclasses import dataclass, field
+from modules import (config, background, decorations, text_renderer, render_cache,
+                     render_context, encoder, metrics)
+from modules.cache import LRUCache, track_lookups, image_nbytes
 
-def generate_quote_image(quote, author, theme='light', background_style='gradient', 
-                        watermark=True, signature=True, decoration=None):
+logger = logging.getLogger(__name__)
+
+# Fonds déjà décorés : quand seul le texte change, ils sont simplement copiés
+_base_cache = LRUCache(max_bytes=config.BASE_LAYER_CACHE_MAX_BYTES, sizeof=image_nbytes,
+                       name='base_layers')
+
+@dataclass
+class RenderResult:
     """
-    Génère l'image stylisée et retourne ses données binaires (bytes).
-    
+    Résultat d'un rendu : l'image, ses données encodées et les messages produits.
+
+    Les avertissements n'empêchent pas le rendu (police par défaut utilisée...) ;
+    les erreurs signifient que l'image n'a pas pu être produite.
+    """
+    image: object = None            # PIL.Image
+    data: bytes = None
+    warnings: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+    used_default_font: bool = False
+    cached: bool = False            # Données lues dans le cache de rendus (image non décodée)
+    profile: str = None             # Profil d'encodage de result.data
+    mime: str = None
+    extension: str = None
+    encode_ms: float = None         # Durée de l'encodage (0 si lu dans le cache)
+    colors: int = None              # Taille de la palette si l'image a été réduite en palette
+    image_format: str = None        # Format de l'image (voir config.FORMATS)
+    metrics: object = None          # metrics.RenderMetrics : durées, caches, octets, mémoire
+
+    @property
+    def ok(self):
+        """Vrai si l'image a été produite sans erreur."""
+        return (self.image is not None or self.data is not None) and not self.errors
+
+    @property
+    def size(self):
+        """Taille des données encodées en octets, ou None."""
+        return len(self.data) if self.data is not None else None
+
+def _parse_bool(value, default=True):
+    """Interprète un booléen venant d'un CSV, d'une URL ('1', 'oui', 'true'...) ou d'un JSON."""
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'oui', 'vrai')
+
+def _string_field(fields, name):
+    """Lit un champ texte facultatif, en refusant les autres types d'un JSON (nombre, liste...)."""
+    value = fields.get(name)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise ValueError(f"le champ '{name}' doit être une chaîne")
+    return value.strip()
+
+def render_params_from_dict(fields):
+    """
+    Valide des paramètres de rendu venant de l'extérieur (manifeste, requête HTTP).
+
+    Args:
+        fields (dict): Champs quote, author, theme, background, decoration,
+                       watermark, signature, auto_fit, profile et format (tous facultatifs
+                       sauf quote)
+
+    Returns:
+        dict: Arguments nommés pour render_quote
+
+    Raises:
+        ValueError: Si un champ est absent ou invalide
+    """
+    quote = _string_field(fields, 'quote')
+    if not quote:
+        raise ValueError("citation vide")
+    theme = _string_field(fields, 'theme') or 'light'
+    if theme not in config.THEMES:
+        raise ValueError(f"thème inconnu '{theme}'")
+    background_style = _string_field(fields, 'background') or 'gradient'
+    if background_style not in config.BACKGROUND_STYLES:
+        raise ValueError(f"style de fond inconnu '{background_style}'")
+    decoration = _string_field(fields, 'decoration') or None
+    if decoration == 'aucune':
+        decoration = None
+    if decoration and decoration not in config.DECORATION_STYLES:
+        raise ValueError(f"décoration inconnue '{decoration}'")
+    profile = _string_field(fields, 'profile') or config.DEFAULT_ENCODER_PROFILE
+    if profile not in config.ENCODER_PROFILES:
+        raise ValueError(f"profil d'encodage inconnu '{profile}'")
+    image_format = _string_field(fields, 'format') or config.DEFAULT_FORMAT
+    if image_format not in config.FORMATS:
+        raise ValueError(f"format d'image inconnu '{image_format}'")
+
+    return {
+        'quote': quote,
+        'author': _string_field(fields, 'author'),
+        'theme': theme,
+        'background_style': background_style,
+        'watermark': _parse_bool(fields.get('watermark')),
+        'signature': _parse_bool(fields.get('signature')),
+        'decoration': decoration,
+        'auto_fit': _parse_bool(fields.get('auto_fit')),
+        'profile': profile,
+        'image_format': image_format
+    }
+
+def render_quote(quote, author, theme='light', background_style='gradient',
+                 watermark=True, signature=True, decoration=None, auto_fit=True, encode=True,
+                 use_cache=True, profile=None, scale=1, image_format=None):
+    """
+    Génère l'image stylisée sans aucune dépendance à l'interface.
+
     Args:
         quote (str): Texte de la citation
         author (str): Nom de l'auteur
         theme (str): Thème de couleurs ('light', 'dark')
-        background_style (str): Style de fond ('gradient', 'radial', 'uni')
+        background_style (str): Style de fond ('gradient', 'diagonal', 'radial', 'uni')
         watermark (bool): Si le watermark doit être ajouté
         signature (bool): Si la signature doit être ajoutée
         decoration (str): Style de décoration ('aucune', 'guillemets', 'cadre', 'coins', 'motif')
-        
+        auto_fit (bool): Si la taille de la citation s'adapte pour tenir dans l'image
+        encode (bool): Si l'image doit aussi être encodée dans result.data
+        use_cache (bool): Si le cache de rendus sur disque doit être consulté ; en cas
+                          de succès seul result.data est rempli (result.image vaut None)
+        profile (str): Profil d'encodage (voir config.ENCODER_PROFILES)
+        scale (float): Facteur de réduction pour un aperçu (config.PREVIEW_SCALE) ; la
+                       disposition est calculée en taille réelle puis dessinée à l'échelle
+        image_format (str): Format de l'image ('square', 'story', 'landscape'...)
+
     Returns:
-        bytes: Données binaires de l'image générée, ou None en cas d'erreur
+        RenderResult: Image, données encodées, durée d'encodage, mesures du rendu,
+                      avertissements et erreurs
     """
-    # Réinitialiser la détection de police par défaut
-    config.using_default_font = False
-    
+    result = RenderResult(profile=profile or config.DEFAULT_ENCODER_PROFILE,
+                          image_format=image_format or config.DEFAULT_FORMAT,
+                          metrics=metrics.RenderMetrics())
+    start = time.perf_counter()
+    with track_lookups(result.metrics.caches):
+        _render_stages(result, quote, author, theme, background_style, watermark, signature,
+                       decoration, auto_fit, encode, use_cache, scale)
+
+    result.metrics.total_ms = (time.perf_counter() - start) * 1000
+    result.metrics.ok = result.ok
+    result.metrics.output_bytes = result.size or 0
+    metrics.record(result.metrics, profile=result.profile, image_format=result.image_format,
+                   cached=result.cached)
+    return result
+
+def _base_key(background_style, theme, width, height, decoration, scale):
+    """Clé du cache de fonds décorés ; les couleurs du thème en font partie."""
+    colors = config.THEMES[theme]
+    return (background_style, theme, width, height, decoration, scale,
+            colors['bg_color1'], colors['bg_color2'], colors['decoration_color'])
+
+def _render_stages(result, quote, author, theme, background_style, watermark, signature,
+                   decoration, auto_fit, encode, use_cache, scale):
+    """Enchaîne les étapes du rendu en les chronométrant (voir render_quote)."""
+    stage = result.metrics.stage
+    cache = render_cache.get_render_cache() if encode and use_cache else None
+    cache_key = None
+
     try:
-        # 1. Créer le fond
-        img = background.create_background(background_style, theme)
-        
-        # 2. Ajouter les décorations
-        if decoration:
-            img = decorations.add_decorative_elements(img, decoration, theme)
-        
-        # 3. Charger les polices
-        fonts = font_manager.load_fonts(theme)
-        quote_font, author_font, signature_font, is_default = fonts
-        
-        # 4. Ajouter le texte
-        img = text_renderer.render_quote_text(
-            img, quote, author, (quote_font, author_font, signature_font), 
-            theme, add_signature=signature, add_watermark=watermark
-        )
-        
-        # 5. Convertir l'image en bytes
-        img_byte_arr = io.BytesIO()
-        img.save(img_byte_arr, format='PNG')
-        img_byte_arr = img_byte_arr.getvalue()
-        return img_byte_arr
-        
+        spec = encoder.get_profile(result.profile)
+        result.mime, result.extension = spec['mime'], spec['extension']
+        # Contexte propre à ce rendu : taille, thème, polices et avertissements
+        with stage('fonts'):
+            context = render_context.create_context(theme, result.image_format, scale)
+        result.warnings = context.warnings
+        result.used_default_font = bool(context.warnings)
+
+        if cache is not None:
+            with stage('cache_lookup'):
+                cache_key = render_cache.render_key({
+                    'quote': quote, 'author': author, 'theme': theme,
+                    'background_style': background_style, 'watermark': watermark,
+                    'signature': signature, 'decoration': decoration, 'auto_fit': auto_fit,
+                    'profile': result.profile, 'scale': scale, 'image_format': result.image_format
+                })
+                data = cache.get(cache_key)
+            result.metrics.count_lookup('renders', data is not None)
+            if data is not None:
+                result.data = data
+                result.cached = True
+                result.encode_ms = 0.0
+                return
+
+        # 1. Créer le fond et 2. ajouter les décorations, sauf si ce fond décoré
+        # est déjà en cache (le fond seul est déjà gardé par background)
+        width, height = context.canvas_size
+        base_key = _base_key(background_style, theme, width, height, decoration, scale)
+        base = _base_cache.get(base_key) if decoration else None
+        if base is not None:
+            with stage('background'):
+                img = base.copy()
+        else:
+            with stage('background'):
+                img = background.render_background(background_style, context)
+            if decoration:
+                with stage('decorations'):
+                    img = decorations.render_decorations(img, decoration, context)
+                    _base_cache.put(base_key, img.copy())
+        result.metrics.note_memory(image_nbytes(img))
+
+        # 3. Ajouter le texte
+        with stage('text'):
+            img = text_renderer.render_text(img, quote, author, context, add_signature=signature,
+                                            add_watermark=watermark, auto_fit=auto_fit)
+        result.image = img
+
+        # 4. Encoder l'image selon le profil demandé
+        if encode:
+            with stage('encode'):
+                encoded = encoder.encode_image(img, result.profile)
+            result.data = encoded.data
+            result.encode_ms = encoded.encode_ms
+            result.colors = encoded.colors
+            # La réduction en palette tient une copie de l'image à un octet par pixel
+            palette_bytes = img.width * img.height if encoded.colors else 0
+            result.metrics.note_memory(image_nbytes(img) + palette_bytes + len(encoded.data))
+
+        if cache_key is not None:
+            try:
+                with stage('cache_write'):
+                    cache.put(cache_key, result.data)
+            except OSError as e:
+                logger.warning("Écriture dans le cache de rendus impossible : %s", e)
+
     except Exception as e:
-        st.error(f"Erreur lors de la génération de l'image : {e}")
-        return None 
\ No newline at end of file
+        result.errors.append(f"Erreur lors de la génération de l'image : {e}")
+
+def render_formats(quote, author, formats=None, theme='light', **options):
+    """
+    Rend une même citation dans plusieurs formats.
+
+    Les rendus s'enchaînent dans le thread appelant : les polices et les
+    mesures des mots, mises en cache par le premier format, servent aux
+    suivants, et benchmarks/stages.py (étapes multi_format) ne montre aucun
+    gain à les répartir dans des threads.
+
+    Args:
+        quote (str): Texte de la citation
+        author (str): Nom de l'auteur
+        formats (list): Noms des formats (tous les formats de config.FORMATS par défaut)
+        theme (str): Thème de couleurs ('light', 'dark')
+        **options: Autres arguments de render_quote (background_style, decoration, profile...)
+
+    Returns:
+        dict: RenderResult par nom de format, dans l'ordre demandé
+    """
+    return {name: render_quote(quote, author, theme=theme, image_format=name, **options)
+            for name in list(formats or config.FORMATS)}
+
+def generate_quote_image(quote, author, theme='light', background_style='gradient',
+                        watermark=True, signature=True, decoration=None, auto_fit=True,
+                        profile=None):
+    """
+    Génère l'image stylisée et retourne ses données binaires (bytes).
+
+    Les rendus déjà produits avec les mêmes entrées sont relus depuis le cache
+    sur disque sans être recalculés.
+
+    Args:
+        quote (str): Texte de la citation
+        author (str): Nom de l'auteur
+        theme (str): Thème de couleurs ('light', 'dark')
+        background_style (str): Style de fond ('gradient', 'diagonal', 'radial', 'uni')
+        watermark (bool): Si le watermark doit être ajouté
+        signature (bool): Si la signature doit être ajoutée
+        decoration (str): Style de décoration ('aucune', 'guillemets', 'cadre', 'coins', 'motif')
+        auto_fit (bool): Si la taille de la citation s'adapte pour tenir dans l'image
+        profile (str): Profil d'encodage (voir config.ENCODER_PROFILES)
+
+    Returns:
+        bytes: Données binaires de l'image générée, ou None en cas d'erreur
+    """
+    result = render_quote(quote, author, theme=theme, background_style=background_style,
+                          watermark=watermark, signature=signature, decoration=decoration,
+                          auto_fit=auto_fit, profile=profile)
+    for error in result.errors:
+        logger.error(error)
+    return result.data if result.ok else None
+
+def get_cache_stats():
+    """
+    Retourne les compteurs du cache de fonds décorés.
+
+    Returns:
+        dict: Statistiques du cache (entrées, octets, succès, échecs...)
+    """
+    return _base_cache.stats()
+
+def clear_cache():
+    """Vide le cache de fonds décorés."""
+    _base_cache.clear()
@@ -0,0 +1,121 @@
+import hashlib
+import io
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from modules import config
+
+@dataclass
+class HistoryEntry:
+    """
+    Entrée d'historique : les paramètres du rendu et une miniature.
+
+    L'image en taille réelle n'est pas conservée ; elle est reconstruite à la
+    demande (et le plus souvent relue dans le cache de rendus partagé).
+    """
+    key: str
+    params: dict
+    thumbnail: bytes
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def nbytes(self):
+        """Estimation de la mémoire occupée par l'entrée, en octets."""
+        text = self.params.get('quote', '') + self.params.get('author', '')
+        return len(self.thumbnail) + len(text.encode('utf-8')) + 512
+
+def entry_key(params):
+    """
+    Calcule l'empreinte du contenu d'une entrée (paramètres de rendu).
+
+    Args:
+        params (dict): Arguments de generator.render_quote
+
+    Returns:
+        str: Empreinte SHA-256 hexadécimale
+    """
+    canonical = json.dumps(params, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def make_thumbnail(image, size=None):
+    """
+    Réduit une image en miniature compacte.
+
+    Args:
+        image (PIL.Image or bytes): Image rendue, ou ses données encodées
+        size (int): Plus grande dimension de la miniature en pixels
+
+    Returns:
+        bytes: Miniature encodée avec config.HISTORY_THUMBNAIL_PROFILE
+    """
+    # Import différé : créer un historique ne doit pas charger Pillow
+    from PIL import Image
+    from modules import encoder
+
+    if isinstance(image, (bytes, bytearray)):
+        image = Image.open(io.BytesIO(image))
+        image.draft('RGB', (size or config.HISTORY_THUMBNAIL_SIZE,) * 2)
+    thumbnail = image.convert('RGB')
+    thumbnail.thumbnail((size or config.HISTORY_THUMBNAIL_SIZE,) * 2, Image.Resampling.LANCZOS)
+    return encoder.encode_image(thumbnail, config.HISTORY_THUMBNAIL_PROFILE).data
+
+class SessionHistory:
+    """
+    Historique d'une session, borné par un budget mémoire.
+
+    Les entrées identiques (mêmes paramètres de rendu) ne sont gardées qu'une
+    fois : les ajouter à nouveau les remet en tête. Quand le budget est
+    dépassé, les entrées les plus anciennes sont supprimées.
+
+    Args:
+        max_bytes (int): Budget mémoire de l'historique en octets
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes or config.HISTORY_MAX_BYTES
+        self._entries = OrderedDict()
+        self.total_bytes = 0
+
+    def add(self, params, image):
+        """
+        Ajoute un rendu en tête de l'historique.
+
+        Args:
+            params (dict): Arguments de generator.render_quote
+            image (PIL.Image or bytes): Image rendue, ou ses données encodées
+
+        Returns:
+            HistoryEntry: Entrée ajoutée, ou entrée existante remise en tête
+        """
+        key = entry_key(params)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key, last=False)
+            return entry
+
+        entry = HistoryEntry(key, dict(params), make_thumbnail(image))
+        self._entries[key] = entry
+        self._entries.move_to_end(key, last=False)
+        self.total_bytes += entry.nbytes
+
+        # La dernière entrée ajoutée est toujours gardée, même seule au-delà du budget
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=True)
+            self.total_bytes -= evicted.nbytes
+        return entry
+
+    def get(self, key):
+        """Retourne l'entrée correspondant à une empreinte, ou None."""
+        return self._entries.get(key)
+
+    def clear(self):
+        """Vide l'historique."""
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def __iter__(self):
+        return iter(list(self._entries.values()))
+
+    def __len__(self):
+        return len(self._entries)
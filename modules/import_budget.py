@@ -0,0 +1,81 @@
+"""
+Vérifie le temps d'import du moteur de rendu.
+
+Usage :
+    python -m modules.import_budget
+    python -m modules.import_budget --module modules.generator --runs 7
+
+Chaque mesure est faite dans un interpréteur neuf. La commande échoue si la
+médiane dépasse config.IMPORT_TIME_BUDGET_MS ou si l'import a chargé Streamlit.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from modules import config
+
+# Script exécuté dans un interpréteur neuf pour mesurer un import à froid
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{'ms': elapsed, 'loaded': [name for name in {watch!r} if name in sys.modules]}}))
+"""
+
+def measure_import_time(module='modules.generator', runs=5, watch=('streamlit',)):
+    """
+    Mesure le temps d'import d'un module dans des interpréteurs neufs.
+
+    Args:
+        module (str): Nom du module à importer (ou plusieurs, séparés par des virgules)
+        runs (int): Nombre de mesures
+        watch (tuple): Modules dont on veut savoir s'ils ont été chargés par l'import
+
+    Returns:
+        dict: Médiane et minimum en millisecondes, mesures brutes, modules
+              surveillés chargés par l'import, et si Streamlit en fait partie
+    """
+    samples = []
+    loaded = set()
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', _PROBE.format(module=module, watch=tuple(watch))],
+                                capture_output=True, text=True, check=True).stdout
+        probe = json.loads(output.strip().splitlines()[-1])
+        samples.append(probe['ms'])
+        loaded.update(probe['loaded'])
+    return {
+        'module': module,
+        'median_ms': statistics.median(samples),
+        'min_ms': min(samples),
+        'samples_ms': samples,
+        'loaded': sorted(loaded),
+        'loads_streamlit': 'streamlit' in loaded
+    }
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande."""
+    parser = argparse.ArgumentParser(
+        prog='python -m modules.import_budget',
+        description="Mesure le temps d'import du moteur de rendu et le compare au budget.")
+    parser.add_argument('--module', default='modules.generator', help="Module à importer")
+    parser.add_argument('--runs', type=int, default=5, help="Nombre de mesures")
+    parser.add_argument('--budget', type=float, default=config.IMPORT_TIME_BUDGET_MS,
+                        help="Budget en millisecondes (défaut : config.IMPORT_TIME_BUDGET_MS)")
+    args = parser.parse_args(argv)
+
+    result = measure_import_time(args.module, args.runs)
+    print(f"import {result['module']} : médiane {result['median_ms']:.1f} ms, "
+          f"min {result['min_ms']:.1f} ms (budget {args.budget:.0f} ms)")
+
+    if result['loads_streamlit']:
+        print("ÉCHEC : l'import charge streamlit")
+        return 1
+    if result['median_ms'] > args.budget:
+        print("ÉCHEC : budget de temps d'import dépassé")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
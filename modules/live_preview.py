@@ -0,0 +1,210 @@
+"""
+Aperçu en direct : rendus d'aperçu planifiés session par session.
+
+Chaque session possède un PreviewScheduler. Les modifications rapprochées
+sont regroupées (anti-rebond) et seule la dernière demande compte : une
+demande remplacée avant son départ n'est jamais rendue, et le résultat d'un
+rendu devenu obsolète pendant son exécution est ignoré. Une session n'a
+jamais plus d'un rendu en cours. Toutes les sessions partagent un seul fil
+de planification et un pool de rendus borné (config.LIVE_PREVIEW_WORKERS).
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from modules import config
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class Preview:
+    """Aperçu rendu pour une demande."""
+    generation: int     # Numéro de la demande dans sa session
+    params: dict        # Arguments de generator.render_quote
+    result: object      # generator.RenderResult
+
+def render_preview(params):
+    """
+    Rend l'aperçu réduit d'une image, sans passer par le cache de rendus sur disque.
+
+    Args:
+        params (dict): Arguments de generator.render_quote
+
+    Returns:
+        RenderResult: Aperçu à l'échelle config.PREVIEW_SCALE, encodé avec config.PREVIEW_PROFILE
+    """
+    # Import différé : créer un planificateur ne doit pas charger le moteur de rendu
+    from modules import generator
+    preview_params = dict(params, profile=config.PREVIEW_PROFILE)
+    return generator.render_quote(**preview_params, scale=config.PREVIEW_SCALE, use_cache=False)
+
+class _Dispatcher:
+    """
+    Fil unique qui lance les rendus dont le délai d'anti-rebond est écoulé.
+
+    Args:
+        workers (int): Nombre de rendus simultanés
+    """
+
+    def __init__(self, workers):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='live-preview')
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def schedule(self, deadline, scheduler, generation):
+        """Prévient scheduler à l'échéance (horloge monotone) de sa demande generation."""
+        with self._condition:
+            heapq.heappush(self._heap, (deadline, next(self._counter), scheduler, generation))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='live-preview-dispatcher',
+                                                daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def submit(self, fn, *args):
+        """Exécute une fonction dans le pool de rendus."""
+        return self._executor.submit(fn, *args)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._condition.wait(timeout)
+                _, _, scheduler, generation = heapq.heappop(self._heap)
+            scheduler._due(generation)
+
+_dispatcher = None
+_lock = threading.Lock()
+
+def _get_dispatcher():
+    """Retourne le planificateur partagé par toutes les sessions du processus."""
+    global _dispatcher
+    with _lock:
+        if _dispatcher is None:
+            _dispatcher = _Dispatcher(config.LIVE_PREVIEW_WORKERS)
+        return _dispatcher
+
+class PreviewScheduler:
+    """
+    Planifie les aperçus d'une session : anti-rebond et dernière demande gagnante.
+
+    Args:
+        render (callable): Fonction de rendu appelée avec les paramètres (render_preview par défaut)
+        debounce (float): Délai en secondes sans nouvelle demande avant de lancer un rendu
+    """
+
+    def __init__(self, render=None, debounce=None):
+        self._render = render or render_preview
+        self.debounce = config.LIVE_PREVIEW_DEBOUNCE if debounce is None else debounce
+        self._condition = threading.Condition()
+        self._generation = 0        # Numéro de la dernière demande
+        self._params = None         # Paramètres de la dernière demande
+        self._ready = 0             # Dernière demande dont le délai d'anti-rebond est écoulé
+        self._running = False       # Un rendu de la session est en cours
+        self._finished = 0          # Dernière demande dont le rendu est terminé (même en échec)
+        self._latest = None         # Dernier aperçu rendu
+        self.rendered = 0           # Demandes rendues et publiées
+        self.failed = 0             # Demandes dont le rendu a échoué
+
+    def submit(self, params):
+        """
+        Demande l'aperçu de nouveaux paramètres ; les paramètres inchangés sont ignorés.
+
+        Args:
+            params (dict): Arguments de generator.render_quote
+
+        Returns:
+            int: Numéro de la demande
+        """
+        with self._condition:
+            if params == self._params:
+                return self._generation
+            self._generation += 1
+            self._params = dict(params)
+            generation = self._generation
+        _get_dispatcher().schedule(time.monotonic() + self.debounce, self, generation)
+        return generation
+
+    def _due(self, generation):
+        """Appelé quand le délai d'anti-rebond d'une demande est écoulé."""
+        with self._condition:
+            if generation != self._generation:
+                # Une demande plus récente est arrivée pendant le délai
+                return
+            self._ready = generation
+            if not self._running:
+                self._start()
+
+    def _start(self):
+        """Lance le rendu de la dernière demande (verrou tenu)."""
+        self._running = True
+        _get_dispatcher().submit(self._run, self._generation, self._params)
+
+    def _run(self, generation, params):
+        result = None
+        try:
+            result = self._render(params)
+        except Exception:
+            logger.exception("Échec du rendu d'aperçu")
+        with self._condition:
+            self._running = False
+            if generation == self._generation:
+                self._finished = generation
+                if result is not None:
+                    self._latest = Preview(generation, params, result)
+                    self.rendered += 1
+                else:
+                    self.failed += 1
+            else:
+                # La dernière demande attendait la fin de ce rendu pour partir
+                if self._ready == self._generation:
+                    self._start()
+            self._condition.notify_all()
+
+    def latest(self):
+        """
+        Retourne le dernier aperçu rendu.
+
+        Returns:
+            Preview: Aperçu le plus récent, ou None si aucun n'a encore été rendu
+        """
+        with self._condition:
+            return self._latest
+
+    @property
+    def dropped(self):
+        """Nombre de demandes remplacées avant ou pendant leur rendu."""
+        with self._condition:
+            waiting = 1 if self._finished != self._generation else 0
+            return self._generation - self.rendered - self.failed - waiting
+
+    @property
+    def pending(self):
+        """Vrai si la dernière demande n'a pas encore été rendue."""
+        with self._condition:
+            return self._finished != self._generation
+
+    def wait(self, timeout=None):
+        """
+        Attend que la dernière demande soit rendue.
+
+        Args:
+            timeout (float): Durée maximale d'attente en secondes
+
+        Returns:
+            Preview: Dernier aperçu rendu (éventuellement plus ancien si le délai expire)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._finished != self._generation:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            return self._latest
@@ -0,0 +1,252 @@
+"""
+Mesures de chaque rendu et agrégation au format Prometheus.
+
+Chaque appel à generator.render_quote produit un RenderMetrics (durée des
+étapes, consultations des caches, octets produits, mémoire d'image), joint au
+résultat, écrit dans le journal 'modules.metrics' sous forme d'une ligne JSON,
+et ajouté aux histogrammes du registre du processus (voir get_registry).
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from modules import config
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RenderMetrics:
+    """Mesures d'un rendu."""
+    stages: dict = field(default_factory=dict)   # Durée de chaque étape en millisecondes
+    caches: dict = field(default_factory=dict)   # {nom du cache: [succès, échecs]}
+    total_ms: float = 0.0
+    output_bytes: int = 0
+    peak_image_bytes: int = 0                    # Plus grande mémoire de pixels tenue par le rendu
+    ok: bool = True
+
+    @contextmanager
+    def stage(self, name):
+        """Chronomètre une étape ; les durées d'une même étape s'additionnent."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def note_memory(self, nbytes):
+        """Retient la mémoire d'image tenue à un instant du rendu, si c'est la plus grande."""
+        self.peak_image_bytes = max(self.peak_image_bytes, nbytes)
+
+    def count_lookup(self, cache, hit):
+        """Ajoute une consultation d'un cache qui n'est pas un cache LRU nommé."""
+        entry = self.caches.setdefault(cache, [0, 0])
+        entry[0 if hit else 1] += 1
+
+    @property
+    def cache_hits(self):
+        """Nombre total de consultations de caches réussies."""
+        return sum(hits for hits, _ in self.caches.values())
+
+    @property
+    def cache_misses(self):
+        """Nombre total de consultations de caches manquées."""
+        return sum(misses for _, misses in self.caches.values())
+
+    def to_dict(self):
+        """Retourne les mesures sous forme de dictionnaire sérialisable en JSON."""
+        data = asdict(self)
+        data['stages'] = {name: round(ms, 3) for name, ms in self.stages.items()}
+        data['total_ms'] = round(self.total_ms, 3)
+        data['caches'] = {name: {'hits': hits, 'misses': misses}
+                          for name, (hits, misses) in self.caches.items()}
+        return data
+
+class Histogram:
+    """
+    Histogramme cumulatif au sens de Prometheus.
+
+    Args:
+        buckets (tuple): Bornes supérieures des classes, croissantes
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Ajoute une valeur à l'histogramme."""
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels=''):
+        """Retourne les lignes d'exposition de l'histogramme."""
+        prefix = f'{labels},' if labels else ''
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else _format_number(bound)
+            lines.append(f'{name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+        suffix = f'{{{labels}}}' if labels else ''
+        lines.append(f'{name}_sum{suffix} {_format_number(self.sum)}')
+        lines.append(f'{name}_count{suffix} {self.count}')
+        return lines
+
+def _format_number(value):
+    """Formate un nombre pour l'exposition Prometheus."""
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _escape_label(value):
+    """Échappe une valeur d'étiquette Prometheus."""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+class MetricsRegistry:
+    """
+    Agrège les mesures des rendus d'un processus en compteurs et histogrammes.
+
+    Args:
+        duration_buckets (tuple): Bornes des histogrammes de durée en secondes
+        size_buckets (tuple): Bornes des histogrammes de taille en octets
+    """
+
+    def __init__(self, duration_buckets=None, size_buckets=None):
+        self.duration_buckets = duration_buckets or config.METRICS_DURATION_BUCKETS
+        self.size_buckets = size_buckets or config.METRICS_SIZE_BUCKETS
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Remet tous les compteurs et histogrammes à zéro."""
+        with self._lock:
+            self.renders = {'ok': 0, 'error': 0}
+            self.render_seconds = Histogram(self.duration_buckets)
+            self.stage_seconds = {}
+            self.output_bytes = Histogram(self.size_buckets)
+            self.peak_image_bytes = Histogram(self.size_buckets)
+            self.cache_lookups = {}
+
+    def observe(self, metrics):
+        """
+        Ajoute les mesures d'un rendu.
+
+        Args:
+            metrics (RenderMetrics): Mesures du rendu
+        """
+        with self._lock:
+            self.renders['ok' if metrics.ok else 'error'] += 1
+            self.render_seconds.observe(metrics.total_ms / 1000)
+            for name, ms in metrics.stages.items():
+                histogram = self.stage_seconds.get(name)
+                if histogram is None:
+                    histogram = self.stage_seconds[name] = Histogram(self.duration_buckets)
+                histogram.observe(ms / 1000)
+            if metrics.ok:
+                self.output_bytes.observe(metrics.output_bytes)
+                self.peak_image_bytes.observe(metrics.peak_image_bytes)
+            for name, (hits, misses) in metrics.caches.items():
+                totals = self.cache_lookups.setdefault(name, [0, 0])
+                totals[0] += hits
+                totals[1] += misses
+
+    def to_prometheus(self):
+        """
+        Exporte les mesures au format texte de Prometheus.
+
+        Returns:
+            str: Exposition au format texte 0.0.4
+        """
+        with self._lock:
+            lines = [
+                '# HELP quote_renders_total Rendus effectués, par résultat.',
+                '# TYPE quote_renders_total counter'
+            ]
+            for status, count in self.renders.items():
+                lines.append(f'quote_renders_total{{status="{status}"}} {count}')
+
+            lines += ['# HELP quote_render_duration_seconds Durée totale des rendus.',
+                      '# TYPE quote_render_duration_seconds histogram']
+            lines += self.render_seconds.lines('quote_render_duration_seconds')
+
+            lines += ['# HELP quote_render_stage_duration_seconds Durée de chaque étape des rendus.',
+                      '# TYPE quote_render_stage_duration_seconds histogram']
+            for name, histogram in sorted(self.stage_seconds.items()):
+                lines += histogram.lines('quote_render_stage_duration_seconds',
+                                         f'stage="{_escape_label(name)}"')
+
+            lines += ['# HELP quote_render_output_bytes Taille des images produites.',
+                      '# TYPE quote_render_output_bytes histogram']
+            lines += self.output_bytes.lines('quote_render_output_bytes')
+
+            lines += ['# HELP quote_render_peak_image_bytes Plus grande mémoire de pixels tenue par un rendu.',
+                      '# TYPE quote_render_peak_image_bytes histogram']
+            lines += self.peak_image_bytes.lines('quote_render_peak_image_bytes')
+
+            for kind, index in (('hits', 0), ('misses', 1)):
+                lines += [f'# HELP quote_cache_{kind}_total Consultations des caches '
+                          f'{"réussies" if index == 0 else "manquées"}, par cache.',
+                          f'# TYPE quote_cache_{kind}_total counter']
+                for name, totals in sorted(self.cache_lookups.items()):
+                    lines.append(f'quote_cache_{kind}_total{{cache="{_escape_label(name)}"}} {totals[index]}')
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        """
+        Écrit l'exposition dans un fichier, de manière atomique.
+
+        Le fichier peut être lu par le collecteur « textfile » de node_exporter.
+
+        Args:
+            path (str): Chemin du fichier .prom
+        """
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+# Type de contenu de l'exposition au format texte
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_registry = MetricsRegistry()
+
+def get_registry():
+    """
+    Retourne le registre de mesures du processus.
+
+    Returns:
+        MetricsRegistry: Registre alimenté par record
+    """
+    return _registry
+
+def record(metrics, registry=None, **context):
+    """
+    Publie les mesures d'un rendu : journal structuré puis registre.
+
+    Args:
+        metrics (RenderMetrics): Mesures du rendu
+        registry (MetricsRegistry): Registre à alimenter (celui du processus par défaut)
+        **context: Champs ajoutés à la ligne de journal (profil, format...)
+    """
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({'event': 'render', **context, **metrics.to_dict()}, ensure_ascii=False))
+    (registry or _registry).observe(metrics)
@@ -0,0 +1,771 @@
+"""
+Bibliothèque locale de citations : base SQLite indexée en texte intégral (FTS5).
+
+Usage :
+    python -m modules.quote_library import citations.json autres.csv
+    python -m modules.quote_library import --from-api
+    python -m modules.quote_library search amour --author hugo --page 2
+    python -m modules.quote_library random 5 --keywords vie
+    python -m modules.quote_library export manifeste.jsonl --author hugo --theme dark
+    python -m modules.quote_library bench --count 100000
+
+Les citations sont importées depuis des fichiers JSON (liste d'objets, dont
+le format de l'API type.fit), JSONL ou CSV, sans doublon (même texte et même
+auteur). Une table FTS5 tenue à jour par des déclencheurs indexe le texte,
+l'auteur et les étiquettes : la recherche par mots-clés ou par auteur, la
+pagination et le tirage aléatoire filtré ne parcourent jamais toute la base.
+Les résultats sont triés dans l'ordre d'import plutôt que par pertinence, dont
+le calcul coûte plus de 100 ms sur un mot fréquent dans 100 000 citations.
+L'export écrit un manifeste pour modules.batch, qui rend les citations
+trouvées en une seule fois.
+"""
+import argparse
+import csv
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from modules import config
+from modules.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotes (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL,
+    author TEXT NOT NULL,
+    tags TEXT NOT NULL DEFAULT '',
+    UNIQUE (text, author)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS quotes_fts USING fts5(
+    text, author, tags,
+    content='quotes', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='1 2 3 4'
+);
+CREATE TRIGGER IF NOT EXISTS quotes_after_insert AFTER INSERT ON quotes BEGIN
+    INSERT INTO quotes_fts (rowid, text, author, tags) VALUES (new.id, new.text, new.author, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS quotes_after_delete AFTER DELETE ON quotes BEGIN
+    INSERT INTO quotes_fts (quotes_fts, rowid, text, author, tags)
+    VALUES ('delete', old.id, old.text, old.author, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS quotes_after_update AFTER UPDATE ON quotes BEGIN
+    INSERT INTO quotes_fts (quotes_fts, rowid, text, author, tags)
+    VALUES ('delete', old.id, old.text, old.author, old.tags);
+    INSERT INTO quotes_fts (rowid, text, author, tags) VALUES (new.id, new.text, new.author, new.tags);
+END;
+"""
+
+# Version du schéma (PRAGMA user_version) : une base plus ancienne voit sa
+# table FTS5 reconstruite à l'ouverture (la version 1 indexe les préfixes d'une lettre)
+_SCHEMA_VERSION = 1
+
+# Noms de champs acceptés dans les fichiers importés, par ordre de préférence
+_TEXT_FIELDS = ('text', 'quote', 'content', 'citation', 'texte')
+_AUTHOR_FIELDS = ('author', 'auteur', 'by')
+_TAGS_FIELDS = ('tags', 'tag', 'category', 'categories', 'etiquettes')
+
+# Mots d'une requête : lettres et chiffres, comme le découpage de l'index
+_TOKEN = re.compile(r'\w+')
+_MAX_TOKENS = 8
+
+# Les préfixes plus longs que ceux de l'index (prefix='1 2 3 4') obligent FTS5
+# à fusionner en mémoire les listes de tous les mots concernés, ce qui coûte
+# plus de 10 ms sur un mot présent dans toute la base : ils sont remplacés par
+# les mots de l'index qui les prolongent, s'ils ne sont pas plus de _MAX_PREFIX_TERMS
+_MAX_INDEXED_PREFIX = 4
+_MAX_PREFIX_TERMS = 32
+
+@dataclass(frozen=True)
+class LibraryQuote:
+    """Citation de la bibliothèque."""
+    id: int
+    text: str
+    author: str
+    tags: str = ''      # Étiquettes séparées par des virgules
+
+@dataclass(frozen=True)
+class SearchPage:
+    """Page de résultats d'une recherche."""
+    quotes: tuple       # LibraryQuote de la page
+    total: int          # Nombre de résultats, plafonné à config.QUOTE_LIBRARY_COUNT_LIMIT
+    page: int           # Numéro de la page (à partir de 0)
+    per_page: int
+
+    @property
+    def total_capped(self):
+        """Vrai si le nombre de résultats dépasse le plafond de comptage."""
+        return self.total > config.QUOTE_LIBRARY_COUNT_LIMIT
+
+    @property
+    def pages(self):
+        """Nombre de pages consultables."""
+        total = min(self.total, config.QUOTE_LIBRARY_COUNT_LIMIT)
+        return max(1, -(-total // self.per_page))
+
+def _first(item, fields):
+    """Retourne la première valeur présente parmi plusieurs noms de champ."""
+    for name in fields:
+        value = item.get(name)
+        if value:
+            return value
+    return None
+
+def normalize_quote(item):
+    """
+    Extrait une citation d'un objet importé.
+
+    Args:
+        item (dict): Objet JSON ou ligne CSV ({"text": ..., "author": ...} au
+                     format type.fit ; quote, content, tags... sont aussi acceptés)
+
+    Returns:
+        tuple: (texte, auteur, étiquettes), ou None si la citation est vide
+    """
+    if not isinstance(item, dict):
+        return None
+    text = str(_first(item, _TEXT_FIELDS) or '').strip()
+    if not text:
+        return None
+    author = str(_first(item, _AUTHOR_FIELDS) or 'Inconnu').strip()
+    # L'API type.fit ajoute sa signature au nom de l'auteur
+    author = re.sub(r',\s*type\.fit$', '', author).strip() or 'Inconnu'
+    tags = _first(item, _TAGS_FIELDS) or ''
+    if isinstance(tags, (list, tuple)):
+        tags = ', '.join(str(tag).strip() for tag in tags if str(tag).strip())
+    return text, author, str(tags).strip()
+
+def read_quotes(stream, fmt):
+    """
+    Lit les citations d'un fichier au fil de l'eau.
+
+    Args:
+        stream (file): Fichier texte ouvert
+        fmt (str): 'json' (liste d'objets, ou objet avec une clé "quotes"), 'jsonl' ou 'csv'
+
+    Yields:
+        tuple: (texte, auteur, étiquettes)
+
+    Raises:
+        ValueError: Si le format est inconnu ou le fichier JSON invalide
+    """
+    if fmt == 'csv':
+        items = csv.DictReader(stream)
+    elif fmt == 'jsonl':
+        items = (json.loads(line) for line in stream if line.strip())
+    elif fmt == 'json':
+        items = json.load(stream)
+        if isinstance(items, dict):
+            items = items.get('quotes') or items.get('data') or []
+        if not isinstance(items, list):
+            raise ValueError("le fichier JSON doit contenir une liste de citations")
+    else:
+        raise ValueError(f"format d'import inconnu '{fmt}'")
+    for item in items:
+        quote = normalize_quote(item)
+        if quote is not None:
+            yield quote
+
+def format_from_name(name):
+    """Déduit le format d'import de l'extension d'un fichier ('json' par défaut)."""
+    extension = os.path.splitext(name)[1].lower().lstrip('.')
+    return extension if extension in ('csv', 'jsonl') else 'json'
+
+def _index_form(token):
+    """Retourne un mot tel que l'index le stocke : en minuscules et sans accents."""
+    decomposed = unicodedata.normalize('NFKD', token.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+def _match_expression(keywords=None, author=None, expand_prefix=None):
+    """
+    Construit une requête FTS5 sûre à partir de saisies libres.
+
+    Chaque mot est cité (les opérateurs FTS5 saisis sont pris pour du texte) et
+    le dernier mot de chaque saisie est cherché comme préfixe, pour une
+    recherche au fil de la frappe.
+
+    Args:
+        keywords (str): Mots à chercher
+        author (str): Nom (ou début de nom) de l'auteur
+        expand_prefix (callable): Retourne les mots de l'index qui prolongent un
+                                  préfixe plus long que ceux de l'index (ou None)
+
+    Returns:
+        str: Expression MATCH, ou None si aucune saisie ne contient de mot
+    """
+    def terms(value):
+        tokens = _TOKEN.findall(value or '')[:_MAX_TOKENS]
+        if not tokens:
+            return None
+        quoted = [f'"{token}"' for token in tokens[:-1]]
+        last = tokens[-1]
+        expanded = expand_prefix(last) if expand_prefix and len(last) > _MAX_INDEXED_PREFIX else None
+        if expanded:
+            quoted.append('(' + ' OR '.join(f'"{term}"' for term in expanded) + ')')
+        else:
+            quoted.append(f'"{last}"*')
+        return ' AND '.join(quoted)
+
+    parts = []
+    keyword_terms = terms(keywords)
+    if keyword_terms:
+        parts.append(keyword_terms)
+    author_terms = terms(author)
+    if author_terms:
+        parts.append(f'author : ({author_terms})')
+    return ' AND '.join(parts) or None
+
+class QuoteLibrary:
+    """
+    Bibliothèque de citations dans une base SQLite.
+
+    Chaque thread a sa propre connexion ; la base est en mode WAL, si bien que
+    les recherches ne sont pas bloquées par un import en cours.
+
+    Args:
+        path (str): Chemin de la base (config.QUOTE_LIBRARY_PATH par défaut)
+    """
+
+    def __init__(self, path=None):
+        self.path = path or config.QUOTE_LIBRARY_PATH
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._prefix_cache = LRUCache(max_items=config.QUOTE_LIBRARY_PREFIX_CACHE_SIZE, name='prefix_terms')
+
+    def _connection(self):
+        """Retourne la connexion du thread courant, en créant la base au besoin."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            with self._schema_lock:
+                if not self._schema_ready:
+                    version = connection.execute('PRAGMA user_version').fetchone()[0]
+                    if version < _SCHEMA_VERSION:
+                        connection.executescript(
+                            'DROP TABLE IF EXISTS quotes_fts;' + _SCHEMA
+                            + "INSERT INTO quotes_fts (quotes_fts) VALUES ('rebuild');"
+                            + f'PRAGMA user_version = {_SCHEMA_VERSION};')
+                    else:
+                        connection.executescript(_SCHEMA)
+                    self._schema_ready = True
+            # Vocabulaire de l'index, propre à la connexion (voir _prefix_terms)
+            connection.execute('CREATE VIRTUAL TABLE IF NOT EXISTS temp.quotes_terms '
+                               'USING fts5vocab(main, quotes_fts, row)')
+            self._local.connection = connection
+        return connection
+
+    def close(self):
+        """Ferme la connexion du thread courant."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def import_quotes(self, quotes, chunk_size=5000):
+        """
+        Ajoute des citations, en ignorant celles déjà présentes (même texte et même auteur).
+
+        Args:
+            quotes (iterable): Tuples (texte, auteur) ou (texte, auteur, étiquettes)
+            chunk_size (int): Nombre de citations insérées par transaction
+
+        Returns:
+            dict: Bilan de l'import (citations lues, ajoutées, ignorées)
+        """
+        connection = self._connection()
+        read = added = 0
+        chunk = []
+
+        def flush():
+            nonlocal added
+            with connection:
+                cursor = connection.executemany(
+                    'INSERT OR IGNORE INTO quotes (text, author, tags) VALUES (?, ?, ?)', chunk)
+                added += cursor.rowcount
+            chunk.clear()
+
+        for quote in quotes:
+            text, author, tags = (tuple(quote) + ('',))[:3]
+            chunk.append((text, author, tags or ''))
+            read += 1
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+        return {'read': read, 'added': added, 'skipped': read - added}
+
+    def import_stream(self, stream, fmt):
+        """
+        Importe les citations d'un fichier déjà ouvert.
+
+        Args:
+            stream (file): Fichier texte ouvert
+            fmt (str): 'json', 'jsonl' ou 'csv'
+
+        Returns:
+            dict: Bilan de l'import (voir import_quotes)
+
+        Raises:
+            ValueError: Si le fichier est invalide
+        """
+        try:
+            return self.import_quotes(read_quotes(stream, fmt))
+        except (json.JSONDecodeError, csv.Error, UnicodeDecodeError) as e:
+            raise ValueError(f"fichier de citations invalide : {e}") from e
+
+    def import_file(self, path, fmt=None):
+        """
+        Importe un fichier de citations JSON, JSONL ou CSV.
+
+        Args:
+            path (str): Chemin du fichier
+            fmt (str): Format du fichier (déduit de l'extension si absent)
+
+        Returns:
+            dict: Bilan de l'import (voir import_quotes)
+
+        Raises:
+            ValueError: Si le fichier est invalide
+        """
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            return self.import_stream(f, fmt or format_from_name(path))
+
+    def count(self):
+        """Retourne le nombre de citations de la bibliothèque."""
+        return self._connection().execute('SELECT count(*) FROM quotes').fetchone()[0]
+
+    def get(self, quote_id):
+        """
+        Lit une citation par son identifiant.
+
+        Returns:
+            LibraryQuote: Citation, ou None si elle n'existe pas
+        """
+        row = self._connection().execute(
+            'SELECT id, text, author, tags FROM quotes WHERE id = ?', (quote_id,)).fetchone()
+        return LibraryQuote(*row) if row else None
+
+    def _fetch(self, ids):
+        """Lit les citations de plusieurs identifiants, dans l'ordre donné."""
+        if not ids:
+            return ()
+        placeholders = ', '.join('?' * len(ids))
+        rows = self._connection().execute(
+            f'SELECT id, text, author, tags FROM quotes WHERE id IN ({placeholders})', ids).fetchall()
+        by_id = {row[0]: LibraryQuote(*row) for row in rows}
+        return tuple(by_id[quote_id] for quote_id in ids if quote_id in by_id)
+
+    def _prefix_terms(self, prefix):
+        """
+        Liste les mots de l'index qui commencent par un préfixe.
+
+        La lecture du vocabulaire parcourt les occurrences de chaque mot : le
+        résultat est gardé en mémoire tant que le plus grand identifiant ne
+        change pas, c'est-à-dire jusqu'au prochain import.
+
+        Returns:
+            tuple: Mots trouvés, ou None s'il n'y en a aucun ou plus de _MAX_PREFIX_TERMS
+        """
+        connection = self._connection()
+        start = _index_form(prefix)
+        end = start[:-1] + chr(ord(start[-1]) + 1)
+        last_id = connection.execute('SELECT max(id) FROM quotes').fetchone()[0]
+
+        def read_terms():
+            rows = connection.execute(
+                'SELECT term FROM temp.quotes_terms WHERE term >= ? AND term < ? LIMIT ?',
+                (start, end, _MAX_PREFIX_TERMS + 1)).fetchall()
+            if not rows or len(rows) > _MAX_PREFIX_TERMS:
+                return None
+            return tuple(row[0] for row in rows)
+
+        return self._prefix_cache.get_or_create((start, last_id), read_terms)
+
+    def _match(self, keywords, author):
+        """Construit l'expression MATCH d'une recherche (voir _match_expression)."""
+        return _match_expression(keywords, author, self._prefix_terms)
+
+    def _count_matches(self, match, limit):
+        """Compte les résultats d'une requête, sans dépasser limit."""
+        if match is None:
+            query, args = 'SELECT id FROM quotes LIMIT ?', (limit,)
+        else:
+            query, args = 'SELECT rowid FROM quotes_fts WHERE quotes_fts MATCH ? LIMIT ?', (match, limit)
+        return self._connection().execute(f'SELECT count(*) FROM ({query})', args).fetchone()[0]
+
+    def _match_ids(self, match, limit, offset=0):
+        """Retourne les identifiants d'une tranche des résultats d'une requête, dans l'ordre d'import."""
+        if match is None:
+            rows = self._connection().execute(
+                'SELECT id FROM quotes ORDER BY id LIMIT ? OFFSET ?', (limit, offset))
+        else:
+            rows = self._connection().execute(
+                'SELECT rowid FROM quotes_fts WHERE quotes_fts MATCH ? ORDER BY rowid LIMIT ? OFFSET ?',
+                (match, limit, offset))
+        return [row[0] for row in rows]
+
+    def search(self, keywords=None, author=None, page=0, per_page=None):
+        """
+        Cherche des citations par mots-clés et/ou par auteur.
+
+        Les mots-clés portent sur le texte, l'auteur et les étiquettes ; le
+        filtre d'auteur porte sur le nom seul. Majuscules et accents sont
+        ignorés et le dernier mot saisi est cherché comme préfixe. Sans
+        saisie, toutes les citations sont parcourues. Le comptage s'arrête à
+        config.QUOTE_LIBRARY_COUNT_LIMIT résultats, au-delà desquels les
+        pages ne sont plus consultables.
+
+        Args:
+            keywords (str): Mots à chercher
+            author (str): Nom (ou début de nom) de l'auteur
+            page (int): Numéro de la page (à partir de 0)
+            per_page (int): Résultats par page (config.QUOTE_LIBRARY_PAGE_SIZE par défaut)
+
+        Returns:
+            SearchPage: Résultats de la page, dans l'ordre d'import
+        """
+        per_page = per_page or config.QUOTE_LIBRARY_PAGE_SIZE
+        limit = config.QUOTE_LIBRARY_COUNT_LIMIT
+        match = self._match(keywords, author)
+        # Un résultat de plus que le plafond indique que le nombre est plafonné
+        total = self._count_matches(match, limit + 1)
+        page = max(0, min(page, -(-min(total, limit) // per_page) - 1))
+        ids = self._match_ids(match, per_page, page * per_page)
+        return SearchPage(self._fetch(ids), total, page, per_page)
+
+    def sample(self, count=1, keywords=None, author=None, rng=None):
+        """
+        Tire des citations au hasard, éventuellement parmi les résultats d'une recherche.
+
+        Chaque résultat a la même probabilité d'être tiré. Quand les
+        résultats sont peu nombreux, le tirage se fait parmi leurs
+        identifiants ; sinon, chaque essai tire un identifiant entre le plus
+        petit et le plus grand de la base et une seule requête lit le premier
+        résultat qui le suit. Ce résultat est gardé avec une probabilité
+        inverse de l'écart qui le sépare du résultat précédent (le nombre
+        d'identifiants qui y mènent), ce qui évite de lire tous les résultats.
+
+        Args:
+            count (int): Nombre de citations à tirer
+            keywords (str): Mots à chercher (voir search)
+            author (str): Nom (ou début de nom) de l'auteur
+            rng (random.Random): Générateur aléatoire (celui du module par défaut)
+
+        Returns:
+            tuple: LibraryQuote tirées, sans doublon (moins de count si les résultats manquent)
+        """
+        rng = rng or random
+        match = self._match(keywords, author)
+        limit = config.QUOTE_LIBRARY_COUNT_LIMIT
+        total = self._count_matches(match, limit + 1) if match is not None else None
+        if total is not None and total <= limit:
+            ids = self._match_ids(match, total)
+            return self._fetch(rng.sample(ids, min(count, len(ids))))
+
+        connection = self._connection()
+        # Deux requêtes : min() et max() réunis ne profitent plus de la clé primaire
+        low = connection.execute('SELECT min(id) FROM quotes').fetchone()[0]
+        high = connection.execute('SELECT max(id) FROM quotes').fetchone()[0]
+        if low is None:
+            return ()
+        # Un écart tiré au hasard, span, est comparé à celui du résultat trouvé :
+        # le résultat est gardé s'il en existe un autre entre found - span et
+        # l'identifiant tiré (l'écart est alors inférieur à span), ce qui arrive
+        # avec une probabilité inverse de l'écart. Les requêtes ne parcourent les
+        # résultats que dans l'ordre croissant, bien plus rapide avec FTS5, et
+        # span est arrondi à l'entier supérieur (même résultat, les identifiants
+        # étant entiers), car FTS5 parcourt tout l'index sur une borne réelle.
+        if match is None:
+            query = ('SELECT found.id, EXISTS (SELECT 1 FROM quotes WHERE id > found.id - :span AND id < :id) '
+                     'FROM (SELECT id FROM quotes WHERE id >= :id ORDER BY id LIMIT 1) AS found')
+        else:
+            query = ('SELECT found.id, EXISTS (SELECT 1 FROM quotes_fts WHERE quotes_fts MATCH :match '
+                     'AND rowid > found.id - :span AND rowid < :id) '
+                     'FROM (SELECT rowid AS id FROM quotes_fts WHERE quotes_fts MATCH :match AND rowid >= :id '
+                     'ORDER BY rowid LIMIT 1) AS found')
+        # Plus de limit résultats : un tirage sur (high - low) / limit en moyenne est gardé
+        attempts = count * ((high - low) // limit + 1) * 20
+        chosen = {}
+        while len(chosen) < count and attempts:
+            attempts -= 1
+            span = math.ceil(1 / (1 - rng.random()))
+            row = connection.execute(query, {'match': match, 'id': rng.randint(low, high), 'span': span}).fetchone()
+            if row is None or row[0] in chosen:
+                continue
+            found, previous_in_span = row
+            # Sans résultat précédent, l'écart est compté depuis le plus petit identifiant
+            if previous_in_span or found - span < low - 1:
+                chosen[found] = None
+        return self._fetch(list(chosen))
+
+    def iter_matches(self, keywords=None, author=None, batch_size=1000):
+        """
+        Parcourt tous les résultats d'une recherche, par lots.
+
+        Yields:
+            LibraryQuote: Citations dans l'ordre d'import
+        """
+        match = self._match(keywords, author)
+        last_id = 0
+        connection = self._connection()
+        while True:
+            if match is None:
+                ids = [row[0] for row in connection.execute(
+                    'SELECT id FROM quotes WHERE id > ? ORDER BY id LIMIT ?', (last_id, batch_size))]
+            else:
+                ids = [row[0] for row in connection.execute(
+                    'SELECT rowid FROM quotes_fts WHERE quotes_fts MATCH ? AND rowid > ? '
+                    'ORDER BY rowid LIMIT ?', (match, last_id, batch_size))]
+            if not ids:
+                return
+            yield from self._fetch(ids)
+            last_id = ids[-1]
+
+def write_manifest(quotes, stream, **options):
+    """
+    Écrit un manifeste JSONL pour modules.batch, une ligne par citation.
+
+    Args:
+        quotes (iterable): LibraryQuote à rendre
+        stream (file): Fichier texte ouvert en écriture
+        **options: Champs ajoutés à chaque ligne (theme, background, decoration...)
+
+    Returns:
+        int: Nombre de lignes écrites
+    """
+    written = 0
+    for quote in quotes:
+        stream.write(json.dumps({'quote': quote.text, 'author': quote.author, **options},
+                                ensure_ascii=False) + '\n')
+        written += 1
+    return written
+
+_default_library = None
+_default_library_lock = threading.Lock()
+
+def get_quote_library():
+    """
+    Retourne la bibliothèque de citations partagée par le processus.
+
+    Returns:
+        QuoteLibrary: Bibliothèque stockée dans config.QUOTE_LIBRARY_PATH
+    """
+    global _default_library
+    with _default_library_lock:
+        if _default_library is None:
+            _default_library = QuoteLibrary()
+        return _default_library
+
+# --- Mesure des temps de requête ---
+_SYLLABLES = ('ma', 'ri', 'lo', 'pe', 'tu', 'sa', 'ne', 'vi', 'co', 'da', 'ge', 'bu', 'fo', 'la',
+              'mi', 'ro', 'te', 'che', 'an', 'on', 'ur', 'is', 'el', 'ou')
+# Auteur de la moitié des citations factices, comme les citations anonymes d'un vrai corpus
+_COMMON_AUTHOR = 'Anonyme'
+
+def _synthetic_quotes(count, seed=0):
+    """
+    Génère des citations factices dont la fréquence des mots suit une loi de Zipf,
+    comme dans un vrai corpus : quelques mots très fréquents et courts (« de »,
+    « la »...), beaucoup de mots rares et plus longs. La moitié des citations
+    sont de _COMMON_AUTHOR.
+    """
+    rng = random.Random(seed)
+    words = sorted({''.join(rng.choices(_SYLLABLES, k=rng.randint(1, 4))) for _ in range(30000)})
+    rng.shuffle(words)
+    words.sort(key=len)
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    authors = [f"{''.join(rng.choices(_SYLLABLES, k=2)).capitalize()} "
+               f"{''.join(rng.choices(_SYLLABLES, k=3)).capitalize()}" for _ in range(3000)]
+    for _ in range(count):
+        text = ' '.join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(6, 30))).capitalize() + '.'
+        author = _COMMON_AUTHOR if rng.random() < 0.5 else rng.choice(authors)
+        yield text, author, rng.choice(('vie', 'amour', 'travail', 'sagesse', ''))
+
+def _vocabulary_extremes(library):
+    """
+    Retourne trois mots du texte : le plus fréquent de l'index, celui qui est
+    présent dans la moitié des citations environ et un mot présent dans peu de citations.
+    """
+    connection = library._connection()
+    connection.execute('CREATE VIRTUAL TABLE IF NOT EXISTS temp.quotes_vocabulary '
+                       'USING fts5vocab(main, quotes_fts, col)')
+    frequent = connection.execute(
+        "SELECT term FROM quotes_vocabulary WHERE col = 'text' ORDER BY doc DESC LIMIT 1").fetchone()[0]
+    dense = connection.execute(
+        "SELECT term FROM quotes_vocabulary WHERE col = 'text' ORDER BY abs(doc - ?) LIMIT 1",
+        (library.count() // 2,)).fetchone()[0]
+    rare = connection.execute(
+        "SELECT term FROM quotes_vocabulary WHERE col = 'text' AND doc BETWEEN 20 AND 100 "
+        "ORDER BY doc LIMIT 1").fetchone()
+    return frequent, dense, rare[0] if rare else frequent
+
+def _percentile(values, fraction):
+    """Retourne le percentile d'une liste de durées."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run_benchmark(count=100000, rounds=50, seed=0, stream=sys.stdout):
+    """
+    Mesure les temps de requête sur une bibliothèque factice.
+
+    Args:
+        count (int): Nombre de citations de la bibliothèque
+        rounds (int): Nombre de mesures par requête
+        seed (int): Graine des citations et des requêtes
+        stream (file): Flux où écrire les résultats
+
+    Returns:
+        dict: Pire 95e percentile en millisecondes de chaque requête
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        library = QuoteLibrary(os.path.join(directory, 'bench.db'))
+        start = time.perf_counter()
+        summary = library.import_quotes(_synthetic_quotes(count, seed))
+        stream.write(f"{summary['added']} citations importées en {time.perf_counter() - start:.1f} s\n")
+
+        rng = random.Random(seed)
+        frequent, dense, rare = _vocabulary_extremes(library)
+        # Un auteur d'une trentaine de citations, autre que _COMMON_AUTHOR
+        author = next(quote.author for quote in library.iter_matches()
+                      if quote.id >= count // 2 and quote.author != _COMMON_AUTHOR)
+        queries = {
+            'recherche (mot fréquent)': lambda: library.search(frequent),
+            'recherche (mot dans une citation sur 2)': lambda: library.search(dense),
+            'recherche (mot rare)': lambda: library.search(rare),
+            'recherche (préfixe de 2 lettres)': lambda: library.search(frequent[:2]),
+            'recherche (auteur)': lambda: library.search(author=author.split()[-1]),
+            "recherche (initiale d'auteur)": lambda: library.search(author=author[0]),
+            'recherche (auteur fréquent, préfixe)': lambda: library.search(author=_COMMON_AUTHOR[:-1]),
+            'recherche (mot et auteur)': lambda: library.search(frequent, author=author),
+            'page profonde (mot fréquent)': lambda: library.search(frequent, page=rng.randrange(400)),
+            'parcours sans filtre': lambda: library.search(page=rng.randrange(count // 10)),
+            'tirage (sans filtre)': lambda: library.sample(5, rng=rng),
+            'tirage (mot fréquent)': lambda: library.sample(5, frequent, rng=rng),
+            'tirage (mot dans une citation sur 2)': lambda: library.sample(5, dense, rng=rng),
+            'tirage (auteur)': lambda: library.sample(5, author=author, rng=rng),
+            'tirage (auteur fréquent)': lambda: library.sample(5, author=_COMMON_AUTHOR, rng=rng),
+        }
+        results = {}
+        for name, query in queries.items():
+            durations = []
+            for _ in range(rounds):
+                start = time.perf_counter()
+                query()
+                durations.append((time.perf_counter() - start) * 1000)
+            results[name] = _percentile(durations, 0.95)
+            stream.write(f"{name:<40} p50 {_percentile(durations, 0.5):6.2f} ms   "
+                         f"p95 {results[name]:6.2f} ms\n")
+        library.close()
+    return results
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande."""
+    parser = argparse.ArgumentParser(
+        prog='python -m modules.quote_library',
+        description="Importe, cherche et tire des citations dans la bibliothèque locale.")
+    parser.add_argument('--db', default=None,
+                        help=f"Chemin de la base (défaut : {config.QUOTE_LIBRARY_PATH})")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help="Importe des fichiers JSON, JSONL ou CSV")
+    import_parser.add_argument('files', nargs='*', help="Fichiers à importer")
+    import_parser.add_argument('--from-api', action='store_true',
+                               help="Importe le corpus de l'API type.fit (voir modules.quote_store)")
+
+    for name, help_text in (('search', "Cherche des citations"), ('random', "Tire des citations au hasard"),
+                            ('export', "Écrit un manifeste pour modules.batch")):
+        command = commands.add_parser(name, help=help_text)
+        if name == 'search':
+            command.add_argument('keywords', nargs='?', default='', help="Mots à chercher")
+            command.add_argument('--page', type=int, default=1, help="Numéro de la page (à partir de 1)")
+        elif name == 'random':
+            command.add_argument('count', nargs='?', type=int, default=1, help="Nombre de citations")
+            command.add_argument('--keywords', default='', help="Mots à chercher")
+        else:
+            command.add_argument('manifest', help="Manifeste .jsonl à écrire")
+            command.add_argument('--keywords', default='', help="Mots à chercher")
+            command.add_argument('--theme', choices=list(config.THEMES), default=None)
+            command.add_argument('--background', choices=config.BACKGROUND_STYLES, default=None)
+        command.add_argument('--author', default='', help="Nom (ou début de nom) de l'auteur")
+
+    bench_parser = commands.add_parser('bench', help="Mesure les temps de requête sur une base factice")
+    bench_parser.add_argument('--count', type=int, default=100000, help="Nombre de citations")
+    bench_parser.add_argument('--rounds', type=int, default=50, help="Mesures par requête")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    if args.command == 'bench':
+        results = run_benchmark(args.count, args.rounds)
+        slow = {name: ms for name, ms in results.items() if ms > config.QUOTE_LIBRARY_TARGET_MS}
+        if slow:
+            logger.error("%d requête(s) au-delà de %d ms : %s", len(slow),
+                         config.QUOTE_LIBRARY_TARGET_MS, ', '.join(slow))
+            return 1
+        logger.info("Toutes les requêtes sous %d ms (95e percentile)", config.QUOTE_LIBRARY_TARGET_MS)
+        return 0
+
+    library = QuoteLibrary(args.db)
+    if args.command == 'import':
+        if not args.files and not args.from_api:
+            parser.error("indiquez des fichiers à importer ou --from-api")
+        failed = 0
+        if args.from_api:
+            from modules import quote_store
+            store = quote_store.get_quote_store()
+            # Un échec est journalisé par le corpus, qui reste utilisable hors ligne
+            store.refresh()
+            summary = library.import_quotes(
+                normalize_quote({'text': text, 'author': author})
+                for text, author in (store.get(i) for i in range(len(store))))
+            logger.info("API type.fit : %d citations ajoutées, %d déjà présentes",
+                        summary['added'], summary['skipped'])
+        for path in args.files:
+            try:
+                summary = library.import_file(path)
+                logger.info("%s : %d citations ajoutées, %d déjà présentes",
+                            path, summary['added'], summary['skipped'])
+            except (OSError, ValueError) as e:
+                failed += 1
+                logger.error("%s ignoré : %s", path, e)
+        logger.info("La bibliothèque contient %d citations", library.count())
+        return 1 if failed else 0
+
+    if args.command == 'search':
+        result = library.search(args.keywords, args.author, page=max(0, args.page - 1))
+        quotes = result.quotes
+        more = '+' if result.total_capped else ''
+        print(f"{min(result.total, config.QUOTE_LIBRARY_COUNT_LIMIT)}{more} résultat(s), "
+              f"page {result.page + 1}/{result.pages}")
+    elif args.command == 'random':
+        quotes = library.sample(args.count, args.keywords, args.author)
+    else:
+        options = {name: value for name, value in
+                   (('theme', args.theme), ('background', args.background)) if value}
+        with open(args.manifest, 'w', encoding='utf-8') as f:
+            written = write_manifest(library.iter_matches(args.keywords, args.author), f, **options)
+        logger.info("%d citations écrites dans %s (rendu : python -m modules.batch %s)",
+                    written, args.manifest, args.manifest)
+        return 0
+    for quote in quotes:
+        print(f"[{quote.id}] « {quote.text} » — {quote.author}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
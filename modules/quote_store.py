@@ -0,0 +1,267 @@
+import json
+import logging
+import mmap
+import os
+import random
+import struct
+import tempfile
+import threading
+import time
+from modules import config
+
+logger = logging.getLogger(__name__)
+
+# Format du fichier de citations :
+#   en-tête   : b'QTS1' puis le nombre de citations (uint32)
+#   index     : nombre + 1 décalages (uint32) vers le début de chaque citation
+#   données   : citations UTF-8 "texte\x1fauteur" mises bout à bout
+_MAGIC = b'QTS1'
+_HEADER = struct.Struct('<4sI')
+_OFFSET = struct.Struct('<I')
+_SEPARATOR = '\x1f'
+
+def requests_fetch(url, headers, timeout):
+    """
+    Effectue une requête GET avec requests.
+
+    Args:
+        url (str): Adresse à interroger
+        headers (dict): En-têtes de la requête (requêtes conditionnelles)
+        timeout (float): Délai maximal en secondes
+
+    Returns:
+        tuple: (code HTTP, en-têtes de la réponse, corps en bytes)
+    """
+    import requests
+    response = requests.get(url, headers=headers, timeout=timeout)
+    return response.status_code, dict(response.headers), response.content
+
+def parse_quotes(payload):
+    """
+    Extrait les citations d'une réponse au format type.fit.
+
+    Args:
+        payload (bytes): Liste JSON d'objets {"text": ..., "author": ...}
+
+    Returns:
+        list: Paires (texte, auteur), sans les citations vides
+    """
+    quotes = []
+    for item in json.loads(payload):
+        if not isinstance(item, dict):
+            continue
+        text = (item.get('text') or '').strip()
+        if text:
+            quotes.append((text, (item.get('author') or 'Inconnu').strip()))
+    return quotes
+
+def write_snapshot(path, quotes):
+    """
+    Écrit les citations dans le format compact, de manière atomique.
+
+    Args:
+        path (str): Chemin du fichier de citations
+        quotes (list): Paires (texte, auteur)
+    """
+    records = [f"{text}{_SEPARATOR}{author}".encode('utf-8') for text, author in quotes]
+    offsets = [0]
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, len(records)))
+            f.write(struct.pack(f'<{len(offsets)}I', *offsets))
+            for record in records:
+                f.write(record)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class QuoteStore:
+    """
+    Corpus local de citations, rafraîchi depuis l'API selon une durée de validité.
+
+    Les citations sont gardées sur disque dans un fichier indexé et projeté
+    en mémoire : un tirage aléatoire lit une seule citation sans analyser le
+    reste du fichier. Le rafraîchissement utilise des requêtes conditionnelles
+    (ETag / If-Modified-Since) et, en cas d'échec réseau, la dernière copie
+    reste utilisable hors ligne.
+
+    Args:
+        directory (str): Dossier où stocker le corpus
+        url (str): Adresse de l'API de citations
+        ttl (float): Durée de validité du corpus en secondes
+        fetch (callable): Fonction fetch(url, headers, timeout) -> (code, en-têtes, corps)
+        timeout (float): Délai maximal d'une requête en secondes
+    """
+
+    def __init__(self, directory=None, url=None, ttl=None, fetch=None, timeout=None):
+        self.directory = directory or config.QUOTE_STORE_DIR
+        self.url = url or config.QUOTES_API_URL
+        self.ttl = config.QUOTE_STORE_TTL if ttl is None else ttl
+        self.fetch = fetch or requests_fetch
+        self.timeout = config.QUOTES_API_TIMEOUT if timeout is None else timeout
+        self.data_path = os.path.join(self.directory, 'quotes.bin')
+        self.meta_path = os.path.join(self.directory, 'quotes.meta.json')
+        self._lock = threading.Lock()
+        self._map = None
+        self._map_stat = None
+        self._count = 0
+
+    def _read_meta(self):
+        """Lit les métadonnées du corpus (ETag, date de récupération...)."""
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, meta):
+        """Écrit les métadonnées du corpus de manière atomique."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def is_stale(self):
+        """Vrai si le corpus est absent, provient d'une autre URL ou a dépassé sa durée de validité."""
+        meta = self._read_meta()
+        if not os.path.exists(self.data_path) or meta.get('url') != self.url:
+            return True
+        return time.time() - meta.get('fetched_at', 0) > self.ttl
+
+    def refresh(self, force=False):
+        """
+        Met à jour le corpus depuis l'API si nécessaire.
+
+        Args:
+            force (bool): Interroger l'API même si le corpus est encore valide
+
+        Returns:
+            str: Message d'erreur si la mise à jour a échoué, None sinon
+        """
+        if not force and not self.is_stale():
+            return None
+
+        meta = self._read_meta()
+        headers = {}
+        if meta.get('url') == self.url and os.path.exists(self.data_path):
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        try:
+            status, response_headers, body = self.fetch(self.url, headers, self.timeout)
+            response_headers = {name.lower(): value for name, value in response_headers.items()}
+            if status == 304:
+                meta['fetched_at'] = time.time()
+                self._write_meta(meta)
+                return None
+            if status != 200:
+                raise ValueError(f"réponse HTTP {status}")
+            quotes = parse_quotes(body)
+            if not quotes:
+                raise ValueError("aucune citation reçue")
+            with self._lock:
+                # Le fichier projeté doit être libéré avant d'être remplacé
+                self._close_map()
+                write_snapshot(self.data_path, quotes)
+            self._write_meta({
+                'url': self.url,
+                'etag': response_headers.get('etag'),
+                'last_modified': response_headers.get('last-modified'),
+                'fetched_at': time.time(),
+                'count': len(quotes)
+            })
+            return None
+        except Exception as e:
+            logger.warning("Mise à jour du corpus de citations impossible : %s", e)
+            return f"Erreur lors de la récupération des citations: {e}"
+
+    def _ensure_mapped(self):
+        """Projette le fichier de citations en mémoire, ou le reprojette s'il a été remplacé."""
+        try:
+            stat = os.stat(self.data_path)
+        except OSError:
+            self._close_map()
+            return False
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if self._map is not None and self._map_stat == signature:
+            return True
+
+        self._close_map()
+        with open(self.data_path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = _HEADER.unpack_from(mapped, 0)
+        if magic != _MAGIC:
+            mapped.close()
+            raise ValueError("fichier de citations invalide")
+        self._map, self._map_stat, self._count = mapped, signature, count
+        return True
+
+    def _close_map(self):
+        """Libère la projection en mémoire du fichier de citations."""
+        if self._map is not None:
+            self._map.close()
+        self._map, self._map_stat, self._count = None, None, 0
+
+    def __len__(self):
+        with self._lock:
+            return self._count if self._ensure_mapped() else 0
+
+    def get(self, index):
+        """
+        Lit une citation par sa position dans le corpus.
+
+        Args:
+            index (int): Position de la citation
+
+        Returns:
+            tuple: (texte, auteur)
+        """
+        with self._lock:
+            if not self._ensure_mapped() or not 0 <= index < self._count:
+                raise IndexError(index)
+            data_start = _HEADER.size + _OFFSET.size * (self._count + 1)
+            start, end = struct.unpack_from('<2I', self._map, _HEADER.size + _OFFSET.size * index)
+            record = self._map[data_start + start:data_start + end].decode('utf-8')
+        text, _, author = record.partition(_SEPARATOR)
+        return text, author
+
+    def random_quote(self):
+        """
+        Tire une citation au hasard, en lisant uniquement cette citation.
+
+        Returns:
+            tuple: (texte, auteur), ou None si le corpus est vide
+        """
+        count = len(self)
+        if not count:
+            return None
+        return self.get(random.randrange(count))
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+def get_quote_store():
+    """
+    Retourne le corpus de citations partagé par le processus.
+
+    Returns:
+        QuoteStore: Corpus configuré par config.QUOTE_STORE_DIR et config.QUOTES_API_URL
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = QuoteStore()
+        return _default_store
@@ -0,0 +1,249 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from modules import config
+
+# À incrémenter quand le code de rendu change le résultat à paramètres égaux
+RENDER_CACHE_VERSION = 3
+
+# Extension des entrées : les données peuvent être en PNG, WebP ou JPEG
+_ENTRY_SUFFIX = '.img'
+
+# Empreintes des fichiers de police, indexées par (chemin, date de modification, taille)
+_font_hashes = {}
+_lock = threading.Lock()
+
+def _font_fingerprint(font_path):
+    """
+    Retourne l'empreinte SHA-256 d'un fichier de police, ou None s'il est absent.
+
+    Args:
+        font_path (str): Chemin vers le fichier de police
+
+    Returns:
+        str: Empreinte hexadécimale du contenu
+    """
+    try:
+        stat = os.stat(font_path)
+    except OSError:
+        return None
+    key = (font_path, stat.st_mtime_ns, stat.st_size)
+    digest = _font_hashes.get(key)
+    if digest is None:
+        with open(font_path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        _font_hashes[key] = digest
+    return digest
+
+def _config_fingerprint(profile=None):
+    """
+    Retourne les valeurs de configuration qui influencent l'image produite.
+
+    Args:
+        profile (str): Profil d'encodage du rendu (config.DEFAULT_ENCODER_PROFILE si absent)
+
+    Returns:
+        dict: Valeurs de configuration, définition du profil et réglages de la palette compris
+    """
+    return {
+        'formats': config.FORMATS,
+        'padding': config.PADDING,
+        'themes': config.THEMES,
+        'font_sizes': config.FONT_SIZES,
+        'quote_font_size_min': config.QUOTE_FONT_SIZE_MIN,
+        'auto_fit_max_corrections': config.AUTO_FIT_MAX_CORRECTIONS,
+        'signature': config.DEFAULT_SIGNATURE,
+        'watermark': config.DEFAULT_WATERMARK,
+        'encoder_profile': config.ENCODER_PROFILES.get(profile or config.DEFAULT_ENCODER_PROFILE),
+        'palette': {'max_colors': config.PALETTE_MAX_COLORS, 'max_error': config.PALETTE_MAX_ERROR,
+                    'sample_reduction': config.PALETTE_SAMPLE_REDUCTION,
+                    'exact_colors': config.PALETTE_EXACT_COLORS},
+        'fonts': {path: _font_fingerprint(path) for path in
+                  (config.FONT_REGULAR_PATH, config.FONT_BOLD_PATH, config.FONT_SIGNATURE_PATH)}
+    }
+
+def render_key(params):
+    """
+    Calcule la clé de cache d'un rendu à partir de toutes ses entrées.
+
+    Args:
+        params (dict): Paramètres de rendu (arguments de generator.render_quote,
+                       profil d'encodage compris)
+
+    Returns:
+        str: Empreinte SHA-256 hexadécimale
+    """
+    payload = {
+        'version': RENDER_CACHE_VERSION,
+        'params': params,
+        'config': _config_fingerprint(params.get('profile'))
+    }
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=list)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class RenderCache:
+    """
+    Cache sur disque des images rendues, adressé par le contenu de leurs entrées.
+
+    Les écritures sont atomiques (fichier temporaire puis renommage), ce qui
+    permet à plusieurs processus de partager le même dossier. Quand la taille
+    totale dépasse max_bytes, les entrées les moins récemment lues sont supprimées.
+
+    Args:
+        directory (str): Dossier du cache
+        max_bytes (int): Taille totale maximale des entrées
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._total_bytes = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key):
+        """Chemin du fichier d'une entrée, réparti en sous-dossiers par préfixe."""
+        return os.path.join(self.directory, key[:2], key + _ENTRY_SUFFIX)
+
+    def get(self, key):
+        """
+        Retourne les données stockées pour une clé, ou None.
+
+        Args:
+            key (str): Clé calculée par render_key
+
+        Returns:
+            bytes: Données de l'image, ou None si absente
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        try:
+            # La date de modification sert d'horodatage d'accès pour l'éviction
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """
+        Stocke les données d'une image de manière atomique.
+
+        Args:
+            key (str): Clé calculée par render_key
+            data (bytes): Données de l'image
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += len(data) - previous_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """Liste les entrées du cache : (date d'accès, taille, chemin)."""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                # Les entrées .png des versions précédentes restent comptées pour être évincées
+                if entry.name.endswith((_ENTRY_SUFFIX, '.png')):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _scan_size(self):
+        """Calcule la taille totale des entrées présentes sur le disque."""
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """Supprime les entrées les plus anciennes jusqu'à 90 % du budget."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                self.evictions += 1
+            except OSError:
+                pass
+            total -= size
+        self._total_bytes = total
+
+    def clear(self):
+        """Supprime toutes les entrées du cache."""
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+    def stats(self):
+        """
+        Retourne l'état du cache.
+
+        Returns:
+            dict: Succès, échecs, évictions, taille totale et budget
+        """
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+_default_cache = None
+
+def get_render_cache():
+    """
+    Retourne le cache de rendus du processus, ou None s'il est désactivé.
+
+    Returns:
+        RenderCache: Cache configuré par config.RENDER_CACHE_DIR et RENDER_CACHE_MAX_BYTES
+    """
+    global _default_cache
+    if not config.RENDER_CACHE_ENABLED:
+        return None
+    with _lock:
+        if _default_cache is None or _default_cache.directory != config.RENDER_CACHE_DIR:
+            _default_cache = RenderCache(config.RENDER_CACHE_DIR, config.RENDER_CACHE_MAX_BYTES)
+        return _default_cache
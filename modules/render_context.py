@@ -0,0 +1,65 @@
+"""
+Contexte d'un rendu : toutes les entrées propres à un rendu (taille, thème,
+échelle, polices) et les avertissements qu'il produit.
+
+Chaque rendu crée son propre contexte et le transmet à background,
+decorations et text_renderer : aucune de ces étapes ne lit ni n'écrit d'état
+global modifiable, si bien que des rendus peuvent s'exécuter en même temps
+dans plusieurs threads. Les seuls états partagés sont les caches (LRUCache),
+qui ne contiennent que des valeurs immuables ou copiées avant usage.
+"""
+from dataclasses import dataclass, field
+from modules import config, font_manager
+
+@dataclass
+class RenderContext:
+    """Entrées et avertissements d'un rendu, propres à ce rendu."""
+    theme: str
+    size: tuple                     # Taille réelle de l'image (largeur, hauteur)
+    scale: float = 1                # Facteur de réduction de l'aperçu
+    fonts: tuple = None             # (quote_font, author_font, signature_font)
+    is_default_font: bool = False   # Si la police par défaut remplace les polices Lato
+    warnings: list = field(default_factory=list)
+
+    @property
+    def colors(self):
+        """Couleurs du thème du rendu."""
+        return config.THEMES[self.theme]
+
+    @property
+    def canvas_size(self):
+        """Taille de l'image dessinée (largeur, hauteur), échelle appliquée."""
+        return round(self.size[0] * self.scale), round(self.size[1] * self.scale)
+
+    def warn(self, message):
+        """Ajoute un avertissement au rendu, une seule fois."""
+        if message and message not in self.warnings:
+            self.warnings.append(message)
+
+def create_context(theme='light', image_format=None, scale=1):
+    """
+    Crée le contexte d'un rendu et charge ses polices.
+
+    Args:
+        theme (str): Thème de couleurs ('light', 'dark')
+        image_format (str): Format de l'image (config.DEFAULT_FORMAT si absent)
+        scale (float): Facteur de réduction pour un aperçu
+
+    Returns:
+        RenderContext: Contexte prêt pour background, decorations et text_renderer
+
+    Raises:
+        ValueError: Si le thème ou le format est inconnu
+    """
+    if theme not in config.THEMES:
+        raise ValueError(f"thème inconnu '{theme}'")
+    image_format = image_format or config.DEFAULT_FORMAT
+    if image_format not in config.FORMATS:
+        raise ValueError(f"format d'image inconnu '{image_format}'")
+
+    quote_font, author_font, signature_font, is_default, warnings = font_manager.load_fonts(theme)
+    context = RenderContext(theme, config.FORMATS[image_format]['size'], scale,
+                            (quote_font, author_font, signature_font), is_default)
+    for warning in warnings:
+        context.warn(warning)
+    return context
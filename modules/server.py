@@ -0,0 +1,364 @@
+"""
+Service HTTP local de rendu de citations, sans dépendance externe.
+
+Usage :
+    python -m modules.server --port 8765 --workers 4 --max-pending 32
+
+Routes :
+    POST /render   Corps JSON (quote, author, theme, background, decoration,
+                   watermark, signature, auto_fit, profile, format) -> image encodée
+                   selon le profil (PNG en palette par défaut), avec les en-têtes
+                   X-Encode-Time-Ms et X-Encoder-Profile
+    GET  /render   Mêmes champs en paramètres d'URL
+    GET  /stats    Compteurs et latences p50/p99 en JSON
+    GET  /metrics  Histogrammes des rendus (durées par étape, octets, mémoire)
+                   et compteurs au format texte Prometheus
+    GET  /health   Vérification de disponibilité
+
+Les rendus tournent dans un pool de processus, démarrés et préchargés
+(polices, fonds par défaut) avant la première requête. Les requêtes
+identiques en cours sont regroupées en un seul rendu, et au-delà de
+max_pending rendus en attente le service répond 503 plutôt que d'empiler les
+requêtes.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+from modules import config, generator, metrics, warmup
+
+logger = logging.getLogger(__name__)
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+# Taille maximale acceptée pour le corps d'une requête
+MAX_BODY_BYTES = 64 * 1024
+
+class RenderError(Exception):
+    """
+    Erreur de rendu renvoyée par un processus du pool.
+
+    Args:
+        message (str): Erreurs du rendu
+        metrics (RenderMetrics): Mesures du rendu en échec, agrégées par le service
+    """
+
+    def __init__(self, message, metrics=None):
+        # Les deux valeurs dans args : l'exception traverse la frontière du processus par pickle
+        super().__init__(message, metrics)
+        self.metrics = metrics
+
+    def __str__(self):
+        return self.args[0]
+
+def _render(params):
+    """
+    Rend une image dans un processus du pool.
+
+    Args:
+        params (tuple): Paramètres de rendu sous forme de paires (nom, valeur) triées
+
+    Returns:
+        tuple: (données encodées, type MIME, durée d'encodage en millisecondes,
+                mesures du rendu)
+
+    Raises:
+        RenderError: Si le rendu a échoué (avec ses mesures)
+    """
+    result = generator.render_quote(**dict(params))
+    if not result.ok:
+        raise RenderError('; '.join(result.errors) or "le rendu a échoué", result.metrics)
+    return result.data, result.mime, result.encode_ms, result.metrics
+
+def percentile(samples, fraction):
+    """
+    Retourne le percentile d'un échantillon (méthode du rang le plus proche).
+
+    Args:
+        samples (list): Valeurs mesurées
+        fraction (float): Percentile voulu entre 0 et 1
+
+    Returns:
+        float: Valeur du percentile, ou None si l'échantillon est vide
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+class RenderService:
+    """
+    Service de rendu asynchrone avec regroupement des requêtes et contre-pression.
+
+    Args:
+        workers (int): Nombre de processus de rendu
+        max_pending (int): Nombre maximal de rendus distincts en cours ou en attente
+        executor (concurrent.futures.Executor): Exécuteur à utiliser à la place du pool de processus
+    """
+
+    def __init__(self, workers=None, max_pending=None, executor=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self.executor = executor or ProcessPoolExecutor(max_workers=self.workers,
+                                                        initializer=warmup.run_warm_up)
+        self._in_flight = {}
+        self._latencies = deque(maxlen=config.SERVER_LATENCY_WINDOW)
+        self.counters = {'requests': 0, 'renders': 0, 'coalesced': 0,
+                         'rejected': 0, 'errors': 0, 'bytes_sent': 0}
+        # Les rendus tournent dans d'autres processus : leurs mesures reviennent
+        # avec le résultat et sont agrégées ici
+        self.registry = metrics.MetricsRegistry()
+        self.request_seconds = metrics.Histogram(config.METRICS_DURATION_BUCKETS)
+
+    async def render(self, params):
+        """
+        Rend une image, en partageant le résultat entre requêtes identiques simultanées.
+
+        Args:
+            params (dict): Arguments de generator.render_quote
+
+        Returns:
+            tuple: (données, type MIME, durée d'encodage en ms, mesures du rendu),
+                   ou None si le service est saturé
+        """
+        key = tuple(sorted(params.items()))
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.counters['coalesced'] += 1
+            return await asyncio.shield(future)
+
+        if len(self._in_flight) >= self.max_pending:
+            self.counters['rejected'] += 1
+            return None
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, _render, key)
+        self._in_flight[key] = future
+        self.counters['renders'] += 1
+        try:
+            rendered = await asyncio.shield(future)
+        except RenderError as e:
+            # Un rendu en échec compte aussi, avec le statut 'error'
+            if e.metrics is not None:
+                self.registry.observe(e.metrics)
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+        # Un rendu partagé par plusieurs requêtes n'est compté qu'une fois
+        self.registry.observe(rendered[3])
+        return rendered
+
+    def stats(self):
+        """Retourne les compteurs, la charge et les latences p50/p99 en millisecondes."""
+        samples = list(self._latencies)
+        return dict(self.counters, in_flight=len(self._in_flight), workers=self.workers,
+                    max_pending=self.max_pending, samples=len(samples),
+                    p50_ms=percentile(samples, 0.50), p99_ms=percentile(samples, 0.99))
+
+    def metrics_text(self):
+        """
+        Retourne les mesures du service au format texte Prometheus.
+
+        Returns:
+            str: Mesures agrégées des rendus, durée des requêtes et compteurs du service
+        """
+        lines = [self.registry.to_prometheus().rstrip('\n'),
+                 '# HELP quote_http_request_duration_seconds Durée des requêtes /render servies.',
+                 '# TYPE quote_http_request_duration_seconds histogram']
+        lines += self.request_seconds.lines('quote_http_request_duration_seconds')
+        for name, value in self.counters.items():
+            lines += [f'# HELP quote_server_{name}_total Compteur {name} du service.',
+                      f'# TYPE quote_server_{name}_total counter',
+                      f'quote_server_{name}_total {value}']
+        lines += ['# HELP quote_server_in_flight Rendus distincts en cours ou en attente.',
+                  '# TYPE quote_server_in_flight gauge',
+                  f'quote_server_in_flight {len(self._in_flight)}']
+        return '\n'.join(lines) + '\n'
+
+    async def handle_request(self, method, target, body):
+        """
+        Traite une requête HTTP déjà analysée.
+
+        Args:
+            method (str): Méthode HTTP
+            target (str): Chemin et paramètres de la requête
+            body (bytes): Corps de la requête
+
+        Returns:
+            tuple: (code HTTP, type de contenu, corps de la réponse, en-têtes supplémentaires)
+        """
+        url = urlsplit(target)
+        if url.path == '/health':
+            return 200, 'text/plain; charset=utf-8', b'ok', None
+        if url.path == '/stats':
+            return 200, 'application/json', json.dumps(self.stats()).encode(), None
+        if url.path == '/metrics':
+            return 200, metrics.PROMETHEUS_CONTENT_TYPE, self.metrics_text().encode('utf-8'), None
+        if url.path != '/render':
+            return 404, 'application/json', _json_error("route inconnue"), None
+        if method not in ('GET', 'POST'):
+            return 405, 'application/json', _json_error("méthode non autorisée"), None
+
+        start = time.perf_counter()
+        self.counters['requests'] += 1
+        try:
+            fields = json.loads(body or b'{}') if method == 'POST' else dict(parse_qsl(url.query))
+            if not isinstance(fields, dict):
+                raise ValueError("le corps doit être un objet JSON")
+            params = generator.render_params_from_dict(fields)
+        except ValueError as e:
+            return 400, 'application/json', _json_error(str(e)), None
+
+        try:
+            rendered = await self.render(params)
+        except Exception as e:
+            self.counters['errors'] += 1
+            logger.error("Rendu en échec : %s", e)
+            return 500, 'application/json', _json_error(str(e)), None
+        if rendered is None:
+            return 503, 'application/json', _json_error("service saturé, réessayez plus tard"), None
+
+        data, mime, encode_ms, _ = rendered
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._latencies.append(elapsed_ms)
+        self.request_seconds.observe(elapsed_ms / 1000)
+        self.counters['bytes_sent'] += len(data)
+        return 200, mime, data, {'X-Encoder-Profile': params['profile'],
+                                 'X-Encode-Time-Ms': f"{encode_ms:.1f}"}
+
+    async def handle_connection(self, reader, writer):
+        """Sert les requêtes d'une connexion (HTTP/1.1 avec keep-alive)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await _write_response(writer, 400, 'application/json',
+                                          _json_error("requête invalide"), keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length') or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await _write_response(writer, 400, 'application/json',
+                                          _json_error("en-tête Content-Length invalide"), keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await _write_response(writer, 413, 'application/json',
+                                          _json_error("corps trop volumineux"), keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version.upper() == 'HTTP/1.1')
+                status, content_type, payload, extra = await self.handle_request(
+                    method.upper(), target, body)
+                if status == 503:
+                    extra = {'Retry-After': '1'}
+                await _write_response(writer, status, content_type, payload, keep_alive, extra)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start_workers(self):
+        """
+        Démarre les processus de rendu, préchargés par leur initialiseur, avant la première requête.
+
+        Returns:
+            float: Durée du démarrage en millisecondes
+        """
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, os.getpid)
+                               for _ in range(self.workers)))
+        return (time.perf_counter() - start) * 1000
+
+    def close(self):
+        """Arrête le pool de rendu."""
+        self.executor.shutdown(wait=False)
+
+def _json_error(message):
+    """Encode un message d'erreur en corps de réponse JSON."""
+    return json.dumps({'error': message}).encode()
+
+async def _write_response(writer, status, content_type, payload, keep_alive=True, extra_headers=None):
+    """Écrit une réponse HTTP/1.1 complète sur la connexion."""
+    headers = [
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+        f"Content-Type: {content_type}",
+        f"Content-Length: {len(payload)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}"
+    ]
+    for name, value in (extra_headers or {}).items():
+        headers.append(f"{name}: {value}")
+    writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + payload)
+    await writer.drain()
+
+async def serve(host='127.0.0.1', port=8765, workers=None, max_pending=None):
+    """
+    Démarre le service et le fait tourner jusqu'à interruption.
+
+    Args:
+        host (str): Adresse d'écoute (locale par défaut)
+        port (int): Port d'écoute
+        workers (int): Nombre de processus de rendu
+        max_pending (int): Nombre maximal de rendus distincts en attente
+    """
+    service = RenderService(workers=workers, max_pending=max_pending)
+    logger.info("Processus de rendu démarrés et préchargés en %.0f ms", await service.start_workers())
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    logger.info("Service de rendu sur http://%s:%d (%d processus, %d rendus en attente max)",
+                host, port, service.workers, service.max_pending)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande."""
+    parser = argparse.ArgumentParser(
+        prog='python -m modules.server',
+        description="Service HTTP local de rendu de citations.")
+    parser.add_argument('--host', default='127.0.0.1', help="Adresse d'écoute (défaut : 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="Port d'écoute (défaut : 8765)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Nombre de processus de rendu (défaut : nombre de cœurs)")
+    parser.add_argument('--max-pending', type=int, default=None,
+                        help="Rendus distincts en attente avant de répondre 503 (défaut : 4 par processus)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_pending))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Rapport de démarrage : temps d'import et temps du premier rendu d'un processus.
+
+Usage :
+    python -m modules.startup_report
+    python -m modules.startup_report --runs 7 --preview --json demarrage.json
+
+Chaque mesure est faite dans un interpréteur neuf :
+- import des modules chargés par app.py au lancement, qui ne doivent charger
+  ni numpy, ni Pillow, ni requests ;
+- import du moteur de rendu (modules.generator) ;
+- premier rendu du processus, sans puis avec préchargement (modules.warmup),
+  comparé au rendu suivant d'une autre citation.
+La commande échoue (code 1) si les modules de l'application chargent l'une de
+ces bibliothèques ou si l'import du moteur dépasse config.IMPORT_TIME_BUDGET_MS.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from modules import config
+from modules.import_budget import measure_import_time
+
+# Modules importés par app.py dès son lancement
+APP_MODULES = ('modules.config', 'modules.api_client', 'modules.history', 'modules.live_preview',
+               'modules.quote_library', 'modules.warmup')
+
+# Bibliothèques lourdes qui ne doivent être chargées qu'à la première utilisation
+DEFERRED_MODULES = ('numpy', 'PIL.Image', 'requests')
+
+# Script exécuté dans un interpréteur neuf pour mesurer le premier rendu
+_RENDER_PROBE = """
+import json, time
+from modules import config, generator, warmup
+warm_up_ms = None
+if {warm}:
+    start = time.perf_counter()
+    warmup.warm_up()
+    warm_up_ms = (time.perf_counter() - start) * 1000
+options = {options!r}
+durations = []
+for quote, author in config.FALLBACK_QUOTES[:2]:
+    start = time.perf_counter()
+    result = generator.render_quote(quote, author, use_cache=False, **options)
+    durations.append((time.perf_counter() - start) * 1000)
+    if not result.ok:
+        raise SystemExit('; '.join(result.errors))
+print(json.dumps({{'first_ms': durations[0], 'next_ms': durations[1], 'warm_up_ms': warm_up_ms}}))
+"""
+
+def measure_first_render(warm=False, preview=False, runs=5):
+    """
+    Mesure le premier rendu d'un processus neuf, moteur de rendu déjà importé.
+
+    Args:
+        warm (bool): Précharger polices et fonds (warmup.warm_up) avant le rendu
+        preview (bool): Rendre l'aperçu réduit de l'application plutôt que l'image en taille réelle
+        runs (int): Nombre de mesures
+
+    Returns:
+        dict: Médianes en millisecondes du premier rendu, du rendu suivant et
+              du préchargement (None sans préchargement)
+    """
+    options = {'scale': config.PREVIEW_SCALE, 'profile': config.PREVIEW_PROFILE} if preview else {}
+    probes = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', _RENDER_PROBE.format(warm=warm, options=options)],
+                                capture_output=True, text=True, check=True).stdout
+        probes.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'first_ms': statistics.median(probe['first_ms'] for probe in probes),
+        'next_ms': statistics.median(probe['next_ms'] for probe in probes),
+        'warm_up_ms': statistics.median(probe['warm_up_ms'] for probe in probes) if warm else None
+    }
+
+def build_report(runs=5, preview=False):
+    """
+    Mesure les temps d'import et de premier rendu.
+
+    Args:
+        runs (int): Nombre de mesures de chaque temps
+        preview (bool): Mesurer l'aperçu réduit plutôt que l'image en taille réelle
+
+    Returns:
+        dict: Imports ('app', 'generator') et premiers rendus ('cold', 'warm')
+    """
+    return {
+        'app': measure_import_time(', '.join(APP_MODULES), runs, watch=DEFERRED_MODULES),
+        'generator': measure_import_time('modules.generator', runs),
+        'cold': measure_first_render(False, preview, runs),
+        'warm': measure_first_render(True, preview, runs),
+        'preview': preview
+    }
+
+def main(argv=None):
+    """Point d'entrée de la ligne de commande."""
+    parser = argparse.ArgumentParser(
+        prog='python -m modules.startup_report',
+        description="Mesure le temps d'import et le temps du premier rendu d'un processus.")
+    parser.add_argument('--runs', type=int, default=5, help="Nombre de mesures de chaque temps")
+    parser.add_argument('--preview', action='store_true',
+                        help="Mesure l'aperçu réduit de l'application plutôt que l'image en taille réelle")
+    parser.add_argument('--json', default=None, help="Fichier où écrire les mesures en JSON")
+    parser.add_argument('--budget', type=float, default=config.IMPORT_TIME_BUDGET_MS,
+                        help="Budget d'import du moteur en millisecondes (défaut : config.IMPORT_TIME_BUDGET_MS)")
+    args = parser.parse_args(argv)
+
+    report = build_report(args.runs, args.preview)
+    app, engine, cold, warm = report['app'], report['generator'], report['cold'], report['warm']
+    kind = "aperçu" if args.preview else "rendu"
+    print(f"import des modules de l'application : médiane {app['median_ms']:.1f} ms"
+          f"{' (charge ' + ', '.join(app['loaded']) + ')' if app['loaded'] else ''}")
+    print(f"import du moteur de rendu : médiane {engine['median_ms']:.1f} ms (budget {args.budget:.0f} ms)")
+    print(f"premier {kind} sans préchargement : médiane {cold['first_ms']:.1f} ms "
+          f"({kind} suivant {cold['next_ms']:.1f} ms)")
+    print(f"premier {kind} après préchargement : médiane {warm['first_ms']:.1f} ms "
+          f"(préchargement {warm['warm_up_ms']:.1f} ms, {kind} suivant {warm['next_ms']:.1f} ms)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if app['loaded']:
+        print(f"ÉCHEC : les modules de l'application chargent {', '.join(app['loaded'])}")
+        return 1
+    if engine['median_ms'] > args.budget:
+        print("ÉCHEC : budget de temps d'import du moteur dépassé")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
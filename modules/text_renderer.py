@@ -1,13 +1,320 @@
 import textwrap
-from PIL import ImageDraw, ImageFont
-from modules import config
+from dataclasses import dataclass
+from PIL import Image, ImageDraw, ImageFont
+from modules import config, font_manager
+from modules.cache import LRUCache, image_nbytes
 
-def calculate_text_layout(draw, quote, author, fonts, is_default, max_width_px):
+# Mesures des caractères par (police, taille), puis des mots par (police, taille, texte)
+_glyph_cache = LRUCache(max_items=config.GLYPH_CACHE_SIZE, name='glyphs')
+_metrics_cache = LRUCache(max_items=config.TEXT_METRICS_CACHE_SIZE, name='text_metrics')
+
+# Dispositions complètes déjà calculées, et tailles retenues par l'ajustement automatique
+_layout_cache = LRUCache(max_items=config.LAYOUT_CACHE_SIZE, name='layouts')
+_fit_cache = LRUCache(max_items=config.LAYOUT_CACHE_SIZE, name='font_fits')
+
+# Textes rastérisés (masque et mesures), indexés par (texte, police, taille, phase)
+_sprite_cache = LRUCache(max_bytes=config.TEXT_SPRITE_CACHE_MAX_BYTES,
+                         sizeof=lambda sprite: image_nbytes(sprite.mask) if sprite.mask else 0,
+                         name='text_sprites')
+
+@dataclass(frozen=True)
+class LineLayout:
+    """Position et dimensions d'une ligne de texte dans le bloc de texte."""
+    text: str
+    x: float       # Décalage horizontal depuis le bord gauche du bloc (ligne centrée)
+    y: float       # Décalage vertical depuis le haut du bloc
+    width: int
+    height: int
+
+@dataclass(frozen=True)
+class TextLayout:
+    """
+    Disposition complète de la citation et de l'auteur.
+    
+    Toutes les positions sont relatives au coin supérieur gauche d'un bloc de
+    largeur max_width : le dessin n'a plus besoin de mesurer le texte.
+    """
+    lines: tuple
+    line_spacing: int
+    max_width: int
+    total_height: float
+    author: LineLayout = None
+    
+    @property
+    def wrapped_quote(self):
+        """Citation avec les retours à la ligne calculés."""
+        return '\n'.join(line.text for line in self.lines)
+
+@dataclass(frozen=True)
+class TextPlacement:
+    """
+    Position de chaque élément de texte sur l'image, en coordonnées de taille réelle.
+    
+    Calculée par place_text ; render_quote_text et les animations s'en servent
+    pour dessiner le texte aux mêmes endroits.
+    """
+    quote_font: object      # Police de la citation (éventuellement réduite par l'ajustement)
+    layout: TextLayout
+    origin: tuple           # Coin supérieur gauche (x, y) du bloc de texte
+    signature: tuple = None # Point (x, y) de la signature, None si absente
+    watermark: tuple = None # Point (x, y) du watermark, None si absent
+    
+    def position(self, line):
+        """Point (x, y) où dessiner une ligne de la disposition (citation ou auteur)."""
+        return self.origin[0] + line.x, self.origin[1] + line.y
+
+@dataclass(frozen=True)
+class TextSprite:
+    """
+    Texte rastérisé une fois pour toutes dans une police donnée.
+    
+    Le masque alpha est recadré sur l'encre du texte et offset le situe par
+    rapport au point où draw.text placerait le texte ; bbox reprend les
+    mesures de draw.textbbox((0, 0), ...) pour la mise en page.
+    """
+    mask: Image.Image   # Masque 'L' de l'encre, None si le texte n'a pas d'encre
+    offset: tuple       # Décalage (x, y) du masque depuis le point de dessin
+    bbox: tuple         # (gauche, haut, droite, bas) du texte
+    
+    @property
+    def width(self):
+        return self.bbox[2] - self.bbox[0]
+    
+    @property
+    def height(self):
+        return self.bbox[3] - self.bbox[1]
+
+def _rasterize_text(text, font, phase):
+    """Rastérise un texte en masque 'L' recadré sur son encre (voir get_text_sprite)."""
+    bbox = tuple(font.getbbox(text))
+    left, top, right, bottom = bbox
+    # Origine entière assez loin du bord pour que toute l'encre tienne dans le masque
+    origin_x, origin_y = max(0, -left), max(0, -top)
+    canvas = Image.new('L', (origin_x + max(right, 0) + 2, origin_y + max(bottom, 0) + 2), 0)
+    ImageDraw.Draw(canvas).text((origin_x + phase[0], origin_y + phase[1]), text, font=font, fill=255)
+    ink = canvas.getbbox()
+    if ink is None:
+        return TextSprite(None, (0, 0), bbox)
+    return TextSprite(canvas.crop(ink), (ink[0] - origin_x, ink[1] - origin_y), bbox)
+
+def get_text_sprite(text, font, phase=(0.0, 0.0)):
+    """
+    Retourne un texte rastérisé, calculé au premier appel puis relu dans le cache.
+    
+    Args:
+        text (str): Texte à rastériser (signature, watermark, ligne d'auteur...)
+        font (PIL.ImageFont): Police utilisée
+        phase (tuple): Partie fractionnaire (x, y) de la position, qui change le lissage des glyphes
+        
+    Returns:
+        TextSprite: Masque alpha du texte, son décalage et sa boîte englobante
+    """
+    key = (text, font_manager.font_key(font), phase)
+    return _sprite_cache.get_or_create(key, lambda: _rasterize_text(text, font, phase))
+
+def paste_text(img, position, text, font, fill):
+    """
+    Pose un texte sur l'image dans la couleur demandée, depuis le cache de textes rastérisés.
+    
+    Le résultat est identique à draw.text(position, text, font=font, fill=fill).
+    
+    Args:
+        img (PIL.Image): Image sur laquelle poser le texte
+        position (tuple): Point (x, y) où placer le texte
+        text (str): Texte à poser
+        font (PIL.ImageFont): Police utilisée
+        fill (tuple): Couleur RGB du texte
+    """
+    x, y = position
+    # Même découpage que draw.text : partie entière pour la position, fraction pour le lissage
+    x_int, y_int = int(x), int(y)
+    sprite = get_text_sprite(text, font, (x - x_int, y - y_int))
+    if sprite.mask is None:
+        return
+    left, top = x_int + sprite.offset[0], y_int + sprite.offset[1]
+    img.paste(fill, (left, top, left + sprite.mask.width, top + sprite.mask.height), sprite.mask)
+
+def _glyph_metrics(font):
+    """
+    Retourne la table des mesures de caractères d'une police à sa taille.
+    
+    Args:
+        font (PIL.ImageFont): Police utilisée
+        
+    Returns:
+        dict: Mesures (avance, gauche, haut, droite, bas) par caractère, complétée à la demande
+    """
+    return _glyph_cache.get_or_create(font_manager.font_key(font), dict)
+
+def _measure_text(font, text):
+    """
+    Mesure un fragment de texte en composant les mesures de ses caractères.
+    
+    La mise en page de base de Pillow n'applique pas de crénage : la largeur
+    d'un mot est exactement la somme des avances de ses caractères, ce qui
+    évite de faire repasser chaque mot par FreeType.
+    
+    Args:
+        font (PIL.ImageFont): Police utilisée
+        text (str): Fragment à mesurer
+        
+    Returns:
+        tuple: (avance, gauche, haut, droite, bas) en pixels
+    """
+    if not isinstance(font, ImageFont.FreeTypeFont) or font.layout_engine != ImageFont.Layout.BASIC:
+        return (font.getlength(text),) + tuple(font.getbbox(text))
+    
+    glyphs = _glyph_metrics(font)
+    offset = 0
+    left = top = right = bottom = None
+    for char in text:
+        metrics = glyphs.get(char)
+        if metrics is None:
+            metrics = (font.getlength(char),) + tuple(font.getbbox(char))
+            glyphs[char] = metrics
+        advance, char_left, char_top, char_right, char_bottom = metrics
+        if left is None:
+            left, top, bottom = offset + char_left, char_top, char_bottom
+        else:
+            top, bottom = min(top, char_top), max(bottom, char_bottom)
+        right = offset + char_right
+        offset += advance
+    if left is None:
+        return (0, 0, 0, 0, 0)
+    return (offset, left, top, right, bottom)
+
+def _measure(font, text, scale=1):
+    """
+    Mesure un fragment de texte, avec mise en cache par (police, taille, texte).
+    
+    Args:
+        font (PIL.ImageFont): Police utilisée
+        text (str): Fragment à mesurer (en général un mot)
+        scale (float): Facteur appliqué aux mesures, pour estimer une autre taille de police
+        
+    Returns:
+        tuple: (avance, gauche, haut, droite, bas) en pixels
+    """
+    key = (font_manager.font_key(font), text)
+    metrics = _metrics_cache.get_or_create(key, lambda: _measure_text(font, text))
+    if scale != 1:
+        return tuple(value * scale for value in metrics)
+    return metrics
+
+def measure_words(text, font):
+    """
+    Mesure à l'avance chaque mot d'un texte pour que les dispositions suivantes
+    (autres largeurs, autres formats) ne fassent que relire le cache.
+    
+    Args:
+        text (str): Texte dont les mots sont à mesurer
+        font (PIL.ImageFont): Police utilisée
+    """
+    _measure(font, " ")
+    for word in text.split():
+        _measure(font, word)
+
+def _split_long_word(font, word, max_width_px, scale=1):
+    """
+    Découpe un mot plus large que la ligne en morceaux qui tiennent chacun.
+    
+    Args:
+        font (PIL.ImageFont): Police utilisée
+        word (str): Mot à découper
+        max_width_px (int): Largeur maximale disponible
+        scale (float): Facteur appliqué aux mesures de la police
+        
+    Returns:
+        list: Morceaux du mot
+    """
+    chunks = []
+    current = ""
+    for char in word:
+        if current and _measure(font, current + char, scale)[3] > max_width_px:
+            chunks.append(current)
+            current = char
+        else:
+            current += char
+    if current:
+        chunks.append(current)
+    return chunks
+
+def wrap_text(text, font, max_width_px, scale=1):
+    """
+    Coupe un texte en lignes à partir de la largeur mesurée de chaque mot.
+    
+    Args:
+        text (str): Texte à couper
+        font (PIL.ImageFont): Police utilisée
+        max_width_px (int): Largeur maximale d'une ligne en pixels
+        scale (float): Facteur appliqué aux mesures de la police
+        
+    Returns:
+        list: Lignes, chacune étant la liste de ses mots
+    """
+    space_width = _measure(font, " ", scale)[0]
+    lines = []
+    current = []
+    current_width = 0
+    
+    for word in text.split():
+        advance, left, _, right, _ = _measure(font, word, scale)
+        # Largeur à l'encre de la ligne si on y ajoute ce mot
+        candidate_width = current_width + space_width + right if current else right - left
+        if current and candidate_width <= max_width_px:
+            current.append(word)
+            current_width += space_width + advance
+            continue
+        
+        if current:
+            lines.append(current)
+        if right - left > max_width_px:
+            # Mot trop long : on le coupe, le dernier morceau commence une ligne
+            *full_chunks, word = _split_long_word(font, word, max_width_px, scale)
+            lines.extend([chunk] for chunk in full_chunks)
+            advance = _measure(font, word, scale)[0]
+        current = [word]
+        current_width = advance
+    
+    if current:
+        lines.append(current)
+    return lines
+
+def _line_box(font, words, scale=1):
+    """
+    Calcule la largeur et la hauteur d'une ligne à partir des mesures de ses mots.
+    
+    Args:
+        font (PIL.ImageFont): Police utilisée
+        words (list): Mots de la ligne
+        scale (float): Facteur appliqué aux mesures de la police
+        
+    Returns:
+        tuple: (largeur, hauteur) de la boîte englobante de la ligne
+    """
+    space_width = _measure(font, " ", scale)[0]
+    offset = 0
+    left = right = None
+    top = bottom = None
+    for word in words:
+        advance, word_left, word_top, word_right, word_bottom = _measure(font, word, scale)
+        left = offset + word_left if left is None else left
+        right = offset + word_right
+        top = word_top if top is None else min(top, word_top)
+        bottom = word_bottom if bottom is None else max(bottom, word_bottom)
+        offset += advance + space_width
+    if left is None:
+        return 0, 0
+    return int(right - left), int(bottom - top)
+
+def calculate_text_layout(quote, author, fonts, is_default, max_width_px):
     """
     Calcule la disposition du texte sur l'image.
     
+    Le résultat est mémorisé par (citation, auteur, polices, largeur) : un même
+    texte n'est coupé et mesuré qu'une fois.
+    
     Args:
-        draw (PIL.ImageDraw.Draw): Objet de dessin PIL
         quote (str): Texte de la citation
         author (str): Nom de l'auteur
         fonts (tuple): Polices à utiliser (quote_font, author_font, signature_font)
@@ -15,68 +322,258 @@ def calculate_text_layout(draw, quote, author, fonts, is_default, max_width_px):
         max_width_px (int): Largeur maximale disponible pour le texte
         
     Returns:
-        tuple: (wrapped_quote, line_heights, total_text_height, author_text, author_width, author_line_height)
+        TextLayout: Disposition des lignes de la citation et de l'auteur
     """
     quote_font, author_font, signature_font = fonts
-    
+    key = (quote, author, font_manager.font_key(quote_font), font_manager.font_key(author_font),
+           is_default, max_width_px)
+    return _layout_cache.get_or_create(
+        key, lambda: _build_text_layout(quote, author, quote_font, author_font, is_default, max_width_px))
+
+def _build_text_layout(quote, author, quote_font, author_font, is_default, max_width_px):
+    """Construit la disposition du texte (voir calculate_text_layout)."""
     # Calcul de la césure (wrap)
     if is_default:
         chars_per_line_default = 60  # Plus de caractères par ligne pour la police par défaut
-        wrapped_quote = textwrap.fill(quote, width=chars_per_line_default)
+        quote_lines = [line.split() for line in textwrap.wrap(quote, width=chars_per_line_default)]
     else:
-        # Estimation pour TrueType
-        avg_char_width = draw.textlength("a", font=quote_font)
-        chars_per_line = int(max_width_px / avg_char_width) if avg_char_width > 0 else 30
-        wrapped_quote = textwrap.fill(quote, width=chars_per_line)
+        quote_lines = wrap_text(quote, quote_font, max_width_px)
     
-    quote_lines = wrapped_quote.split('\n')
     line_spacing = 10 if is_default else 15  # Moins d'espace pour la police par défaut
     
-    # Calcul de la hauteur totale
-    total_text_height = 0
-    line_heights = []
-    
-    for line in quote_lines:
+    # Position de chaque ligne et hauteur totale
+    lines = []
+    current_y = 0
+    for words in quote_lines:
         if is_default:
             # Estimation pour police par défaut (hauteur fixe, largeur variable)
-            line_width = draw.textlength(line, font=quote_font)
+            line_width = quote_font.getlength(" ".join(words))
             line_height = 10  # Hauteur approximative de la police par défaut
         else:
-            # Utilisation de textbbox pour TrueType
-            line_bbox = draw.textbbox((0, 0), line, font=quote_font)
-            line_width = line_bbox[2] - line_bbox[0]
-            line_height = line_bbox[3] - line_bbox[1]
+            line_width, line_height = _line_box(quote_font, words)
         
-        line_heights.append(line_height)
-        total_text_height += line_height
+        lines.append(LineLayout(" ".join(words), (max_width_px - line_width) / 2, current_y,
+                                line_width, line_height))
+        current_y += line_height + line_spacing
     
-    total_text_height += line_spacing * (len(quote_lines) - 1)
+    total_text_height = current_y - line_spacing if lines else 0
     
     # Informations pour l'auteur
-    author_text = ""
-    author_width = 0
-    author_line_height = 0
-    
+    author_layout = None
     if author:
         author_text = f"— {author}"
         if is_default:
             author_line_height = 10
-            author_width = draw.textlength(author_text, font=author_font)
+            author_width = author_font.getlength(author_text)
+        else:
+            _, left, top, right, bottom = _measure(author_font, author_text)
+            author_width, author_line_height = right - left, bottom - top
+        
+        # L'auteur est séparé de la citation par un double espacement
+        author_y = total_text_height + line_spacing * 2
+        author_layout = LineLayout(author_text, (max_width_px - author_width) / 2, author_y,
+                                   author_width, author_line_height)
+        total_text_height += author_line_height + line_spacing * 2
+    
+    return TextLayout(tuple(lines), line_spacing, max_width_px, total_text_height, author_layout)
+
+def max_fit_passes(min_size, max_size):
+    """
+    Borne supérieure du nombre de passes de disposition de fit_quote_font.
+    
+    Une passe exacte à la taille maximale, au plus ⌈log2(max - min + 1)⌉ passes
+    estimées pendant la recherche dichotomique, puis au plus
+    1 + AUTO_FIT_MAX_CORRECTIONS passes exactes de vérification.
+    
+    Args:
+        min_size (int): Taille minimale de la recherche
+        max_size (int): Taille maximale de la recherche
+        
+    Returns:
+        int: Nombre maximal de passes (11 pour l'intervalle 40-120)
+    """
+    search_passes = max(max_size - min_size, 1).bit_length()
+    return 1 + search_passes + 1 + config.AUTO_FIT_MAX_CORRECTIONS
+
+def _estimate_text_height(quote, quote_font, scale, max_width_px, author_height, line_spacing):
+    """
+    Estime la hauteur du bloc de texte pour une autre taille de police.
+    
+    Les mesures des mots à la taille de quote_font sont mises à l'échelle au
+    lieu d'être refaites par FreeType pour chaque taille essayée.
+    
+    Args:
+        quote (str): Texte de la citation
+        quote_font (PIL.ImageFont): Police de référence déjà mesurée
+        scale (float): Rapport entre la taille essayée et celle de quote_font
+        max_width_px (int): Largeur maximale disponible
+        author_height (float): Hauteur ajoutée par la ligne d'auteur
+        line_spacing (int): Espacement entre les lignes
+        
+    Returns:
+        float: Hauteur estimée du bloc de texte
+    """
+    lines = wrap_text(quote, quote_font, max_width_px, scale)
+    if not lines:
+        return author_height
+    heights = [_line_box(quote_font, words, scale)[1] for words in lines]
+    return sum(heights) + line_spacing * (len(lines) - 1) + author_height
+
+def fit_quote_font(quote, author, fonts, max_width_px, max_height_px,
+                   min_size=None, max_size=None):
+    """
+    Trouve la plus grande taille de police de citation dont le texte tient dans la boîte.
+    
+    La recherche dichotomique travaille sur les mesures mises en cache de la
+    police de référence (aucun rendu), puis la taille retenue est vérifiée par
+    une disposition exacte. Le nombre de passes est borné par max_fit_passes.
+    
+    Args:
+        quote (str): Texte de la citation
+        author (str): Nom de l'auteur
+        fonts (tuple): Polices à utiliser (quote_font, author_font, signature_font)
+        max_width_px (int): Largeur maximale disponible pour le texte
+        max_height_px (int): Hauteur maximale disponible pour le texte
+        min_size (int): Plus petite taille acceptée (config.QUOTE_FONT_SIZE_MIN par défaut)
+        max_size (int): Plus grande taille essayée (taille de quote_font par défaut)
+        
+    Returns:
+        tuple: (quote_font, layout, passes)
+            - quote_font (PIL.ImageFont): Police de citation à la taille retenue
+            - layout (TextLayout): Disposition exacte du texte avec cette police
+            - passes (int): Nombre de passes de disposition effectuées
+    """
+    quote_font, author_font, signature_font = fonts
+    if not isinstance(quote_font, ImageFont.FreeTypeFont):
+        # Police bitmap : une seule taille disponible
+        return quote_font, calculate_text_layout(quote, author, fonts, True, max_width_px), 1
+    
+    min_size = min_size or config.QUOTE_FONT_SIZE_MIN
+    max_size = max_size or quote_font.size
+    
+    # Une même citation dans la même boîte retrouve directement sa taille
+    key = (quote, author, font_manager.font_key(quote_font), font_manager.font_key(author_font),
+           max_width_px, max_height_px, min_size, max_size)
+    size = _fit_cache.get(key)
+    if size is not None:
+        quote_font = font_manager.resize_font(quote_font, size)
+        layout = calculate_text_layout(quote, author, (quote_font, author_font, signature_font),
+                                       False, max_width_px)
+        return quote_font, layout, 1
+    
+    quote_font, layout, passes = _search_quote_font(quote, author, quote_font, author_font,
+                                                    signature_font, max_width_px, max_height_px,
+                                                    min_size, max_size)
+    _fit_cache.put(key, quote_font.size)
+    return quote_font, layout, passes
+
+def _search_quote_font(quote, author, quote_font, author_font, signature_font,
+                       max_width_px, max_height_px, min_size, max_size):
+    """Recherche la taille de police de la citation (voir fit_quote_font)."""
+    # 1. Disposition exacte à la taille maximale : le cas courant des citations courtes
+    passes = 1
+    if quote_font.size != max_size:
+        quote_font = font_manager.resize_font(quote_font, max_size)
+    layout = calculate_text_layout(quote, author, (quote_font, author_font, signature_font),
+                                   False, max_width_px)
+    if layout.total_height <= max_height_px or max_size <= min_size:
+        return quote_font, layout, passes
+    
+    # 2. Recherche dichotomique sur les mesures mises à l'échelle
+    author_height = layout.author.height + layout.line_spacing * 2 if layout.author else 0
+    best = min_size
+    low, high = min_size, max_size - 1
+    while low <= high:
+        passes += 1
+        size = (low + high) // 2
+        height = _estimate_text_height(quote, quote_font, size / max_size, max_width_px,
+                                       author_height, layout.line_spacing)
+        if height <= max_height_px:
+            best = size
+            low = size + 1
         else:
-            author_bbox = draw.textbbox((0, 0), author_text, font=author_font)
-            author_width = author_bbox[2] - author_bbox[0]
-            author_line_height = author_bbox[3] - author_bbox[1]
+            high = size - 1
+    
+    # 3. Vérification exacte, en descendant si l'arrondi des glyphes déborde
+    for size in range(best, max(min_size, best - config.AUTO_FIT_MAX_CORRECTIONS) - 1, -1):
+        passes += 1
+        quote_font = font_manager.resize_font(quote_font, size)
+        layout = calculate_text_layout(quote, author, (quote_font, author_font, signature_font),
+                                       False, max_width_px)
+        if layout.total_height <= max_height_px:
+            break
+    return quote_font, layout, passes
+
+def place_text(quote, author, fonts, size, add_signature=True, add_watermark=True, auto_fit=False):
+    """
+    Calcule la position de chaque élément de texte sur une image en taille réelle.
+    
+    Args:
+        quote (str): Texte de la citation
+        author (str): Nom de l'auteur
+        fonts (tuple): Polices à utiliser (quote_font, author_font, signature_font)
+        size (tuple): Taille réelle de l'image (largeur, hauteur)
+        add_signature (bool): Si la signature doit être placée
+        add_watermark (bool): Si le watermark doit être placé
+        auto_fit (bool): Si la taille de la citation doit être réduite pour tenir dans l'image
         
-        # Ajouter l'espace pour l'auteur
-        total_text_height += author_line_height + line_spacing * 2  # Espace avant auteur
+    Returns:
+        TextPlacement: Police de la citation, disposition et positions du texte
+    """
+    quote_font, author_font, signature_font = fonts
+    is_default = isinstance(quote_font, ImageFont.ImageFont)  # Vérifie si c'est la police par défaut
+    width, height = size
+    max_width_px = width - (2 * config.PADDING)
+    
+    # Calculer l'espace pour la signature
+    signature_height = 0
+    if add_signature:
+        if is_default:
+            signature_height = 10
+        else:
+            signature_height = get_text_sprite(config.DEFAULT_SIGNATURE, signature_font).height
+    
+    # Calculer la disposition du texte
+    if auto_fit:
+        max_height_px = height - (2 * config.PADDING) - signature_height - 20
+        quote_font, layout, _ = fit_quote_font(quote, author, fonts, max_width_px, max_height_px)
+    else:
+        layout = calculate_text_layout(quote, author, fonts, is_default, max_width_px)
+    
+    # Position du bloc de texte : centré horizontalement et verticalement
+    block_x = (width - max_width_px) / 2
+    block_y = (height - layout.total_height - signature_height - 20) / 2
+    
+    # Signature en bas à droite
+    signature = None
+    if add_signature:
+        if is_default:
+            signature_width = signature_font.getlength(config.DEFAULT_SIGNATURE)
+        else:
+            signature_width = get_text_sprite(config.DEFAULT_SIGNATURE, signature_font).width
+        signature = (width - signature_width - 20, height - signature_height - 20)
+    
+    # Watermark en bas à gauche
+    watermark = None
+    if add_watermark:
+        if is_default:
+            watermark_height = 10
+        else:
+            watermark_height = get_text_sprite(config.DEFAULT_WATERMARK, signature_font).height
+        watermark = (20, height - watermark_height - 20)
     
-    return (wrapped_quote, quote_lines, line_heights, line_spacing, 
-            total_text_height, author_text, author_width, author_line_height)
+    return TextPlacement(quote_font, layout, (block_x, block_y), signature, watermark)
 
-def render_quote_text(img, quote, author, fonts, theme, add_signature=True, add_watermark=True):
+def render_quote_text(img, quote, author, fonts, theme, add_signature=True, add_watermark=True,
+                      auto_fit=False, scale=1, size=None, warnings=None):
     """
     Dessine la citation, l'auteur, et optionnellement la signature et le watermark sur l'image.
     
+    La disposition est toujours calculée à la taille réelle de l'image ; avec
+    scale < 1 (aperçu), les positions et les polices sont simplement mises à
+    l'échelle, si bien que les retours à la ligne et la taille de police
+    retenue sont identiques à ceux du rendu final.
+    
     Args:
         img (PIL.Image): Image sur laquelle dessiner
         quote (str): Texte de la citation
@@ -85,12 +582,15 @@ def render_quote_text(img, quote, author, fonts, theme, add_signature=True, add_
         theme (str): Thème de couleurs
         add_signature (bool): Si la signature doit être ajoutée
         add_watermark (bool): Si le watermark doit être ajouté
+        auto_fit (bool): Si la taille de la citation doit être réduite pour tenir dans l'image
+        scale (float): Rapport entre la taille de img et la taille réelle de l'image
+        size (tuple): Taille réelle de l'image (largeur, hauteur) ; déduite de img et scale si absente
+        warnings (list): Liste à laquelle ajouter l'erreur si le texte n'a pas pu être dessiné
         
     Returns:
         PIL.Image: Image avec le texte ajouté
     """
     quote_font, author_font, signature_font = fonts
-    is_default = isinstance(quote_font, ImageFont.ImageFont)  # Vérifie si c'est la police par défaut
     
     # Récupérer les couleurs du thème
     text_color = config.THEMES[theme]['text_color']
@@ -99,79 +599,86 @@ def render_quote_text(img, quote, author, fonts, theme, add_signature=True, add_
     
     # Préparer le dessin
     draw = ImageDraw.Draw(img)
-    max_width_px = config.IMAGE_WIDTH - (2 * config.PADDING)
+    width, height = size or (round(img.width / scale), round(img.height / scale))
+    
+    def draw_text(position, text, font, fill):
+        """Dessine un texte placé en coordonnées de l'image en taille réelle."""
+        x, y = position
+        draw.text((x * scale, y * scale), text, font=font_manager.scale_font(font, scale), fill=fill)
+    
+    def paste_sprite(position, text, font, fill):
+        """Pose un texte qui revient d'un rendu à l'autre, rastérisé une seule fois."""
+        x, y = position
+        paste_text(img, (x * scale, y * scale), text, font_manager.scale_font(font, scale), fill)
     
     try:
-        # Calculer la disposition du texte
-        layout = calculate_text_layout(draw, quote, author, fonts, is_default, max_width_px)
-        (wrapped_quote, quote_lines, line_heights, line_spacing, 
-         total_text_height, author_text, author_width, author_line_height) = layout
-        
-        # Calculer l'espace pour la signature
-        signature_height = 0
-        if add_signature:
-            signature_text = config.DEFAULT_SIGNATURE
-            if is_default:
-                signature_height = 10
-            else:
-                signature_bbox = draw.textbbox((0, 0), signature_text, font=signature_font)
-                signature_height = signature_bbox[3] - signature_bbox[1]
-        
-        # Calculer la position Y de départ pour centrer verticalement le texte principal
-        current_y = (config.IMAGE_HEIGHT - total_text_height - signature_height - 20) / 2
+        placement = place_text(quote, author, fonts, (width, height), add_signature=add_signature,
+                               add_watermark=add_watermark, auto_fit=auto_fit)
+        quote_font, layout = placement.quote_font, placement.layout
         
         # Dessiner la citation
-        for i, line in enumerate(quote_lines):
-            if is_default:
-                line_width = draw.textlength(line, font=quote_font)
-            else:
-                line_bbox = draw.textbbox((0, 0), line, font=quote_font)
-                line_width = line_bbox[2] - line_bbox[0]
-            
-            line_x = (config.IMAGE_WIDTH - line_width) / 2  # Centrer horizontalement
-            draw.text((line_x, current_y), line, font=quote_font, fill=text_color)
-            current_y += line_heights[i] + line_spacing
+        for line in layout.lines:
+            draw_text(placement.position(line), line.text, quote_font, text_color)
         
         # Dessiner l'auteur
-        if author:
-            current_y += line_spacing  # Espace supplémentaire
-            author_x = (config.IMAGE_WIDTH - author_width) / 2
-            draw.text((author_x, current_y), author_text, font=author_font, fill=author_color)
+        if layout.author:
+            paste_sprite(placement.position(layout.author), layout.author.text, author_font, author_color)
         
         # Ajouter la signature en bas
-        if add_signature:
-            signature_text = config.DEFAULT_SIGNATURE
-            if is_default:
-                signature_width = draw.textlength(signature_text, font=signature_font)
-            else:
-                signature_bbox = draw.textbbox((0, 0), signature_text, font=signature_font)
-                signature_width = signature_bbox[2] - signature_bbox[0]
-            
-            signature_x = config.IMAGE_WIDTH - signature_width - 20
-            signature_y = config.IMAGE_HEIGHT - signature_height - 20
-            draw.text((signature_x, signature_y), signature_text, font=signature_font, fill=signature_color)
+        if placement.signature:
+            paste_sprite(placement.signature, config.DEFAULT_SIGNATURE, signature_font, signature_color)
         
         # Ajouter le watermark
-        if add_watermark:
-            watermark_text = config.DEFAULT_WATERMARK
-            if is_default:
-                watermark_width = draw.textlength(watermark_text, font=signature_font)
-                watermark_height = 10
-            else:
-                watermark_bbox = draw.textbbox((0, 0), watermark_text, font=signature_font)
-                watermark_width = watermark_bbox[2] - watermark_bbox[0]
-                watermark_height = watermark_bbox[3] - watermark_bbox[1]
-            
-            watermark_x = 20
-            watermark_y = config.IMAGE_HEIGHT - watermark_height - 20
-            draw.text((watermark_x, watermark_y), watermark_text, font=signature_font, fill=signature_color)
+        if placement.watermark:
+            paste_sprite(placement.watermark, config.DEFAULT_WATERMARK, signature_font, signature_color)
     
     except Exception as e:
+        if warnings is not None:
+            warnings.append(f"Erreur lors du rendu du texte : {e}")
         # En cas d'erreur, essayer d'afficher un message d'erreur sur l'image
         try:
-            draw.text((config.PADDING, config.PADDING), f"Erreur lors du rendu du texte: {e}", 
+            draw.text((config.PADDING * scale, config.PADDING * scale), f"Erreur lors du rendu du texte: {e}", 
                       fill=(255, 0, 0), font=quote_font or ImageFont.load_default())
         except:
             pass  # Si même ça échoue, ne rien faire de plus
     
-    return img 
\ No newline at end of file
+    return img 
+
+def render_text(img, quote, author, context, add_signature=True, add_watermark=True, auto_fit=False):
+    """
+    Dessine le texte d'un rendu avec les polices, le thème et la taille de son contexte.
+    
+    Args:
+        img (PIL.Image): Image du rendu
+        quote (str): Texte de la citation
+        author (str): Nom de l'auteur
+        context (RenderContext): Contexte du rendu ; une erreur de dessin y est ajoutée aux avertissements
+        add_signature (bool): Si la signature doit être ajoutée
+        add_watermark (bool): Si le watermark doit être ajouté
+        auto_fit (bool): Si la taille de la citation doit être réduite pour tenir dans l'image
+        
+    Returns:
+        PIL.Image: Image avec le texte ajouté
+    """
+    return render_quote_text(img, quote, author, context.fonts, context.theme,
+                             add_signature=add_signature, add_watermark=add_watermark,
+                             auto_fit=auto_fit, scale=context.scale, size=context.size,
+                             warnings=context.warnings)
+
+def get_cache_stats():
+    """
+    Retourne l'état des caches du rendu de texte.
+    
+    Returns:
+        dict: Statistiques des caches de textes rastérisés, de mesures et de dispositions
+    """
+    return {
+        'sprites': _sprite_cache.stats(),
+        'metrics': _metrics_cache.stats(),
+        'layouts': _layout_cache.stats()
+    }
+
+def clear_cache():
+    """Vide les caches du rendu de texte : mesures, dispositions et textes rastérisés."""
+    for cache in (_glyph_cache, _metrics_cache, _layout_cache, _fit_cache, _sprite_cache):
+        cache.clear()
@@ -0,0 +1,100 @@
+"""
+Préchargement du moteur de rendu au démarrage d'un processus.
+
+Le premier rendu d'un processus paie l'import du moteur (numpy, Pillow), la
+lecture des polices Lato et la construction des fonds. warm_up fait ce travail
+d'avance : l'application le lance en arrière-plan dès sa première exécution
+(start_warm_up) et le service HTTP dans chaque processus de rendu, à son
+démarrage. Ce module n'importe lui-même que la configuration, pour que le
+lancer ne coûte rien au fil qui l'appelle.
+"""
+import logging
+import threading
+import time
+from modules import config
+
+logger = logging.getLogger(__name__)
+
+def warm_up(image_format=None, background_styles=None, scales=None):
+    """
+    Charge le moteur de rendu, les polices et les fonds par défaut dans les caches du processus.
+
+    Args:
+        image_format (str): Format dont les fonds sont construits (config.DEFAULT_FORMAT par défaut)
+        background_styles (list): Styles de fond construits (config.WARMUP_BACKGROUND_STYLES par défaut)
+        scales (tuple): Échelles construites (taille réelle et aperçu rapide par défaut)
+
+    Returns:
+        dict: Durée de chaque étape en millisecondes ('imports', 'fonts', 'backgrounds', 'encoder')
+    """
+    image_format = image_format or config.DEFAULT_FORMAT
+    background_styles = background_styles or config.WARMUP_BACKGROUND_STYLES
+    scales = scales or (1, config.PREVIEW_SCALE)
+    timings = {}
+
+    start = time.perf_counter()
+    # Import différé : c'est précisément le coût que le préchargement avance
+    # (generator n'est pas utilisé ici, mais le premier rendu en aura besoin)
+    from PIL import Image
+    from modules import background, encoder, font_manager, generator
+    timings['imports'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    quote_font, author_font, signature_font, _, _ = font_manager.load_fonts()
+    for scale in scales:
+        for font in (quote_font, author_font, signature_font):
+            # FreeType prépare chaque taille au premier tracé d'un caractère
+            font_manager.scale_font(font, scale).getmask('Aa')
+    timings['fonts'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    width, height = config.FORMATS[image_format]['size']
+    for scale in scales:
+        for theme in config.THEMES:
+            for style in background_styles:
+                # Même arrondi que RenderContext.canvas_size, pour retrouver ces fonds dans le cache
+                background.create_background(style, theme, round(width * scale), round(height * scale))
+    timings['backgrounds'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    # Les greffons d'écriture de Pillow ne sont chargés qu'au premier encodage
+    sample = Image.new('RGB', (16, 16), config.THEMES['light']['bg_color1'])
+    for profile in dict.fromkeys((config.DEFAULT_ENCODER_PROFILE, config.PREVIEW_PROFILE)):
+        encoder.encode_image(sample, profile)
+    timings['encoder'] = (time.perf_counter() - start) * 1000
+    return timings
+
+def run_warm_up():
+    """
+    Exécute le préchargement sans jamais échouer (initialiseur de processus, fil d'arrière-plan).
+
+    Returns:
+        dict: Durées des étapes (voir warm_up), ou None si le préchargement a échoué
+    """
+    start = time.perf_counter()
+    try:
+        timings = warm_up()
+    except Exception:
+        # Le premier rendu fera simplement ce travail lui-même
+        logger.exception("Échec du préchargement du moteur de rendu")
+        return None
+    logger.info("Moteur de rendu préchargé en %.0f ms (%s)", (time.perf_counter() - start) * 1000,
+                ', '.join(f"{name} {ms:.0f} ms" for name, ms in timings.items()))
+    return timings
+
+_thread = None
+_thread_lock = threading.Lock()
+
+def start_warm_up():
+    """
+    Lance le préchargement en arrière-plan, une seule fois par processus.
+
+    Returns:
+        threading.Thread: Fil du préchargement, ou None si config.WARMUP_ENABLED est faux
+    """
+    global _thread
+    with _thread_lock:
+        if _thread is None and config.WARMUP_ENABLED:
+            _thread = threading.Thread(target=run_warm_up, name='warmup', daemon=True)
+            _thread.start()
+        return _thread